@@ -1,4 +1,7 @@
+import os
+
 from fastapi import FastAPI
+from prometheus_client import make_asgi_app
 
 from .routers import note, provider, model, config
 
@@ -10,5 +13,8 @@ def create_app(lifespan) -> FastAPI:
     app.include_router(provider.router, prefix="/api")
     app.include_router(model.router,prefix="/api")
     app.include_router(config.router,  prefix="/api")
+    # Prometheus 指标（LLM token、延迟、费用等）
+    if os.getenv("METRICS_ENABLED", "true").lower() == "true":
+        app.mount("/metrics", make_asgi_app())
 
     return app
@@ -1,9 +1,38 @@
+from sqlalchemy import inspect, text
+
 from app.db.models.models import Model
 from app.db.models.providers import Provider
 from app.db.models.video_tasks import VideoTask
 from app.db.engine import get_engine, Base
+from app.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+# 旧数据库中缺少的列：create_all 不会修改已存在的表，启动时按需补齐
+_ADDED_COLUMNS = {
+    "providers": {
+        "rpm": "INTEGER",
+        "tpm": "INTEGER",
+        "max_concurrency": "INTEGER",
+    },
+}
+
+
+def _add_missing_columns(engine):
+    inspector = inspect(engine)
+    for table, columns in _ADDED_COLUMNS.items():
+        if not inspector.has_table(table):
+            continue
+        existing = {column["name"] for column in inspector.get_columns(table)}
+        with engine.begin() as conn:
+            for name, ddl in columns.items():
+                if name not in existing:
+                    conn.execute(text(f"ALTER TABLE {table} ADD COLUMN {name} {ddl}"))
+                    logger.info(f"数据库迁移：{table} 表新增列 {name}")
+
 
 def init_db():
     engine = get_engine()
 
-    Base.metadata.create_all(bind=engine)
\ No newline at end of file
+    Base.metadata.create_all(bind=engine)
+    _add_missing_columns(engine)
@@ -14,4 +14,8 @@ class Provider(Base):
     api_key = Column(String, nullable=False)
     base_url = Column(String, nullable=False)
     enabled = Column(Integer, default=1)
+    # 限流配置：每分钟请求数、每分钟 token 数、最大并发请求数，为空或 0 表示不限制
+    rpm = Column(Integer, nullable=True)
+    tpm = Column(Integer, nullable=True)
+    max_concurrency = Column(Integer, nullable=True)
     created_at = Column(DateTime, server_default=func.now())
\ No newline at end of file
@@ -1,12 +1,75 @@
 import json
 import os
 import sys
+import threading
+import time
+from typing import Dict, List, Optional
+
+from dotenv import load_dotenv
+
 from app.db.models.providers import Provider
 from app.utils.logger import get_logger
 from app.db.engine import get_engine, Base, get_db
 
+load_dotenv()
 logger = get_logger(__name__)
 
+# 供应商配置的进程内缓存有效期（秒）；本进程内的增删改会立即失效缓存，
+# 有效期只用于兜底多进程部署时其他进程的修改，设为 0 关闭缓存
+PROVIDER_CACHE_TTL = float(os.getenv("PROVIDER_CACHE_TTL", 300))
+
+
+class _ProviderCache:
+    """
+    providers 表的整表快照：表很小、读多写少，每个任务、每次转写和模型列表都要读取供应商配置，
+    缓存后不再每次新建会话查询。快照中的对象已脱离会话，调用方只读取属性，不应修改。
+    """
+
+    def __init__(self, ttl: float = PROVIDER_CACHE_TTL):
+        self.ttl = ttl
+        self._rows: Optional[List[Provider]] = None
+        self._by_id: Dict[str, Provider] = {}
+        self._loaded_at = 0.0
+        self._version = 0
+        self._lock = threading.Lock()
+
+    def rows(self) -> List[Provider]:
+        with self._lock:
+            if self._rows is not None and time.monotonic() - self._loaded_at < self.ttl:
+                return self._rows
+            version = self._version
+
+        db = next(get_db())
+        try:
+            rows = db.query(Provider).all()
+            db.expunge_all()
+        finally:
+            db.close()
+
+        with self._lock:
+            # 查询期间发生了写入时不保存快照，下次读取重新查询
+            if version == self._version:
+                self._rows = rows
+                self._by_id = {str(row.id): row for row in rows}
+                self._loaded_at = time.monotonic()
+        return rows
+
+    def get(self, id: str) -> Optional[Provider]:
+        rows = self.rows()
+        with self._lock:
+            if self._rows is rows:
+                return self._by_id.get(str(id))
+        return next((row for row in rows if str(row.id) == str(id)), None)
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._version += 1
+            self._rows = None
+            self._by_id = {}
+
+
+provider_cache = _ProviderCache()
+
 
 def get_builtin_providers_path():
     if getattr(sys, 'frozen', False):
@@ -42,6 +105,7 @@ def seed_default_providers():
                 enabled=p.get('enabled', 1)
             ))
         db.commit()
+        provider_cache.invalidate()
         logger.info("Default providers seeded successfully.")
     except Exception as e:
         logger.error(f"Failed to seed default providers: {e}")
@@ -49,12 +113,15 @@ def seed_default_providers():
         db.close()
 
 
-def insert_provider(id: str, name: str, api_key: str, base_url: str, logo: str, type_: str, enabled: int = 1):
+def insert_provider(id: str, name: str, api_key: str, base_url: str, logo: str, type_: str, enabled: int = 1,
+                    rpm: int = None, tpm: int = None, max_concurrency: int = None):
     db = next(get_db())
     try:
-        provider = Provider(id=id, name=name, api_key=api_key, base_url=base_url, logo=logo, type=type_, enabled=enabled)
+        provider = Provider(id=id, name=name, api_key=api_key, base_url=base_url, logo=logo, type=type_,
+                            enabled=enabled, rpm=rpm, tpm=tpm, max_concurrency=max_concurrency)
         db.add(provider)
         db.commit()
+        provider_cache.invalidate()
         logger.info(f"Provider inserted successfully. id: {id}, name: {name}, type: {type_}")
         return id
     except Exception as e:
@@ -64,35 +131,19 @@ def insert_provider(id: str, name: str, api_key: str, base_url: str, logo: str,
 
 
 def get_enabled_providers():
-    db = next(get_db())
-    try:
-        return db.query(Provider).filter_by(enabled=1).all()
-    finally:
-        db.close()
+    return [row for row in provider_cache.rows() if row.enabled == 1]
 
 
 def get_provider_by_name(name: str):
-    db = next(get_db())
-    try:
-        return db.query(Provider).filter_by(name=name).first()
-    finally:
-        db.close()
+    return next((row for row in provider_cache.rows() if row.name == name), None)
 
 
 def get_provider_by_id(id: str):
-    db = next(get_db())
-    try:
-        return db.query(Provider).filter_by(id=id).first()
-    finally:
-        db.close()
+    return provider_cache.get(id)
 
 
 def get_all_providers():
-    db = next(get_db())
-    try:
-        return db.query(Provider).all()
-    finally:
-        db.close()
+    return list(provider_cache.rows())
 
 
 def update_provider(id: str, **kwargs):
@@ -108,6 +159,7 @@ def update_provider(id: str, **kwargs):
                 setattr(provider, key, value)
 
         db.commit()
+        provider_cache.invalidate()
         logger.info(f"Provider updated successfully. id: {id}, updated_fields: {list(kwargs.keys())}")
     except Exception as e:
         logger.error(f"Failed to update provider: {e}")
@@ -122,6 +174,7 @@ def delete_provider(id: str):
         if provider:
             db.delete(provider)
             db.commit()
+            provider_cache.invalidate()
             logger.info(f"Provider deleted successfully. id: {id}")
     except Exception as e:
         logger.error(f"Failed to delete provider: {e}")
@@ -1,10 +1,12 @@
 import enum
 
 from abc import ABC, abstractmethod
-from typing import Optional, Union
+from typing import Optional, Tuple, Union
 
 from app.enmus.note_enums import DownloadQuality
 from app.models.notes_model import AudioDownloadResult
+from app.models.transcriber_model import TranscriptResult
+from app.utils.async_utils import run_io
 from os import getenv
 QUALITY_MAP = {
     "fast": "32",
@@ -36,3 +38,26 @@ class Downloader(ABC):
     def download_video(self, video_url: str,
                        output_dir: Union[str, None] = None) -> str:
         pass
+
+    def download_subtitles(self, video_url: str) -> Optional[Tuple[AudioDownloadResult, TranscriptResult]]:
+        '''
+        尝试直接获取平台字幕，跳过音频下载与 ASR，不支持的平台返回 None
+
+        :param video_url: 资源链接
+        :return: (不含本地音频的 AudioDownloadResult, 字幕转成的 TranscriptResult) 或 None
+        '''
+        return None
+
+    # ---------------- 异步接口 ----------------
+    # 默认在线程池中执行对应的同步实现（yt-dlp 等库只有同步接口），子类可覆盖为原生异步实现
+
+    async def adownload(self, video_url: str, output_dir: str = None,
+                        quality: DownloadQuality = "fast", need_video: Optional[bool] = False) -> AudioDownloadResult:
+        return await run_io(self.download, video_url=video_url, output_dir=output_dir,
+                            quality=quality, need_video=need_video)
+
+    async def adownload_video(self, video_url: str, output_dir: Union[str, None] = None) -> str:
+        return await run_io(self.download_video, video_url, output_dir)
+
+    async def adownload_subtitles(self, video_url: str) -> Optional[Tuple[AudioDownloadResult, TranscriptResult]]:
+        return await run_io(self.download_subtitles, video_url)
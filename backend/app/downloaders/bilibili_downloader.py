@@ -1,11 +1,13 @@
 import os
 from abc import ABC
-from typing import Union, Optional
+from typing import Union, Optional, Tuple
 
 import yt_dlp
 
 from app.downloaders.base import Downloader, DownloadQuality, QUALITY_MAP
+from app.downloaders.subtitle_helper import fetch_subtitles
 from app.models.notes_model import AudioDownloadResult
+from app.models.transcriber_model import TranscriptResult
 from app.utils.path_helper import get_data_dir
 from app.utils.url_parser import extract_video_id, normalize_bilibili_url
 from app.services.cookie_manager import CookieConfigManager
@@ -72,6 +74,30 @@ class BilibiliDownloader(Downloader, ABC):
             video_path=None  # ❗音频下载不包含视频路径
         )
 
+    def download_subtitles(self, video_url: str) -> Optional[Tuple[AudioDownloadResult, TranscriptResult]]:
+        """
+        优先使用 B 站 CC 字幕 / AI 字幕（AI 字幕需要登录 Cookie），存在时无需下载音频和转写
+        """
+        ydl_opts = {}
+        cookie = self.cookie_manager.get("bilibili")
+        if cookie:
+            ydl_opts['http_headers'] = {'Cookie': cookie}
+
+        fetched = fetch_subtitles(normalize_bilibili_url(video_url), ydl_opts)
+        if not fetched:
+            return None
+        info, transcript = fetched
+        return AudioDownloadResult(
+            file_path=None,  # 字幕直出，没有本地音频
+            title=info.get("title"),
+            duration=info.get("duration", 0),
+            cover_url=info.get("thumbnail"),
+            platform="bilibili",
+            video_id=info.get("id"),
+            raw_info={'tags': info.get('tags'), 'chapters': info.get('chapters')},
+            video_path=None
+        ), transcript
+
     def download_video(
         self,
         video_url: str,
@@ -9,6 +9,7 @@ from app.downloaders.base import Downloader
 from app.downloaders.kuaishou_helper.kuaishou import KuaiShou
 from app.enmus.note_enums import DownloadQuality
 from app.models.audio_model import AudioDownloadResult
+from app.utils.audio_decoder import can_decode_in_process
 from app.utils.path_helper import get_data_dir
 
 
@@ -37,11 +38,14 @@ class KuaiShouDownloader(Downloader, ABC):
         title = photo_info['caption'].strip().replace('\n', '').replace(' ', '_')[:50]
         mp4_path = os.path.join(output_dir, f"{video_id}.mp4")
         mp3_path = os.path.join(output_dir, f"{video_id}.mp3")
+        # 本地 whisper 可直接解码 mp4，无需转 mp3
+        in_process = can_decode_in_process()
+        audio_path = mp4_path if in_process else mp3_path
 
-        if os.path.exists(mp3_path):
-            print(f"[已存在] 跳过下载: {mp3_path}")
+        if os.path.exists(audio_path):
+            print(f"[已存在] 跳过下载: {audio_path}")
             return AudioDownloadResult(
-                file_path=mp3_path,
+                file_path=audio_path,
                 title=title,
                 duration=photo_info['duration'],
                 cover_url=photo_info['coverUrl'],
@@ -62,16 +66,17 @@ class KuaiShouDownloader(Downloader, ABC):
         else:
             raise Exception(f"视频下载失败: {resp.status_code}")
 
-        # 使用 ffmpeg 转换为 mp3
-        try:
-            subprocess.run([
-                "ffmpeg", "-y", "-i", mp4_path, "-vn", "-acodec", "libmp3lame", mp3_path
-            ], check=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
-        except subprocess.CalledProcessError:
-            raise Exception("ffmpeg 转换 MP3 失败")
+        # 远程 ASR 需要上传 mp3，使用 ffmpeg 转换
+        if not in_process:
+            try:
+                subprocess.run([
+                    "ffmpeg", "-y", "-i", mp4_path, "-vn", "-acodec", "libmp3lame", mp3_path
+                ], check=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+            except subprocess.CalledProcessError:
+                raise Exception("ffmpeg 转换 MP3 失败")
 
         return AudioDownloadResult(
-            file_path=mp3_path,
+            file_path=audio_path,
             title=photo_info['caption'],
             duration=photo_info['duration'],
             cover_url=photo_info['coverUrl'],
@@ -1,3 +1,4 @@
+import asyncio
 import os
 import subprocess
 from abc import ABC
@@ -9,6 +10,8 @@ from app.models.audio_model import AudioDownloadResult
 import os
 import subprocess
 
+from app.utils.async_utils import run_io, run_subprocess
+from app.utils.audio_decoder import can_decode_in_process
 from app.utils.video_helper import save_cover_to_static
 
 
@@ -31,19 +34,9 @@ class LocalDownloader(Downloader, ABC):
         if output_dir is None:
             output_dir = os.path.dirname(input_path)
 
-        base_name = os.path.splitext(os.path.basename(input_path))[0]
-        output_path = os.path.join(output_dir, f"{base_name}_cover.jpg")
-
+        output_path = self._cover_path(input_path, output_dir)
         try:
-            command = [
-                'ffmpeg',
-                '-i', input_path,
-                '-ss', '00:00:01',  # 跳到视频第1秒，防止黑屏
-                '-vframes', '1',  # 只截取一帧
-                '-q:v', '2',  # 输出质量高一点（qscale，2是很高）
-                '-y',  # 覆盖
-                output_path
-            ]
+            command = self._cover_command(input_path, output_path)
             subprocess.run(command, stdout=subprocess.PIPE, stderr=subprocess.PIPE, check=True)
 
             if not os.path.exists(output_path):
@@ -53,6 +46,36 @@ class LocalDownloader(Downloader, ABC):
         except subprocess.CalledProcessError as e:
             raise RuntimeError(f"提取封面失败: {output_path}") from e
 
+    @staticmethod
+    def _cover_path(input_path: str, output_dir: Optional[str] = None) -> str:
+        if output_dir is None:
+            output_dir = os.path.dirname(input_path)
+        base_name = os.path.splitext(os.path.basename(input_path))[0]
+        return os.path.join(output_dir, f"{base_name}_cover.jpg")
+
+    @staticmethod
+    def _cover_command(input_path: str, output_path: str) -> list:
+        return [
+            'ffmpeg',
+            '-i', input_path,
+            '-ss', '00:00:01',  # 跳到视频第1秒，防止黑屏
+            '-vframes', '1',  # 只截取一帧
+            '-q:v', '2',  # 输出质量高一点（qscale，2是很高）
+            '-y',  # 覆盖
+            output_path
+        ]
+
+    @staticmethod
+    def _mp3_command(input_path: str, output_path: str) -> list:
+        return [
+            'ffmpeg',
+            '-i', input_path,
+            '-vn',  # 不要视频流
+            '-acodec', 'libmp3lame',  # 使用mp3编码
+            '-y',  # 覆盖输出文件
+            output_path
+        ]
+
     def convert_to_mp3(self,input_path: str, output_path: str = None) -> str:
         """
         将本地视频文件转为 MP3 音频文件
@@ -68,15 +91,7 @@ class LocalDownloader(Downloader, ABC):
             output_path = base + ".mp3"
         try:
         # 调用 ffmpeg 转换
-            command = [
-                'ffmpeg',
-                '-i', input_path,
-                '-vn',  # 不要视频流
-                '-acodec', 'libmp3lame',  # 使用mp3编码
-                '-y',  # 覆盖输出文件
-                output_path
-            ]
-
+            command = self._mp3_command(input_path, output_path)
             subprocess.run(command, stdout=subprocess.PIPE, stderr=subprocess.PIPE, check=True)
 
             if not os.path.exists(output_path):
@@ -85,14 +100,19 @@ class LocalDownloader(Downloader, ABC):
             return output_path
         except subprocess.CalledProcessError as e:
             raise RuntimeError(f"mp3 文件生成失败: {output_path}") from e
-    def download_video(self, video_url: str, output_dir: str = None) -> str:
-        """
-        处理本地文件路径，返回视频文件路径
-        """
+    @staticmethod
+    def _resolve_path(video_url: str) -> str:
         if video_url.startswith('/uploads'):
             project_root = os.getcwd()
             video_url = os.path.join(project_root, video_url.lstrip('/'))
             video_url = os.path.normpath(video_url)
+        return video_url
+
+    def download_video(self, video_url: str, output_dir: str = None) -> str:
+        """
+        处理本地文件路径，返回视频文件路径
+        """
+        video_url = self._resolve_path(video_url)
 
         if not os.path.exists(video_url):
             raise FileNotFoundError()
@@ -107,10 +127,7 @@ class LocalDownloader(Downloader, ABC):
         """
         处理本地文件路径，返回音频元信息
         """
-        if video_url.startswith('/uploads'):
-            project_root = os.getcwd()
-            video_url = os.path.join(project_root, video_url.lstrip('/'))
-            video_url = os.path.normpath(video_url)
+        video_url = self._resolve_path(video_url)
 
         if not os.path.exists(video_url):
             raise FileNotFoundError(f"本地文件不存在: {video_url}")
@@ -118,11 +135,52 @@ class LocalDownloader(Downloader, ABC):
         file_name = os.path.basename(video_url)
         title, _ = os.path.splitext(file_name)
         print(title, file_name,video_url)
-        file_path=self.convert_to_mp3(video_url)
+        if can_decode_in_process():
+            # 本地 whisper 直接解码原文件，省去 mp3 编码再解码
+            file_path = video_url
+        else:
+            file_path = self.convert_to_mp3(video_url)
         cover_path = self.extract_cover(video_url)
         cover_url = save_cover_to_static(cover_path)
 
         print('file——path',file_path)
+        return self._build_result(title, file_path, cover_url)
+
+    async def _aconvert(self, command: list, output_path: str, error: str) -> str:
+        returncode, _, _ = await run_subprocess(command)
+        if returncode != 0 or not os.path.exists(output_path):
+            raise RuntimeError(f"{error}: {output_path}")
+        return output_path
+
+    async def adownload(
+            self,
+            video_url: str,
+            output_dir: str = None,
+            quality: DownloadQuality = "fast",
+            need_video: Optional[bool] = False
+    ) -> AudioDownloadResult:
+        """
+        download 的异步版本：mp3 转换与封面提取作为 asyncio 子进程并行执行
+        """
+        video_url = self._resolve_path(video_url)
+        if not os.path.exists(video_url):
+            raise FileNotFoundError(f"本地文件不存在: {video_url}")
+
+        title, _ = os.path.splitext(os.path.basename(video_url))
+        cover_path = self._cover_path(video_url)
+        jobs = [self._aconvert(self._cover_command(video_url, cover_path), cover_path, "提取封面失败")]
+        if can_decode_in_process():
+            file_path = video_url
+        else:
+            file_path = os.path.splitext(video_url)[0] + ".mp3"
+            jobs.append(self._aconvert(self._mp3_command(video_url, file_path), file_path, "mp3 文件生成失败"))
+        await asyncio.gather(*jobs)
+
+        cover_url = await run_io(save_cover_to_static, cover_path)
+        return self._build_result(title, file_path, cover_url)
+
+    @staticmethod
+    def _build_result(title: str, file_path: str, cover_url: str) -> AudioDownloadResult:
         return AudioDownloadResult(
             file_path=file_path,
             title=title,
@@ -0,0 +1,95 @@
+import os
+import re
+from typing import Optional, Tuple
+
+import yt_dlp
+
+from app.models.transcriber_model import TranscriptResult
+from app.utils.logger import get_logger
+from app.utils.subtitle_parser import parse_subtitle
+
+logger = get_logger(__name__)
+
+# 字幕语言偏好（正则，按优先级排列），ai-zh 为 B 站 AI 字幕
+SUBTITLE_LANGS = [
+    lang.strip() for lang in os.getenv("SUBTITLE_LANGS", "zh.*,ai-zh,en.*").split(",") if lang.strip()
+]
+# 字幕覆盖视频时长的最低比例，低于该比例（如只有片头歌词）视为不可用
+SUBTITLE_MIN_COVERAGE = float(os.getenv("SUBTITLE_MIN_COVERAGE", 0.5))
+
+
+def _lang_priority(lang: str) -> int:
+    for idx, pattern in enumerate(SUBTITLE_LANGS):
+        if re.fullmatch(pattern, lang):
+            return idx
+    return len(SUBTITLE_LANGS)
+
+
+def _normalize_lang(lang: str) -> str:
+    if lang.startswith("ai-"):
+        lang = lang[3:]
+    return lang.split("-")[0]
+
+
+def fetch_subtitles(video_url: str, ydl_opts: Optional[dict] = None) -> Optional[Tuple[dict, TranscriptResult]]:
+    """
+    只解析视频信息、不下载媒体，尝试获取平台字幕（人工字幕优先，其次自动字幕）
+
+    :param video_url: 视频链接
+    :param ydl_opts: 额外的 yt-dlp 参数（如 Cookie 请求头）
+    :return: (yt-dlp info 字典, TranscriptResult)；没有可用字幕时返回 None
+    """
+    opts = {
+        'skip_download': True,
+        'writesubtitles': True,
+        'writeautomaticsub': True,
+        'subtitleslangs': SUBTITLE_LANGS + ['-danmaku', '-live_chat'],
+        'subtitlesformat': 'json3/srt/vtt/json/best',
+        'noplaylist': True,
+        'quiet': True,
+    }
+    opts.update(ydl_opts or {})
+
+    with yt_dlp.YoutubeDL(opts) as ydl:
+        info = ydl.extract_info(video_url, download=False)
+        requested = info.get("requested_subtitles") or {}
+        if not requested:
+            return None
+
+        human = info.get("subtitles") or {}
+        original = info.get("language")
+        # 人工字幕 > 原始语言的自动字幕 > 其他自动字幕（如机翻），同级按语言偏好排序
+        candidates = sorted(
+            requested.items(),
+            key=lambda item: (
+                item[0] not in human,
+                not (original and _normalize_lang(item[0]) == _normalize_lang(original)),
+                _lang_priority(item[0]),
+            ),
+        )
+
+        duration = info.get("duration") or 0
+        for lang, sub in candidates:
+            try:
+                data = sub.get("data")
+                if data is None:
+                    data = ydl.urlopen(sub["url"]).read().decode("utf-8")
+                segments = parse_subtitle(data, sub.get("ext"))
+            except Exception as e:
+                logger.warning(f"字幕 {lang} 获取或解析失败：{e}")
+                continue
+
+            if not segments:
+                continue
+            if duration and segments[-1].end < duration * SUBTITLE_MIN_COVERAGE:
+                logger.info(f"字幕 {lang} 仅覆盖 {segments[-1].end:.0f}/{duration:.0f}s，跳过")
+                continue
+
+            logger.info(f"使用平台字幕 {lang}（{sub.get('ext')}），共 {len(segments)} 段")
+            return info, TranscriptResult(
+                language=_normalize_lang(lang),
+                full_text=" ".join(seg.text for seg in segments),
+                segments=segments,
+                raw={"source": "platform_subtitle", "lang": lang, "ext": sub.get("ext")},
+            )
+    return None
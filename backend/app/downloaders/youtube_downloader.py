@@ -1,11 +1,13 @@
 import os
 from abc import ABC
-from typing import Union, Optional
+from typing import Union, Optional, Tuple
 
 import yt_dlp
 
 from app.downloaders.base import Downloader, DownloadQuality
+from app.downloaders.subtitle_helper import fetch_subtitles
 from app.models.notes_model import AudioDownloadResult
+from app.models.transcriber_model import TranscriptResult
 from app.utils.path_helper import get_data_dir
 from app.utils.url_parser import extract_video_id
 
@@ -54,10 +56,29 @@ class YoutubeDownloader(Downloader, ABC):
             cover_url=cover_url,
             platform="youtube",
             video_id=video_id,
-            raw_info={'tags':info.get('tags')}, #全部返回会报错
+            raw_info={'tags': info.get('tags'), 'chapters': info.get('chapters')},  # 全部返回会报错
             video_path=None  # ❗音频下载不包含视频路径
         )
 
+    def download_subtitles(self, video_url: str) -> Optional[Tuple[AudioDownloadResult, TranscriptResult]]:
+        """
+        优先使用 YouTube 人工/自动字幕，存在时无需下载音频和转写
+        """
+        fetched = fetch_subtitles(video_url)
+        if not fetched:
+            return None
+        info, transcript = fetched
+        return AudioDownloadResult(
+            file_path=None,  # 字幕直出，没有本地音频
+            title=info.get("title"),
+            duration=info.get("duration", 0),
+            cover_url=info.get("thumbnail"),
+            platform="youtube",
+            video_id=info.get("id"),
+            raw_info={'tags': info.get('tags'), 'chapters': info.get('chapters')},
+            video_path=None
+        ), transcript
+
     def download_video(
         self,
         video_url: str,
@@ -15,6 +15,7 @@ class ProviderErrorEnum(enum.Enum):
 
 class NoteErrorEnum(enum.Enum):
     PLATFORM_NOT_SUPPORTED = (300101 ,"选择的平台不受支持")
+    CACHE_NOT_FOUND = (300102, "原任务的音频或转写缓存不存在，无法重新生成")
 
     def __init__(self, code, message):
         self.code = code
@@ -1,16 +1,24 @@
 from abc import ABC,abstractmethod
+from typing import Callable, Optional
 
 from app.models.gpt_model import GPTSource
+from app.utils.async_utils import run_io
 
 
 class GPT(ABC):
-    def summarize(self, source:GPTSource )->str:
+    def summarize(self, source:GPTSource, on_delta: Optional[Callable[[str], None]] = None)->str:
         '''
 
         :param source: 
+        :param on_delta: 流式输出回调，为空时一次性返回完整结果
         :return:
         '''
         pass
+    async def asummarize(self, source:GPTSource, on_delta: Optional[Callable[[str], None]] = None)->str:
+        '''
+        异步总结：默认在线程池中执行 summarize，支持异步客户端的实现可覆盖
+        '''
+        return await run_io(self.summarize, source, on_delta)
     def create_messages(self, segments:list,**kwargs)->list:
         pass
     def list_models(self):
@@ -0,0 +1,145 @@
+"""
+转录压缩：在构造提示词之前精简 ASR 分段。
+
+1. 去掉口头填充词（嗯、呃、um、uh ...）和分段内的循环重复（whisper 幻觉常见）；
+2. 丢弃与最近几段完全相同或高度相似的重复分段；
+3. 把分段按时间窗口合并，时间戳只保留在窗口起点；
+4. 从最小窗口开始逐级放大，选出第一个能放进 token 预算的窗口；
+   最大窗口仍放不下时使用最小窗口，保留细粒度的时间戳，由分层总结（map-reduce）继续处理。
+"""
+import os
+import re
+from dataclasses import asdict, dataclass
+from difflib import SequenceMatcher
+from typing import Callable, List, Tuple
+
+from dotenv import load_dotenv
+
+from app.gpt.map_reduce import MAP_REDUCE_THRESHOLD_TOKENS
+from app.gpt.tokens import estimate_tokens
+from app.models.transcriber_model import TranscriptSegment
+
+load_dotenv()
+
+TRANSCRIPT_COMPACTION = os.getenv("TRANSCRIPT_COMPACTION", "true").lower() == "true"
+# 合并窗口的最小/最大长度（秒）
+TRANSCRIPT_WINDOW_SECONDS = float(os.getenv("TRANSCRIPT_WINDOW_SECONDS", 20))
+TRANSCRIPT_MAX_WINDOW_SECONDS = float(os.getenv("TRANSCRIPT_MAX_WINDOW_SECONDS", 120))
+# 转录部分的 token 预算，默认与分层总结阈值一致，尽量让转录一次放进提示词
+TRANSCRIPT_TOKEN_BUDGET = int(os.getenv("TRANSCRIPT_TOKEN_BUDGET", MAP_REDUCE_THRESHOLD_TOKENS))
+# 与最近几段的相似度达到该值视为重复
+NEAR_DUPLICATE_RATIO = 0.9
+_RECENT = 3
+
+_FILLER_RE = re.compile(
+    r"(?:(?<=^)|(?<=[\s，,。.!?！？、]))"
+    r"(?:嗯+|呃+|额+|唔+|啊+|哦+|uh+|um+|uhm+|erm+|hmm+|ah+|eh+)"
+    r"(?=$|[\s，,。.!?！？、…])[\s，,、…]*",
+    re.IGNORECASE,
+)
+# 同一片段内连续重复 3 次及以上、以空白或标点隔开的短语，只保留一次。
+# 短语只含文字（不含数字与标点），避免把 1000000、1.1.1.1、…… 这类数字、版本号与省略号当成循环压缩；
+# 英文短语两端须是单词边界
+_LOOP_RE = re.compile(
+    r"(?<![A-Za-z])([^\W\d_](?:[^\W\d_]| (?=[^\W\d_])){1,29})"
+    r"(?:[\s，,。.!?！？、]+\1){2,}(?![A-Za-z])"
+)
+_NORMALIZE_RE = re.compile(r"[\s，,。.!?！？、…\"'“”‘’]+")
+
+
+@dataclass
+class CompactionStats:
+    original_segments: int
+    compacted_segments: int
+    dropped_duplicates: int
+    window_seconds: float
+    original_tokens: int
+    compacted_tokens: int
+
+    @property
+    def tokens_saved(self) -> int:
+        return self.original_tokens - self.compacted_tokens
+
+    def to_dict(self) -> dict:
+        return dict(asdict(self), tokens_saved=self.tokens_saved)
+
+
+def clean_text(text: str) -> str:
+    text = _LOOP_RE.sub(r"\1", text.strip())
+    text = _FILLER_RE.sub("", text)
+    return text.strip(" ，,、")
+
+
+def _normalize(text: str) -> str:
+    return _NORMALIZE_RE.sub("", text).lower()
+
+
+def dedupe_segments(segments: List[TranscriptSegment]) -> Tuple[List[TranscriptSegment], int]:
+    """
+    清理文本并丢弃与最近几段完全相同或高度相似的分段，返回 (保留的分段, 丢弃数)
+    """
+    kept: List[TranscriptSegment] = []
+    recent: List[str] = []
+    dropped = 0
+    for seg in segments:
+        text = clean_text(seg.text)
+        key = _normalize(text)
+        if not key:
+            dropped += 1
+            continue
+        if any(key == prev or SequenceMatcher(None, key, prev).ratio() >= NEAR_DUPLICATE_RATIO for prev in recent):
+            dropped += 1
+            # 重复分段并入上一段的时间范围，窗口边界不受影响
+            if kept:
+                kept[-1].end = max(kept[-1].end, seg.end)
+            continue
+        kept.append(TranscriptSegment(start=seg.start, end=seg.end, text=text))
+        recent = (recent + [key])[-_RECENT:]
+    return kept, dropped
+
+
+def merge_windows(segments: List[TranscriptSegment], window_seconds: float) -> List[TranscriptSegment]:
+    merged: List[TranscriptSegment] = []
+    for seg in segments:
+        if merged and seg.start - merged[-1].start < window_seconds:
+            merged[-1].text = f"{merged[-1].text} {seg.text}"
+            merged[-1].end = seg.end
+        else:
+            merged.append(TranscriptSegment(start=seg.start, end=seg.end, text=seg.text))
+    return merged
+
+
+def compact_segments(
+    segments: List[TranscriptSegment],
+    render: Callable[[List[TranscriptSegment]], str],
+    budget: int = TRANSCRIPT_TOKEN_BUDGET,
+) -> Tuple[List[TranscriptSegment], CompactionStats]:
+    """
+    :param segments: 原始转录分段
+    :param render: 把分段渲染为提示词文本的函数（与实际提示词格式一致，用于计数）
+    :param budget: 转录文本的 token 预算，<= 0 表示只使用最小窗口
+    """
+    original_tokens = estimate_tokens(render(segments))
+    cleaned, dropped = dedupe_segments(segments)
+
+    window = TRANSCRIPT_WINDOW_SECONDS
+    merged = merge_windows(cleaned, window)
+    tokens = estimate_tokens(render(merged))
+    smallest = (window, merged, tokens)
+    while budget > 0 and tokens > budget:
+        if window >= TRANSCRIPT_MAX_WINDOW_SECONDS:
+            # 放大窗口也放不进预算：分层总结能处理最小窗口，不必牺牲时间戳精度
+            window, merged, tokens = smallest
+            break
+        window = min(window * 2, TRANSCRIPT_MAX_WINDOW_SECONDS)
+        merged = merge_windows(cleaned, window)
+        tokens = estimate_tokens(render(merged))
+
+    return merged, CompactionStats(
+        original_segments=len(segments),
+        compacted_segments=len(merged),
+        dropped_duplicates=dropped,
+        window_seconds=window,
+        original_tokens=original_tokens,
+        compacted_tokens=tokens,
+    )
@@ -1,13 +1,50 @@
+from typing import List, Optional
+
 from openai import OpenAI
 
 from app.gpt.base import GPT
 from app.gpt.provider.OpenAI_compatible_provider import OpenAICompatibleProvider
+from app.gpt.rate_limiter import ProviderLimits, rate_limiters
+from app.gpt.router import LLMRoute
 from app.gpt.universal_gpt import UniversalGPT
 from app.models.model_config import ModelConfig
 
 
 class GPTFactory:
     @staticmethod
-    def from_config(config: ModelConfig) -> GPT:
-        client = OpenAICompatibleProvider(api_key=config.api_key, base_url=config.base_url).get_client
-        return UniversalGPT(client=client, model=config.model_name)
\ No newline at end of file
+    def _limiter(config: ModelConfig):
+        limits = ProviderLimits(
+            rpm=config.rpm or 0, tpm=config.tpm or 0, max_concurrency=config.max_concurrency or 0
+        )
+        return rate_limiters.get(config.provider_id or config.base_url, limits)
+
+    @staticmethod
+    def to_route(config: ModelConfig) -> LLMRoute:
+        provider = OpenAICompatibleProvider(
+            api_key=config.api_key, base_url=config.base_url, provider_id=config.provider_id
+        )
+        return LLMRoute(
+            provider_id=config.provider_id,
+            model=config.model_name,
+            client=provider.get_client,
+            async_client_factory=provider.get_async_client,
+            rate_limiter=GPTFactory._limiter(config),
+            base_url=config.base_url,
+        )
+
+    @staticmethod
+    def from_config(config: ModelConfig, fallbacks: Optional[List[ModelConfig]] = None) -> GPT:
+        """
+        :param fallbacks: 主模型出错或过慢时依次切换的备用 (供应商, 模型) 配置
+        """
+        provider = OpenAICompatibleProvider(
+            api_key=config.api_key, base_url=config.base_url, provider_id=config.provider_id
+        )
+        return UniversalGPT(
+            client=provider.get_client,
+            model=config.model_name,
+            async_client_factory=provider.get_async_client,
+            rate_limiter=GPTFactory._limiter(config),
+            provider_id=config.provider_id,
+            fallbacks=[GPTFactory.to_route(fallback) for fallback in fallbacks or []],
+        )
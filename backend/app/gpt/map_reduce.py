@@ -0,0 +1,248 @@
+"""
+长转录的分层总结（map-reduce）：
+
+1. 按 token 预算把转录分段切成若干块，尽量在章节边界或长停顿处切分；
+2. 以有限并发对每块生成要点摘要（map），摘要与笔记风格无关，按内容哈希缓存到磁盘；
+3. 将各块摘要按时间顺序合并，套用用户选择的风格与格式生成最终笔记（reduce）。
+
+因为块摘要不依赖风格、格式与截图，换一种风格重新生成时只需重新执行 reduce。
+"""
+import asyncio
+import contextvars
+import hashlib
+import os
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, List, Optional
+
+from dotenv import load_dotenv
+
+from app.gpt.prompt import MAP_PROMPT, REDUCE_HINT
+from app.gpt.telemetry import llm_phase
+from app.gpt.tokens import estimate_tokens
+from app.models.transcriber_model import TranscriptSegment
+from app.utils.logger import get_logger
+from app.utils.path_helper import get_app_dir
+
+load_dotenv()
+logger = get_logger(__name__)
+
+# 转录超过该 token 数时启用分层总结，设为 0 关闭
+MAP_REDUCE_THRESHOLD_TOKENS = int(os.getenv("MAP_REDUCE_THRESHOLD_TOKENS", 12000))
+# 每块转录的 token 上限
+MAP_REDUCE_CHUNK_TOKENS = int(os.getenv("MAP_REDUCE_CHUNK_TOKENS", 6000))
+# 同时进行的块摘要请求数
+MAP_REDUCE_CONCURRENCY = int(os.getenv("MAP_REDUCE_CONCURRENCY", 4))
+# 相邻分段间隔超过该秒数时视为话题切换点
+MAP_REDUCE_TOPIC_GAP = float(os.getenv("MAP_REDUCE_TOPIC_GAP", 3))
+# 块达到预算的该比例后，遇到章节或停顿即可提前切分
+_MIN_FILL = 0.6
+
+
+@dataclass
+class TranscriptChunk:
+    start: float
+    end: float
+    text: str
+    tokens: int
+
+
+def _chapter_starts(chapters: Optional[list]) -> List[float]:
+    starts = []
+    for chapter in chapters or []:
+        try:
+            starts.append(float(chapter.get("start_time", chapter.get("start"))))
+        except (AttributeError, TypeError, ValueError):
+            continue
+    return sorted(starts)
+
+
+def chunk_segments(
+    segments: List[TranscriptSegment],
+    lines: List[str],
+    budget: int = MAP_REDUCE_CHUNK_TOKENS,
+    chapters: Optional[list] = None,
+) -> List[TranscriptChunk]:
+    """
+    按 token 预算切分转录
+
+    :param segments: 转录分段
+    :param lines: 与 segments 一一对应的格式化文本行
+    :param budget: 每块 token 上限，单个分段超过上限时独占一块
+    :param chapters: 平台章节信息（yt-dlp 格式，含 start_time），用作优先切分点
+    """
+    boundaries = _chapter_starts(chapters)
+    chunks: List[TranscriptChunk] = []
+    current: List[str] = []
+    tokens = 0
+    start = end = 0.0
+    next_boundary = 0
+
+    def flush():
+        if current:
+            chunks.append(TranscriptChunk(start=start, end=end, text="\n".join(current), tokens=tokens))
+
+    for i, (seg, line) in enumerate(zip(segments, lines)):
+        line_tokens = estimate_tokens(line) + 1
+        at_chapter = False
+        while next_boundary < len(boundaries) and boundaries[next_boundary] <= seg.start:
+            at_chapter = True
+            next_boundary += 1
+        at_pause = i > 0 and seg.start - segments[i - 1].end >= MAP_REDUCE_TOPIC_GAP
+
+        if current and (
+            tokens + line_tokens > budget
+            or (tokens >= budget * _MIN_FILL and (at_chapter or at_pause))
+        ):
+            flush()
+            current, tokens = [], 0
+
+        if not current:
+            start = seg.start
+        current.append(line)
+        tokens += line_tokens
+        end = seg.end
+
+    flush()
+    return chunks
+
+
+class ChunkDigestCache:
+    """
+    块摘要磁盘缓存，键为模型、标题与块文本的哈希
+    """
+
+    def __init__(self, cache_dir: Optional[str] = None):
+        self.cache_dir = Path(cache_dir or get_app_dir("chunk_digests"))
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+
+    @staticmethod
+    def key(model: str, title: str, text: str) -> str:
+        payload = "\x00".join([model, title or "", MAP_PROMPT, text])
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[str]:
+        path = self.cache_dir / f"{key}.md"
+        return path.read_text(encoding="utf-8") if path.exists() else None
+
+    def set(self, key: str, digest: str) -> None:
+        path = self.cache_dir / f"{key}.md"
+        tmp = path.with_suffix(".tmp")
+        tmp.write_text(digest, encoding="utf-8")
+        tmp.replace(path)
+
+
+def should_map_reduce(segment_text: str) -> bool:
+    return MAP_REDUCE_THRESHOLD_TOKENS > 0 and estimate_tokens(segment_text) > MAP_REDUCE_THRESHOLD_TOKENS
+
+
+class MapReduceSummarizer:
+    def __init__(self, gpt, concurrency: int = MAP_REDUCE_CONCURRENCY, cache: Optional[ChunkDigestCache] = None):
+        """
+        :param gpt: UniversalGPT 实例，使用其模型与客户端发起请求
+        """
+        self.gpt = gpt
+        self.concurrency = max(1, concurrency)
+        self.cache = cache or ChunkDigestCache()
+
+    def _map_messages(self, chunk: TranscriptChunk, title: str) -> list:
+        prompt = MAP_PROMPT.format(
+            video_title=title,
+            time_range=f"{self.gpt._format_time(chunk.start)} ~ {self.gpt._format_time(chunk.end)}",
+            segment_text=chunk.text,
+        )
+        return [{"role": "user", "content": prompt}]
+
+    def _digest(self, chunk: TranscriptChunk, title: str, use_cache: bool = True) -> str:
+        key = self.cache.key(self.gpt.model, title, chunk.text)
+        cached = self.cache.get(key) if use_cache else None
+        if cached is not None:
+            return cached
+
+        # 块摘要有自己的缓存，不再写入通用响应缓存
+        llm_phase.set("map")
+        digest = self.gpt.complete(self._map_messages(chunk, title), use_cache=False)
+        self.cache.set(key, digest)
+        return digest
+
+    async def _adigest(self, chunk: TranscriptChunk, title: str, semaphore: asyncio.Semaphore,
+                       use_cache: bool = True) -> str:
+        key = self.cache.key(self.gpt.model, title, chunk.text)
+        cached = self.cache.get(key) if use_cache else None
+        if cached is not None:
+            return cached
+
+        # 每个块在 gather 创建的独立任务中执行，设置的阶段不影响调用方
+        llm_phase.set("map")
+        async with semaphore:
+            digest = await self.gpt.acomplete(self._map_messages(chunk, title), use_cache=False)
+        self.cache.set(key, digest)
+        return digest
+
+    def map(self, chunks: List[TranscriptChunk], title: str, use_cache: bool = True) -> List[str]:
+        with ThreadPoolExecutor(max_workers=min(self.concurrency, len(chunks))) as pool:
+            # 每个块在调用方上下文的副本中执行，保留任务 ID 与调用记录
+            futures = [
+                pool.submit(contextvars.copy_context().run, self._digest, chunk, title, use_cache)
+                for chunk in chunks
+            ]
+            return [future.result() for future in futures]
+
+    async def amap(self, chunks: List[TranscriptChunk], title: str, use_cache: bool = True) -> List[str]:
+        semaphore = asyncio.Semaphore(self.concurrency)
+        return list(await asyncio.gather(*(self._adigest(chunk, title, semaphore, use_cache) for chunk in chunks)))
+
+    def _reduce_messages(self, source, segments: List[TranscriptSegment], chunks: List[TranscriptChunk],
+                         digests: List[str]) -> list:
+        digest_text = "\n\n".join(
+            f"[{self.gpt._format_time(chunk.start)} - {self.gpt._format_time(chunk.end)}]\n{digest}"
+            for chunk, digest in zip(chunks, digests)
+        )
+        extras = REDUCE_HINT + (f"\n{source.extras}" if source.extras else "")
+        return self.gpt.create_messages(
+            segments,
+            segment_text=digest_text,
+            title=source.title,
+            tags=source.tags,
+            video_img_urls=source.video_img_urls,
+            _format=source._format,
+            style=source.style,
+            extras=extras,
+        )
+
+    def summarize(
+        self,
+        source,
+        segments: List[TranscriptSegment],
+        lines: List[str],
+        on_delta: Optional[Callable[[str], None]] = None,
+        use_cache: bool = True,
+    ) -> str:
+        chunks = chunk_segments(segments, lines, chapters=source.chapters)
+        logger.info(f"转录较长，启用分层总结：{len(chunks)} 块，并发 {self.concurrency}")
+        digests = self.map(chunks, source.title, use_cache)
+        messages = self._reduce_messages(source, segments, chunks, digests)
+        token = llm_phase.set("reduce")
+        try:
+            return self.gpt.complete(messages, on_delta=on_delta, use_cache=use_cache)
+        finally:
+            llm_phase.reset(token)
+
+    async def asummarize(
+        self,
+        source,
+        segments: List[TranscriptSegment],
+        lines: List[str],
+        on_delta: Optional[Callable[[str], None]] = None,
+        use_cache: bool = True,
+    ) -> str:
+        chunks = chunk_segments(segments, lines, chapters=source.chapters)
+        logger.info(f"转录较长，启用分层总结：{len(chunks)} 块，并发 {self.concurrency}")
+        digests = await self.amap(chunks, source.title, use_cache)
+        messages = self._reduce_messages(source, segments, chunks, digests)
+        token = llm_phase.set("reduce")
+        try:
+            return await self.gpt.acomplete(messages, on_delta=on_delta, use_cache=use_cache)
+        finally:
+            llm_phase.reset(token)
@@ -66,4 +66,23 @@ SCREENSHOT='''
 8. **Screenshot placeholders**: If a section involves **visual demonstrations, code walkthroughs, UI interactions**, or any content where visuals aid understanding, insert a screenshot cue at the end of that section:
    - Format: `*Screenshot-[mm:ss]`
    - Only use it when truly helpful.
-'''
\ No newline at end of file
+'''
+
+MAP_PROMPT = '''
+你是一个专业的笔记助手。下面是视频《{video_title}》中 {time_range} 这一段的转录内容（格式：开始时间 - 内容）。
+这段内容之后会与其他片段的摘要合并成完整笔记，请为这一段生成详细的要点摘要：
+
+- 使用中文，专有名词、技术术语、人名可保留英文。
+- 按内容顺序列出要点，每个要点以该内容的开始时间开头，格式：`mm:ss - 要点`。
+- 保留重要的事实、数据、示例、结论、公式（LaTeX）和步骤，去除广告、寒暄和口头禅。
+- 不要添加开场白或总结语，只输出要点列表。
+
+---
+{segment_text}
+---
+'''
+
+REDUCE_HINT = '''
+注意：上面的“视频分段”不是原始转录，而是按时间顺序逐段整理好的要点摘要（每段标注了时间范围，每条要点以开始时间开头）。
+请将它们合并为一份完整、连贯、不重复的笔记，时间标记请使用要点中给出的时间。
+'''
@@ -22,13 +22,26 @@ note_styles = [
 
 # 生成 BASE_PROMPT 函数
 def generate_base_prompt(title, segment_text, tags, _format=None, style=None, extras=None):
-    # 生成 Base Prompt 开头部分
-    prompt = BASE_PROMPT.format(
+    return generate_context_prompt(title, segment_text, tags) + generate_instruction_prompt(_format, style, extras)
+
+
+def generate_context_prompt(title, segment_text, tags):
+    """
+    提示词中只与视频相关的部分（标题、标签、转录），同一视频换风格重新生成时保持不变，
+    放在消息最前面，便于命中模型供应商的前缀缓存
+    """
+    return BASE_PROMPT.format(
         video_title=title,
         segment_text=segment_text,
         tags=tags
     )
 
+
+def generate_instruction_prompt(_format=None, style=None, extras=None):
+    """
+    提示词中随格式、风格与额外要求变化的部分
+    """
+    prompt = ""
     # 添加用户选择的格式
     if _format:
         prompt += "\n" + "\n".join([get_format_function(f) for f in _format])
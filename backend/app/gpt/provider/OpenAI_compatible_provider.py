@@ -1,13 +1,23 @@
+import asyncio
+import hashlib
+import importlib.util
 import os
-from typing import Optional, Union
+import threading
+import weakref
+from typing import Dict, Optional, Union
 
 import httpx
-from openai import OpenAI
+from openai import AsyncOpenAI, DefaultAsyncHttpxClient, DefaultHttpxClient, OpenAI
 
 from app.utils.logger import get_logger
 
 logging = get_logger(__name__)
 
+# 连接池参数：同一供应商的请求复用 TLS 连接，安装 h2 后启用 HTTP/2 多路复用
+LLM_POOL_MAX_CONNECTIONS = int(os.getenv("LLM_POOL_MAX_CONNECTIONS", 20))
+LLM_POOL_KEEPALIVE_EXPIRY = float(os.getenv("LLM_POOL_KEEPALIVE_EXPIRY", 120))
+LLM_HTTP2 = os.getenv("LLM_HTTP2", "true").lower() == "true" and importlib.util.find_spec("h2") is not None
+
 # 需要使用代理的 API 域名列表
 PROXY_DOMAINS = [
     "googleapis.com",
@@ -27,38 +37,150 @@ def _needs_proxy(base_url: str) -> bool:
     return False
 
 
-def _get_http_client(base_url: str) -> Optional[httpx.Client]:
-    """根据 base_url 返回合适的 HTTP 客户端（带代理或不带）"""
+def _get_proxy_url(base_url: str) -> Optional[str]:
+    """根据 base_url 返回需要使用的代理地址，不需要代理时返回 None"""
     if not _needs_proxy(base_url):
         return None
-
     # 从环境变量获取代理配置
-    proxy_url = os.getenv("LLM_PROXY") or os.getenv("HTTPS_PROXY") or os.getenv("HTTP_PROXY")
-    if not proxy_url:
-        return None
+    return os.getenv("LLM_PROXY") or os.getenv("HTTPS_PROXY") or os.getenv("HTTP_PROXY")
+
+
+def _pool_options(base_url: str) -> dict:
+    proxy_url = _get_proxy_url(base_url)
+    if proxy_url:
+        logging.info(f"使用代理 {proxy_url} 访问 {base_url}")
+    return {
+        "proxy": proxy_url,
+        "http2": LLM_HTTP2,
+        "limits": httpx.Limits(
+            max_connections=LLM_POOL_MAX_CONNECTIONS,
+            max_keepalive_connections=LLM_POOL_MAX_CONNECTIONS,
+            keepalive_expiry=LLM_POOL_KEEPALIVE_EXPIRY,
+        ),
+    }
+
+
+def _get_http_client(base_url: str) -> httpx.Client:
+    """创建带连接池（及按需代理）的 HTTP 客户端，供同一供应商的所有请求长期复用"""
+    return DefaultHttpxClient(**_pool_options(base_url))
+
+
+def _get_async_http_client(base_url: str) -> httpx.AsyncClient:
+    return DefaultAsyncHttpxClient(**_pool_options(base_url))
+
+
+class ClientRegistry:
+    """
+    OpenAI 客户端注册表，键为 供应商 ID + 配置哈希（api_key、base_url、代理）。
 
-    logging.info(f"使用代理 {proxy_url} 访问 {base_url}")
-    return httpx.Client(proxy=proxy_url)
+    供应商凭据变更后配置哈希随之变化，旧客户端不会再被取到；
+    update_provider / delete_provider 时调用 invalidate 主动移除旧客户端。
+    异步客户端的连接池绑定在创建它的事件循环上，因此按事件循环分别缓存，事件循环销毁后随之释放。
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._clients: Dict[str, OpenAI] = {}
+        self._async_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[str, AsyncOpenAI]]" = \
+            weakref.WeakKeyDictionary()
+
+    @staticmethod
+    def _key(api_key: str, base_url: str, provider_id: Optional[str]) -> str:
+        # 没有供应商 ID（如临时测试）时以 base_url 归组，相同配置仍可复用
+        payload = "\x00".join([api_key or "", base_url or "", _get_proxy_url(base_url) or ""])
+        return f"{provider_id or base_url}:{hashlib.sha256(payload.encode('utf-8')).hexdigest()[:16]}"
+
+    def get(self, api_key: str, base_url: str, provider_id: Optional[str] = None) -> OpenAI:
+        key = self._key(api_key, base_url, provider_id)
+        with self._lock:
+            client = self._clients.get(key)
+            if client is None:
+                client = OpenAI(api_key=api_key, base_url=base_url, http_client=_get_http_client(base_url))
+                self._clients[key] = client
+                logging.info(f"创建 LLM 客户端连接池 (provider={provider_id or base_url}, http2={LLM_HTTP2})")
+            return client
+
+    def get_async(self, api_key: str, base_url: str, provider_id: Optional[str] = None) -> AsyncOpenAI:
+        """
+        返回当前事件循环下的异步客户端，必须在事件循环中调用
+        """
+        loop = asyncio.get_running_loop()
+        key = self._key(api_key, base_url, provider_id)
+        with self._lock:
+            clients = self._async_clients.setdefault(loop, {})
+            client = clients.get(key)
+            if client is None:
+                client = AsyncOpenAI(api_key=api_key, base_url=base_url, http_client=_get_async_http_client(base_url))
+                clients[key] = client
+            return client
+
+    def invalidate(self, provider_id: str) -> None:
+        # 只从注册表移除，不主动关闭：可能仍有进行中的请求在使用旧客户端，
+        # 其空闲连接会在 keepalive_expiry 后释放
+        def is_stale(key: str) -> bool:
+            return key.split(":", 1)[0] == str(provider_id)
+
+        with self._lock:
+            stale = [key for key in self._clients if is_stale(key)]
+            for key in stale:
+                self._clients.pop(key)
+            for clients in self._async_clients.values():
+                for key in [key for key in clients if is_stale(key)]:
+                    stale.append(clients.pop(key))
+        if stale:
+            logging.info(f"已失效供应商 {provider_id} 的 LLM 客户端")
+
+    async def aclose(self) -> None:
+        """
+        关闭全部同步客户端与当前事件循环下的异步客户端（服务退出时调用）
+        """
+        with self._lock:
+            clients = list(self._clients.values())
+            self._clients.clear()
+            async_clients = list(self._async_clients.pop(asyncio.get_running_loop(), {}).values())
+        for client in clients:
+            try:
+                client.close()
+            except Exception:
+                pass
+        for client in async_clients:
+            try:
+                await client.close()
+            except Exception:
+                pass
+
+
+client_registry = ClientRegistry()
 
 
 class OpenAICompatibleProvider:
-    def __init__(self, api_key: str, base_url: str, model: Union[str, None] = None):
-        http_client = _get_http_client(base_url)
-        self.client = OpenAI(api_key=api_key, base_url=base_url, http_client=http_client)
+    def __init__(self, api_key: str, base_url: str, model: Union[str, None] = None, provider_id: Optional[str] = None):
+        self.client = client_registry.get(api_key=api_key, base_url=base_url, provider_id=provider_id)
         self.model = model
+        self._config = {"api_key": api_key, "base_url": base_url, "provider_id": provider_id}
 
     @property
     def get_client(self):
         return self.client
 
+    def get_async_client(self) -> AsyncOpenAI:
+        """当前事件循环下的异步客户端，需在事件循环中调用"""
+        return client_registry.get_async(**self._config)
+
     @staticmethod
-    def test_connection(api_key: str, base_url: str) -> bool:
+    def test_connection(api_key: str, base_url: str, provider_id: Optional[str] = None) -> bool:
+        # 已保存的供应商复用连接池；未保存的凭据用临时客户端，测试后关闭，不留在注册表中
+        if provider_id:
+            client = client_registry.get(api_key=api_key, base_url=base_url, provider_id=provider_id)
+        else:
+            client = OpenAI(api_key=api_key, base_url=base_url, http_client=_get_http_client(base_url))
         try:
-            http_client = _get_http_client(base_url)
-            client = OpenAI(api_key=api_key, base_url=base_url, http_client=http_client)
             model = client.models.list()
             logging.info("连通性测试成功")
             return True
         except Exception as e:
             logging.info(f"连通性测试失败：{e}")
-            return False
\ No newline at end of file
+            return False
+        finally:
+            if not provider_id:
+                client.close()
\ No newline at end of file
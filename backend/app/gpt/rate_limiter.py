@@ -0,0 +1,317 @@
+"""
+按供应商限流：多个任务同时调用同一供应商时协调请求节奏，避免突发请求触发 429。
+
+- 每分钟请求数（rpm）与每分钟 token 数（tpm）各用一个令牌桶，按预约方式排队，先到先得；
+- 同时进行的请求数（max_concurrency）用公平槽位限制，不同任务之间轮转分配，
+  分层总结一次发出多个块请求的任务不会挤占其他任务；
+- 收到 429 时按 Retry-After（无该响应头时指数退避）暂停该供应商的所有请求后重试，而不是让任务失败；
+- 同一供应商同时处于 SUMMARIZING 阶段的任务数也受 max_concurrency 限制，多出的任务在进入总结前排队。
+
+限额配置在 providers 表的 rpm / tpm / max_concurrency 列，为空或 0 表示不限制。
+"""
+import asyncio
+import contextvars
+import os
+import random
+import threading
+import time
+from collections import OrderedDict, deque
+from contextlib import asynccontextmanager, contextmanager
+from dataclasses import dataclass
+from email.utils import parsedate_to_datetime
+from typing import Deque, Dict, Optional
+
+from dotenv import load_dotenv
+
+from app.utils.logger import get_logger
+
+load_dotenv()
+logger = get_logger(__name__)
+
+# 429 后的最大重试次数与退避参数（秒）
+LLM_RATE_LIMIT_RETRIES = int(os.getenv("LLM_RATE_LIMIT_RETRIES", 6))
+LLM_RATE_LIMIT_BACKOFF = float(os.getenv("LLM_RATE_LIMIT_BACKOFF", 2))
+LLM_RATE_LIMIT_MAX_BACKOFF = float(os.getenv("LLM_RATE_LIMIT_MAX_BACKOFF", 60))
+
+# 当前调用所属的任务，用于在任务之间公平分配并发槽位
+rate_limit_flow: contextvars.ContextVar[str] = contextvars.ContextVar("rate_limit_flow", default="")
+
+
+@dataclass(frozen=True)
+class ProviderLimits:
+    rpm: int = 0
+    tpm: int = 0
+    max_concurrency: int = 0
+
+
+class TokenBucket:
+    """
+    每分钟补充 per_minute 个令牌、容量为 per_minute 的令牌桶。
+    reserve 预先扣除令牌（余额可为负），返回需要等待的秒数，调用方按预约顺序依次放行。
+    """
+
+    def __init__(self, per_minute: int = 0):
+        self.per_minute = 0
+        self.tokens = 0.0
+        self.updated = time.monotonic()
+        self.configure(per_minute)
+
+    def configure(self, per_minute: int) -> None:
+        if per_minute != self.per_minute:
+            self.per_minute = per_minute
+            self.tokens = float(per_minute)
+            self.updated = time.monotonic()
+
+    def _refill(self, now: float) -> None:
+        self.tokens = min(float(self.per_minute), self.tokens + (now - self.updated) * self.per_minute / 60)
+        self.updated = now
+
+    def reserve(self, amount: float, now: float) -> float:
+        if self.per_minute <= 0:
+            return 0.0
+        self._refill(now)
+        self.tokens -= min(amount, self.per_minute)
+        return max(0.0, -self.tokens * 60 / self.per_minute)
+
+    def charge(self, amount: float, now: float) -> None:
+        """
+        事后补扣（如按实际输出长度计入 tpm），不阻塞当前调用，只推迟后续请求
+        """
+        if self.per_minute <= 0:
+            return
+        self._refill(now)
+        self.tokens = max(-float(self.per_minute), self.tokens - amount)
+
+
+class _Waiter:
+    __slots__ = ("flow", "event", "loop", "future", "granted")
+
+    def __init__(self, flow: str, loop: Optional[asyncio.AbstractEventLoop] = None):
+        self.flow = flow
+        self.loop = loop
+        self.future = loop.create_future() if loop else None
+        self.event = None if loop else threading.Event()
+        self.granted = False
+
+    def wake(self) -> None:
+        if self.event is not None:
+            self.event.set()
+        else:
+            self.loop.call_soon_threadsafe(lambda: self.future.done() or self.future.set_result(None))
+
+
+class FairSlots:
+    """
+    容量有限的槽位，等待者按任务（flow）分队列，释放时在各任务之间轮转分配。
+    同时支持线程与协程等待，capacity <= 0 表示不限制。
+    """
+
+    def __init__(self, capacity: int = 0):
+        self.capacity = capacity
+        self.active = 0
+        self._queues: "OrderedDict[str, Deque[_Waiter]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _has_room(self) -> bool:
+        return self.capacity <= 0 or self.active < self.capacity
+
+    def _grant_locked(self) -> None:
+        while self._queues and self._has_room():
+            flow, queue = self._queues.popitem(last=False)
+            waiter = queue.popleft()
+            if queue:
+                self._queues[flow] = queue
+            waiter.granted = True
+            self.active += 1
+            try:
+                waiter.wake()
+            except RuntimeError:
+                # 等待者所在的事件循环已关闭
+                waiter.granted = False
+                self.active -= 1
+
+    def _try_acquire_locked(self) -> bool:
+        if not self._queues and self._has_room():
+            self.active += 1
+            return True
+        return False
+
+    def _enqueue_locked(self, waiter: _Waiter) -> None:
+        self._queues.setdefault(waiter.flow, deque()).append(waiter)
+
+    def _release_locked(self) -> None:
+        self.active -= 1
+        self._grant_locked()
+
+    def set_capacity(self, capacity: int) -> None:
+        with self._lock:
+            self.capacity = capacity
+            self._grant_locked()
+
+    def acquire(self, flow: str = "") -> None:
+        with self._lock:
+            if self._try_acquire_locked():
+                return
+            waiter = _Waiter(flow)
+            self._enqueue_locked(waiter)
+        waiter.event.wait()
+
+    async def aacquire(self, flow: str = "") -> None:
+        with self._lock:
+            if self._try_acquire_locked():
+                return
+            waiter = _Waiter(flow, asyncio.get_running_loop())
+            self._enqueue_locked(waiter)
+        try:
+            await waiter.future
+        except BaseException:
+            with self._lock:
+                if waiter.granted:
+                    self._release_locked()
+                else:
+                    queue = self._queues.get(waiter.flow)
+                    if queue and waiter in queue:
+                        queue.remove(waiter)
+                        if not queue:
+                            del self._queues[waiter.flow]
+            raise
+
+    def release(self) -> None:
+        with self._lock:
+            self._release_locked()
+
+
+class ProviderRateLimiter:
+    def __init__(self, name: str, limits: ProviderLimits = ProviderLimits()):
+        self.name = name
+        self.limits = limits
+        self._rpm = TokenBucket(limits.rpm)
+        self._tpm = TokenBucket(limits.tpm)
+        self._slots = FairSlots(limits.max_concurrency)
+        self._admission = FairSlots(limits.max_concurrency)
+        self._blocked_until = 0.0
+        self._lock = threading.Lock()
+
+    def configure(self, limits: ProviderLimits) -> None:
+        if limits == self.limits:
+            return
+        logger.info(f"更新供应商限流配置 {self.name}: {limits}")
+        with self._lock:
+            self.limits = limits
+            self._rpm.configure(limits.rpm)
+            self._tpm.configure(limits.tpm)
+        self._slots.set_capacity(limits.max_concurrency)
+        self._admission.set_capacity(limits.max_concurrency)
+
+    def _reserve(self, tokens: int) -> float:
+        with self._lock:
+            now = time.monotonic()
+            wait = max(self._rpm.reserve(1, now), self._tpm.reserve(tokens, now), self._blocked_until - now)
+        if wait > 0:
+            logger.info(f"供应商 {self.name} 达到限额，等待 {wait:.1f}s")
+        return wait
+
+    @contextmanager
+    def slot(self, tokens: int):
+        """
+        占用一个并发槽位并按 rpm / tpm 预约配额后执行请求
+        """
+        self._slots.acquire(rate_limit_flow.get())
+        try:
+            wait = self._reserve(tokens)
+            if wait > 0:
+                time.sleep(wait)
+            yield
+        finally:
+            self._slots.release()
+
+    @asynccontextmanager
+    async def aslot(self, tokens: int):
+        await self._slots.aacquire(rate_limit_flow.get())
+        try:
+            wait = self._reserve(tokens)
+            if wait > 0:
+                await asyncio.sleep(wait)
+            yield
+        finally:
+            self._slots.release()
+
+    @asynccontextmanager
+    async def admission(self, flow: str):
+        """
+        任务进入 SUMMARIZING 阶段前的准入控制
+        """
+        await self._admission.aacquire(flow)
+        try:
+            yield
+        finally:
+            self._admission.release()
+
+    def admission_pending(self) -> bool:
+        return self._admission.capacity > 0 and self._admission.active >= self._admission.capacity
+
+    def record_completion(self, tokens: int) -> None:
+        with self._lock:
+            self._tpm.charge(tokens, time.monotonic())
+
+    def backoff(self, delay: float) -> None:
+        """
+        收到 429 后暂停该供应商的所有请求 delay 秒
+        """
+        with self._lock:
+            self._blocked_until = max(self._blocked_until, time.monotonic() + delay)
+
+
+def _retry_after(exc) -> Optional[float]:
+    response = getattr(exc, "response", None)
+    headers = getattr(response, "headers", None) or {}
+    try:
+        if headers.get("retry-after-ms"):
+            return float(headers["retry-after-ms"]) / 1000
+    except ValueError:
+        pass
+    value = headers.get("retry-after")
+    if not value:
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def retry_delay(exc, attempt: int) -> Optional[float]:
+    """
+    计算 429 后的重试等待秒数；额度耗尽或超过重试次数时返回 None，由调用方抛出原异常
+    """
+    if getattr(exc, "code", None) == "insufficient_quota" or attempt >= LLM_RATE_LIMIT_RETRIES:
+        return None
+    delay = _retry_after(exc)
+    if delay is None:
+        delay = LLM_RATE_LIMIT_BACKOFF * 2 ** attempt * (0.5 + random.random() / 2)
+    return min(delay, LLM_RATE_LIMIT_MAX_BACKOFF)
+
+
+class RateLimiterRegistry:
+    """
+    每个供应商共享一个限流器，取用时按最新的数据库配置更新限额
+    """
+
+    def __init__(self):
+        self._limiters: Dict[str, ProviderRateLimiter] = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: str, limits: ProviderLimits = ProviderLimits()) -> ProviderRateLimiter:
+        with self._lock:
+            limiter = self._limiters.get(key)
+            if limiter is None:
+                limiter = self._limiters[key] = ProviderRateLimiter(key, limits)
+                return limiter
+        limiter.configure(limits)
+        return limiter
+
+
+rate_limiters = RateLimiterRegistry()
@@ -0,0 +1,142 @@
+"""
+LLM 响应磁盘缓存：相同的消息、模型、温度与服务地址直接返回上次的结果。
+
+- 缓存键对消息做规范化哈希，base64 图片按解码后内容的摘要参与计算，不把整段 base64 放进键；
+- 按总大小做 LRU 淘汰，命中时刷新文件修改时间；
+- 记录命中、未命中与淘汰次数，可通过 /api/llm_cache/stats 查看。
+"""
+import base64
+import hashlib
+import json
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Optional
+
+from dotenv import load_dotenv
+
+from app.utils.logger import get_logger
+from app.utils.path_helper import get_app_dir
+
+load_dotenv()
+logger = get_logger(__name__)
+
+LLM_CACHE_ENABLED = os.getenv("LLM_CACHE_ENABLED", "true").lower() == "true"
+LLM_CACHE_MAX_MB = float(os.getenv("LLM_CACHE_MAX_MB", 200))
+
+
+def _image_digest(url: str) -> str:
+    if url.startswith("data:") and "," in url:
+        header, payload = url.split(",", 1)
+        try:
+            data = base64.b64decode(payload)
+        except Exception:
+            data = payload.encode("utf-8")
+        return f"{header}|sha256:{hashlib.sha256(data).hexdigest()}"
+    return url
+
+
+def _normalize_content(content):
+    if not isinstance(content, list):
+        return content
+    parts = []
+    for part in content:
+        if isinstance(part, dict) and part.get("type") == "image_url":
+            image = part.get("image_url") or {}
+            parts.append({
+                "type": "image_url",
+                "image_url": {"url": _image_digest(image.get("url", "")), "detail": image.get("detail")},
+            })
+        else:
+            parts.append(part)
+    return parts
+
+
+def cache_key(messages: list, model: str, temperature: float, base_url: str = "") -> str:
+    normalized = [dict(message, content=_normalize_content(message.get("content"))) for message in messages]
+    payload = json.dumps(
+        {"base_url": base_url, "model": model, "temperature": temperature, "messages": normalized},
+        ensure_ascii=False, sort_keys=True,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    def __init__(self, cache_dir: Optional[str] = None, max_bytes: int = int(LLM_CACHE_MAX_MB * 1024 * 1024)):
+        self.cache_dir = Path(cache_dir or get_app_dir("llm_cache"))
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        self._total_bytes = sum(p.stat().st_size for p in self.cache_dir.glob("*.json"))
+
+    def _path(self, key: str) -> Path:
+        return self.cache_dir / f"{key}.json"
+
+    def get(self, key: str) -> Optional[str]:
+        path = self._path(key)
+        try:
+            content = json.loads(path.read_text(encoding="utf-8"))["content"]
+        except (OSError, ValueError, KeyError):
+            with self._lock:
+                self.misses += 1
+            return None
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        with self._lock:
+            self.hits += 1
+        return content
+
+    def set(self, key: str, content: str, model: str = "") -> None:
+        path = self._path(key)
+        data = json.dumps({"model": model, "created_at": time.time(), "content": content}, ensure_ascii=False)
+        with self._lock:
+            old_size = path.stat().st_size if path.exists() else 0
+            tmp = path.with_suffix(".tmp")
+            tmp.write_text(data, encoding="utf-8")
+            tmp.replace(path)
+            self._total_bytes += path.stat().st_size - old_size
+            if self._total_bytes > self.max_bytes:
+                self._evict()
+
+    def _evict(self) -> None:
+        """
+        按最近访问时间从旧到新删除，直到总大小降到上限的 90%
+        """
+        entries = []
+        for p in self.cache_dir.glob("*.json"):
+            try:
+                stat = p.stat()
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, p))
+        entries.sort()
+        target = self.max_bytes * 0.9
+        self._total_bytes = sum(size for _, size, _ in entries)
+        for _, size, p in entries:
+            if self._total_bytes <= target:
+                break
+            p.unlink(missing_ok=True)
+            self._total_bytes -= size
+            self.evictions += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "enabled": LLM_CACHE_ENABLED,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / total, 4) if total else 0.0,
+                "evictions": self.evictions,
+                "size_bytes": self._total_bytes,
+                "max_bytes": self.max_bytes,
+            }
+
+
+response_cache = ResponseCache()
@@ -0,0 +1,298 @@
+"""
+多供应商路由：按顺序尝试 (供应商, 模型) 列表，单个供应商变慢或出错时不拖垮整个任务。
+
+- 每个路由有一个熔断器，连续失败 LLM_BREAKER_FAILURES 次后熔断 LLM_BREAKER_COOLDOWN 秒，期间跳过该路由，
+  冷却结束后放行试探请求，成功即恢复；
+- 请求失败（连接错误、超时、5xx、重试后仍 429 等）且尚未向调用方输出内容时，切换到下一个路由；
+- 开启 LLM_HEDGE 后，主路由超过其历史 p95 延迟（流式为首字延迟）仍未响应时，向下一个路由发出对冲请求，
+  先响应的一方胜出，另一方被取消。
+"""
+import asyncio
+import math
+import os
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Deque, Dict, List, Optional, Tuple
+
+import httpx
+from dotenv import load_dotenv
+from openai import APIConnectionError, APIStatusError, BadRequestError
+
+from app.gpt.rate_limiter import ProviderRateLimiter
+from app.utils.logger import get_logger
+
+load_dotenv()
+logger = get_logger(__name__)
+
+# 主模型失败时自动切换到其他已启用供应商下的同名模型；会把转录与拼图发给用户未选择的供应商，默认关闭
+LLM_FAILOVER = os.getenv("LLM_FAILOVER", "false").lower() == "true"
+# 显式配置的备用路由，按顺序排在同名模型之前，格式：供应商ID:模型名,供应商ID:模型名
+LLM_FALLBACKS = [
+    tuple(item.strip().split(":", 1))
+    for item in os.getenv("LLM_FALLBACKS", "").split(",")
+    if ":" in item
+]
+LLM_BREAKER_FAILURES = int(os.getenv("LLM_BREAKER_FAILURES", 3))
+LLM_BREAKER_COOLDOWN = float(os.getenv("LLM_BREAKER_COOLDOWN", 60))
+LLM_HEDGE = os.getenv("LLM_HEDGE", "false").lower() == "true"
+# 历史样本不足时的对冲等待秒数，以及对冲等待的下限
+LLM_HEDGE_DEFAULT_DELAY = float(os.getenv("LLM_HEDGE_DEFAULT_DELAY", 20))
+LLM_HEDGE_MIN_DELAY = float(os.getenv("LLM_HEDGE_MIN_DELAY", 2))
+_HEDGE_MIN_SAMPLES = 5
+_LATENCY_WINDOW = 100
+
+
+@dataclass
+class LLMRoute:
+    provider_id: Optional[str]
+    model: str
+    client: Any
+    async_client_factory: Optional[Callable[[], Any]] = None
+    rate_limiter: Optional[ProviderRateLimiter] = None
+    base_url: str = ""
+
+    @property
+    def key(self) -> str:
+        return f"{self.provider_id or self.base_url}/{self.model}"
+
+
+class CircuitBreaker:
+    def __init__(self, threshold: int = LLM_BREAKER_FAILURES, cooldown: float = LLM_BREAKER_COOLDOWN):
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+
+    def allow(self) -> bool:
+        return self.opened_at is None or time.monotonic() - self.opened_at >= self.cooldown
+
+    def success(self) -> None:
+        self.failures = 0
+        self.opened_at = None
+
+    def failure(self) -> bool:
+        """
+        记录一次失败，返回本次是否触发熔断
+        """
+        self.failures += 1
+        if self.failures >= self.threshold:
+            # 冷却后的试探请求再次失败时重新计时
+            self.opened_at = time.monotonic()
+            return True
+        return False
+
+
+@dataclass
+class RouteHealth:
+    breaker: CircuitBreaker = field(default_factory=CircuitBreaker)
+    # 分别记录流式首字延迟与非流式总耗时
+    latencies: Dict[bool, Deque[float]] = field(
+        default_factory=lambda: {True: deque(maxlen=_LATENCY_WINDOW), False: deque(maxlen=_LATENCY_WINDOW)}
+    )
+
+    def p95(self, streaming: bool) -> Optional[float]:
+        samples = sorted(self.latencies[streaming])
+        if len(samples) < _HEDGE_MIN_SAMPLES:
+            return None
+        return samples[min(len(samples) - 1, math.ceil(len(samples) * 0.95) - 1)]
+
+
+class RouteHealthRegistry:
+    def __init__(self):
+        self._health: Dict[str, RouteHealth] = {}
+        self._lock = threading.Lock()
+
+    def get(self, route: LLMRoute) -> RouteHealth:
+        with self._lock:
+            return self._health.setdefault(route.key, RouteHealth())
+
+    def record_success(self, route: LLMRoute, latency: Optional[float], streaming: bool) -> None:
+        health = self.get(route)
+        with self._lock:
+            health.breaker.success()
+            if latency is not None:
+                health.latencies[streaming].append(latency)
+
+    def record_failure(self, route: LLMRoute, exc: Exception) -> None:
+        health = self.get(route)
+        with self._lock:
+            tripped = health.breaker.failure()
+        if tripped:
+            logger.warning(f"路由 {route.key} 连续失败 {health.breaker.failures} 次，熔断 {health.breaker.cooldown:.0f}s：{exc}")
+
+    def hedge_delay(self, route: LLMRoute, streaming: bool) -> float:
+        p95 = self.get(route).p95(streaming)
+        return max(LLM_HEDGE_MIN_DELAY, p95 if p95 is not None else LLM_HEDGE_DEFAULT_DELAY)
+
+
+route_health = RouteHealthRegistry()
+
+
+def is_failover_error(exc: BaseException) -> bool:
+    """
+    请求本身有误（400）换供应商也无济于事，其余 API、网络错误均可切换
+    """
+    if isinstance(exc, BadRequestError):
+        return False
+    return isinstance(exc, (APIConnectionError, APIStatusError, httpx.HTTPError, TimeoutError))
+
+
+class _Output:
+    """
+    多个请求竞争同一个输出回调：第一个产出内容的请求胜出，其余请求被取消
+    """
+
+    def __init__(self, on_delta: Optional[Callable[[str], None]]):
+        self.on_delta = on_delta
+        self.winner: Optional[LLMRoute] = None
+        self.tasks: Dict[str, asyncio.Task] = {}
+
+    @property
+    def emitted(self) -> bool:
+        return self.winner is not None
+
+    def claim(self, route: LLMRoute) -> bool:
+        if self.winner is None:
+            self.winner = route
+            for key, task in self.tasks.items():
+                if key != route.key:
+                    task.cancel()
+        return self.winner is route
+
+    def callback(self, route: LLMRoute, started: float) -> Optional[Callable[[str], None]]:
+        if self.on_delta is None:
+            return None
+
+        def on_delta(delta: str) -> None:
+            if self.winner is None:
+                route_health.record_success(route, time.monotonic() - started, streaming=True)
+            if self.claim(route):
+                self.on_delta(delta)
+
+        return on_delta
+
+
+Send = Callable[[LLMRoute, list, Optional[Callable[[str], None]]], Any]
+ASend = Callable[[LLMRoute, list, Optional[Callable[[str], None]]], Awaitable[str]]
+
+
+class LLMRouter:
+    def __init__(self, routes: List[LLMRoute], hedge: bool = LLM_HEDGE):
+        """
+        :param routes: 按优先级排列的路由，第一个为用户选择的主路由
+        """
+        self.routes = routes
+        self.hedge = hedge and len(routes) > 1
+
+    def candidates(self) -> List[LLMRoute]:
+        healthy = [route for route in self.routes if route_health.get(route).breaker.allow()]
+        # 全部熔断时仍尝试主路由，不直接失败
+        return healthy or self.routes[:1]
+
+    def request(self, messages: list, on_delta: Optional[Callable[[str], None]], send: Send) -> Tuple[str, LLMRoute]:
+        """
+        同步版本只做顺序故障切换，不做对冲
+
+        :return: (响应内容, 实际响应的路由)
+        """
+        remaining = deque(self.candidates())
+        while True:
+            route = remaining.popleft()
+            emitted = False
+
+            def forward(delta: str) -> None:
+                nonlocal emitted
+                emitted = True
+                on_delta(delta)
+
+            started = time.monotonic()
+            try:
+                content = send(route, messages, forward if on_delta else None)
+            except Exception as exc:
+                if not is_failover_error(exc):
+                    raise
+                route_health.record_failure(route, exc)
+                if emitted or not remaining:
+                    raise
+                logger.warning(f"路由 {route.key} 请求失败，切换到 {remaining[0].key}：{exc}")
+                continue
+            latency = None if on_delta else time.monotonic() - started
+            route_health.record_success(route, latency, streaming=False)
+            return content, route
+
+    async def arequest(self, messages: list, on_delta: Optional[Callable[[str], None]],
+                       send: ASend) -> Tuple[str, LLMRoute]:
+        """
+        :return: (响应内容, 实际响应的路由)
+        """
+        remaining = deque(self.candidates())
+        output = _Output(on_delta)
+        while True:
+            route = remaining.popleft()
+            try:
+                return await self._arace(route, remaining, messages, output, send)
+            except Exception as exc:
+                if output.emitted or not remaining or not is_failover_error(exc):
+                    raise
+                logger.warning(f"路由 {route.key} 请求失败，切换到 {remaining[0].key}：{exc}")
+
+    async def _attempt(self, route: LLMRoute, messages: list, output: _Output, send: ASend) -> str:
+        started = time.monotonic()
+        try:
+            content = await send(route, messages, output.callback(route, started))
+        except asyncio.CancelledError:
+            raise
+        except Exception as exc:
+            if is_failover_error(exc):
+                route_health.record_failure(route, exc)
+            raise
+        if output.on_delta is None:
+            route_health.record_success(route, time.monotonic() - started, streaming=False)
+        return content
+
+    async def _arace(self, route: LLMRoute, remaining: Deque[LLMRoute], messages: list, output: _Output,
+                     send: ASend) -> Tuple[str, LLMRoute]:
+        """
+        执行主请求；开启对冲时，超过主路由 p95 延迟仍无响应则从 remaining 取出下一个路由并发请求
+        """
+        output.tasks = {route.key: asyncio.ensure_future(self._attempt(route, messages, output, send))}
+        attempted = {route.key: route}
+        hedged = False
+        error: Optional[BaseException] = None
+        try:
+            while output.tasks:
+                timeout = None
+                if self.hedge and not hedged and remaining and not output.emitted:
+                    timeout = route_health.hedge_delay(route, streaming=output.on_delta is not None)
+                done, _ = await asyncio.wait(
+                    output.tasks.values(), timeout=timeout, return_when=asyncio.FIRST_COMPLETED
+                )
+                if not done:
+                    backup = remaining.popleft()
+                    hedged = True
+                    attempted[backup.key] = backup
+                    logger.info(f"路由 {route.key} 超过 {timeout:.1f}s 未响应，向 {backup.key} 发起对冲请求")
+                    output.tasks[backup.key] = asyncio.ensure_future(
+                        self._attempt(backup, messages, output, send)
+                    )
+                    continue
+
+                for task in done:
+                    key = next(key for key, t in output.tasks.items() if t is task)
+                    del output.tasks[key]
+                    if task.cancelled():
+                        continue
+                    if task.exception() is None:
+                        if output.winner is None or output.winner.key == key:
+                            return task.result(), attempted[key]
+                        continue
+                    error = task.exception()
+                    if output.winner is not None and output.winner.key == key:
+                        raise error
+            raise error or asyncio.CancelledError()
+        finally:
+            for task in output.tasks.values():
+                task.cancel()
+            output.tasks = {}
@@ -0,0 +1,270 @@
+"""
+LLM 调用指标：每次请求记录输入 / 输出 token、首字延迟（TTFT）、总耗时、模型与供应商。
+
+- 指标通过 prometheus_client 导出（GET /metrics），按供应商、模型、调用阶段聚合；
+- 同一任务内的调用汇总到 llm_usage 上下文中的 TaskLLMUsage，总结结束后写入 {task_id}_stats.json；
+- 优先使用接口返回的 usage（流式请求通过 stream_options.include_usage 获取），
+  供应商未返回时按字符数估算并标记 usage_estimated；
+- 配置 LLM_PRICES 后按模型单价计算费用。
+"""
+import asyncio
+import contextvars
+import json
+import os
+import threading
+import time
+from dataclasses import asdict, dataclass
+from typing import Any, Dict, List, Optional, Tuple
+
+from dotenv import load_dotenv
+from openai import RateLimitError
+from prometheus_client import Counter, Histogram
+
+from app.gpt.tokens import estimate_message_tokens, estimate_tokens
+from app.utils.logger import get_logger
+
+load_dotenv()
+logger = get_logger(__name__)
+
+# 流式请求时要求供应商在最后一个分块返回 usage；以 400 拒绝 stream_options 的供应商会自动去掉该参数，也可关闭，改为估算
+LLM_STREAM_USAGE = os.getenv("LLM_STREAM_USAGE", "true").lower() == "true"
+
+
+def _load_prices(raw: str) -> Dict[str, Tuple[float, float]]:
+    """
+    LLM_PRICES 格式：{"模型名或其片段": [输入单价, 输出单价]}，单价为每百万 token 的费用
+    """
+    if not raw.strip():
+        return {}
+    try:
+        return {name.lower(): (float(price[0]), float(price[1])) for name, price in json.loads(raw).items()}
+    except (ValueError, TypeError, IndexError, AttributeError) as e:
+        logger.warning(f"LLM_PRICES 格式错误，忽略费用统计：{e}")
+        return {}
+
+
+LLM_PRICES = _load_prices(os.getenv("LLM_PRICES", ""))
+
+# 当前调用所属的阶段：single（单次总结）、map（分块摘要）、reduce（合并摘要）
+llm_phase: contextvars.ContextVar[str] = contextvars.ContextVar("llm_phase", default="single")
+
+_LABELS = ["provider", "model", "phase"]
+LLM_REQUESTS = Counter("bilinote_llm_requests_total", "LLM 请求数", _LABELS + ["status"])
+LLM_TOKENS = Counter("bilinote_llm_tokens_total", "LLM token 数（prompt / completion / cached）", _LABELS + ["kind"])
+LLM_COST = Counter("bilinote_llm_cost_total", "按 LLM_PRICES 计算的费用", ["provider", "model"])
+LLM_LATENCY = Histogram(
+    "bilinote_llm_latency_seconds", "LLM 请求总耗时", _LABELS,
+    buckets=(0.5, 1, 2, 5, 10, 20, 30, 60, 120, 300),
+)
+LLM_TTFT = Histogram(
+    "bilinote_llm_ttft_seconds", "流式请求首字延迟", _LABELS,
+    buckets=(0.2, 0.5, 1, 2, 3, 5, 10, 20, 60),
+)
+LLM_PROMPT_TOKENS = Histogram(
+    "bilinote_llm_prompt_tokens", "单次请求的输入 token 数", _LABELS,
+    buckets=(500, 1000, 2000, 4000, 8000, 16000, 32000, 64000, 128000),
+)
+LLM_TASK_TOKENS = Counter("bilinote_llm_task_tokens_total", "按笔记风格汇总的 token 数", ["style", "kind"])
+
+
+def model_price(model: str) -> Optional[Tuple[float, float]]:
+    name = (model or "").lower()
+    if name in LLM_PRICES:
+        return LLM_PRICES[name]
+    # 最长的片段优先，避免 gpt-4o 匹配到 gpt-4o-mini 的单价
+    for pattern in sorted(LLM_PRICES, key=len, reverse=True):
+        if pattern in name:
+            return LLM_PRICES[pattern]
+    return None
+
+
+@dataclass
+class LLMCallRecord:
+    provider: str
+    model: str
+    phase: str
+    stream: bool
+    status: str
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    cached_tokens: int = 0
+    usage_estimated: bool = False
+    ttft: Optional[float] = None
+    latency: float = 0.0
+    cost: Optional[float] = None
+
+    def to_dict(self) -> dict:
+        data = asdict(self)
+        data["ttft"] = round(self.ttft, 3) if self.ttft is not None else None
+        data["latency"] = round(self.latency, 3)
+        return data
+
+
+class TaskLLMUsage:
+    """
+    一个任务内全部 LLM 调用的记录，分层总结时多个线程或协程同时写入
+    """
+
+    def __init__(self, style: Optional[str] = None):
+        self.style = style or "default"
+        self.records: List[LLMCallRecord] = []
+        self._lock = threading.Lock()
+
+    def add(self, record: LLMCallRecord) -> None:
+        with self._lock:
+            self.records.append(record)
+
+    def summary(self) -> dict:
+        with self._lock:
+            records = list(self.records)
+        ok = [r for r in records if r.status in ("ok", "cache_hit")]
+        costs = [r.cost for r in ok if r.cost is not None]
+        ttfts = [r.ttft for r in ok if r.ttft is not None]
+        return {
+            "style": self.style,
+            "calls": len(records),
+            "failed_calls": len(records) - len(ok),
+            "cache_hits": sum(1 for r in records if r.status == "cache_hit"),
+            "prompt_tokens": sum(r.prompt_tokens for r in ok),
+            "completion_tokens": sum(r.completion_tokens for r in ok),
+            "cached_tokens": sum(r.cached_tokens for r in ok),
+            "usage_estimated": any(r.usage_estimated for r in ok),
+            "cost": round(sum(costs), 6) if costs else None,
+            # 首字延迟取第一个流式请求，即用户看到内容前的等待
+            "ttft": round(ttfts[0], 3) if ttfts else None,
+            "llm_seconds": round(sum(r.latency for r in records), 3),
+            "requests": [r.to_dict() for r in records],
+        }
+
+    def export(self) -> None:
+        """
+        任务结束时按风格累计 token，用于比较不同风格的成本
+        """
+        summary = self.summary()
+        for kind in ("prompt", "completion", "cached"):
+            LLM_TASK_TOKENS.labels(self.style, kind).inc(summary[f"{kind}_tokens"])
+
+
+# 当前任务的调用记录，由 NoteGenerator 在总结阶段设置
+llm_usage: contextvars.ContextVar[Optional[TaskLLMUsage]] = contextvars.ContextVar("llm_usage", default=None)
+
+
+def _usage_value(usage: Any, name: str) -> int:
+    value = usage.get(name) if isinstance(usage, dict) else getattr(usage, name, None)
+    return int(value or 0)
+
+
+def _cached_tokens(usage: Any) -> int:
+    details = usage.get("prompt_tokens_details") if isinstance(usage, dict) \
+        else getattr(usage, "prompt_tokens_details", None)
+    return _usage_value(details, "cached_tokens") if details else 0
+
+
+class LLMCall:
+    """
+    一次 LLM 请求的计时与用量记录：发送前创建，收到首个增量时调用 first_token，
+    结束时调用 finish 或 fail
+    """
+
+    def __init__(self, provider: Optional[str], model: str, messages: list, stream: bool):
+        self.provider = provider or "unknown"
+        self.model = model
+        self.messages = messages
+        self.stream = stream
+        self.phase = llm_phase.get()
+        self.task_usage = llm_usage.get()
+        self.usage: Any = None
+        self.started = time.monotonic()
+        self.first_token_at: Optional[float] = None
+
+    @property
+    def labels(self) -> Tuple[str, str, str]:
+        return self.provider, self.model, self.phase
+
+    def first_token(self) -> None:
+        if self.first_token_at is None:
+            self.first_token_at = time.monotonic()
+
+    def _emit(self, record: LLMCallRecord) -> LLMCallRecord:
+        LLM_REQUESTS.labels(*self.labels, record.status).inc()
+        if self.task_usage is not None:
+            self.task_usage.add(record)
+        return record
+
+    def finish(self, content: str) -> LLMCallRecord:
+        now = time.monotonic()
+        if self.usage is not None:
+            prompt_tokens = _usage_value(self.usage, "prompt_tokens")
+            completion_tokens = _usage_value(self.usage, "completion_tokens")
+            cached_tokens = _cached_tokens(self.usage)
+        else:
+            prompt_tokens = estimate_message_tokens(self.messages)
+            completion_tokens = estimate_tokens(content or "")
+            cached_tokens = 0
+
+        price = model_price(self.model)
+        cost = None
+        if price:
+            cost = (prompt_tokens * price[0] + completion_tokens * price[1]) / 1_000_000
+            LLM_COST.labels(self.provider, self.model).inc(cost)
+
+        ttft = self.first_token_at - self.started if self.first_token_at is not None else None
+        record = LLMCallRecord(
+            provider=self.provider,
+            model=self.model,
+            phase=self.phase,
+            stream=self.stream,
+            status="ok",
+            prompt_tokens=prompt_tokens,
+            completion_tokens=completion_tokens,
+            cached_tokens=cached_tokens,
+            usage_estimated=self.usage is None,
+            ttft=ttft,
+            latency=now - self.started,
+            cost=cost,
+        )
+        LLM_TOKENS.labels(*self.labels, "prompt").inc(prompt_tokens)
+        LLM_TOKENS.labels(*self.labels, "completion").inc(completion_tokens)
+        if cached_tokens:
+            LLM_TOKENS.labels(*self.labels, "cached").inc(cached_tokens)
+        LLM_PROMPT_TOKENS.labels(*self.labels).observe(prompt_tokens)
+        LLM_LATENCY.labels(*self.labels).observe(record.latency)
+        if ttft is not None:
+            LLM_TTFT.labels(*self.labels).observe(ttft)
+        logger.info(
+            f"LLM 调用完成 ({self.provider}/{self.model}, {self.phase})：prompt {prompt_tokens}，"
+            f"completion {completion_tokens}，cached {cached_tokens}，"
+            f"首字 {f'{ttft:.2f}s' if ttft is not None else '-'}，耗时 {record.latency:.2f}s"
+        )
+        return self._emit(record)
+
+    def fail(self, exc: BaseException) -> LLMCallRecord:
+        if isinstance(exc, asyncio.CancelledError):
+            status = "cancelled"
+        elif isinstance(exc, RateLimitError):
+            status = "rate_limited"
+        else:
+            status = "error"
+        ttft = self.first_token_at - self.started if self.first_token_at is not None else None
+        return self._emit(LLMCallRecord(
+            provider=self.provider,
+            model=self.model,
+            phase=self.phase,
+            stream=self.stream,
+            status=status,
+            ttft=ttft,
+            latency=time.monotonic() - self.started,
+        ))
+
+
+def record_cache_hit(provider: Optional[str], model: str) -> None:
+    """
+    命中响应缓存的调用不产生 token 与耗时，只计数
+    """
+    record = LLMCallRecord(
+        provider=provider or "unknown", model=model, phase=llm_phase.get(), stream=False, status="cache_hit",
+    )
+    LLM_REQUESTS.labels(record.provider, record.model, record.phase, record.status).inc()
+    usage = llm_usage.get()
+    if usage is not None:
+        usage.add(record)
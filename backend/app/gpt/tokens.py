@@ -0,0 +1,61 @@
+import re
+
+# tiktoken 为可选依赖：安装后使用 o200k/cl100k 精确计数，否则使用启发式估算
+try:
+    import tiktoken
+
+    try:
+        _encoding = tiktoken.get_encoding("o200k_base")
+    except Exception:
+        _encoding = tiktoken.get_encoding("cl100k_base")
+except Exception:
+    _encoding = None
+
+# 中日韩文字（平假名/片假名、CJK 统一汉字及扩展 A、谚文、兼容汉字）
+_CJK_RE = re.compile(r"[぀-ヿ㐀-䶿一-鿿가-힯豈-﫿]")
+_PIECE_RE = re.compile(r"[A-Za-z]+|\d+|[^\sA-Za-z\d]")
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    估算文本的 token 数。
+
+    未安装 tiktoken 时按 BPE 分词器的经验值估算：每个中日韩字符约 1 个 token，
+    英文单词约每 4 个字母 1 个 token，数字约每 3 位 1 个 token，标点各 1 个 token，结果略偏保守。
+    """
+    if not text:
+        return 0
+    if _encoding is not None:
+        return len(_encoding.encode(text, disallowed_special=()))
+
+    tokens = float(len(_CJK_RE.findall(text)))
+    for piece in _PIECE_RE.findall(_CJK_RE.sub(" ", text)):
+        if piece.isalpha():
+            tokens += max(1.0, len(piece) / 4)
+        elif piece.isdigit():
+            tokens += max(1.0, len(piece) / 3)
+        else:
+            tokens += 1.0
+    return int(tokens) + 1
+
+
+# 每张图片按 OpenAI 高清模式 1024x1024 的计费估算
+IMAGE_TOKENS = 765
+
+
+def estimate_message_tokens(messages: list) -> int:
+    """
+    估算一组对话消息的输入 token 数（文本按 estimate_tokens，图片按 IMAGE_TOKENS 计）
+    """
+    total = 0
+    for message in messages:
+        content = message.get("content")
+        if isinstance(content, str):
+            total += estimate_tokens(content)
+            continue
+        for part in content or []:
+            if part.get("type") == "text":
+                total += estimate_tokens(part.get("text", ""))
+            elif part.get("type") == "image_url":
+                total += IMAGE_TOKENS
+    return total
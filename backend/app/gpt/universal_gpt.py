@@ -1,46 +1,94 @@
 from app.gpt.base import GPT
-from app.gpt.prompt_builder import generate_base_prompt
+from app.gpt.compaction import TRANSCRIPT_COMPACTION, CompactionStats, compact_segments
+from app.gpt.map_reduce import MapReduceSummarizer, should_map_reduce
+from app.gpt.rate_limiter import ProviderRateLimiter, retry_delay
+from app.gpt.router import LLMRoute, LLMRouter
+from app.gpt.telemetry import LLM_STREAM_USAGE, LLMCall, record_cache_hit
+from app.gpt.prompt_builder import generate_context_prompt, generate_instruction_prompt
+from app.gpt.response_cache import LLM_CACHE_ENABLED, cache_key, response_cache
 from app.models.gpt_model import GPTSource
 from app.gpt.prompt import BASE_PROMPT, AI_SUM, SCREENSHOT, LINK
+from app.gpt.tokens import estimate_message_tokens
 from app.gpt.utils import fix_markdown
 from app.models.transcriber_model import TranscriptSegment
+from app.utils.async_utils import run_cpu, run_io
+import asyncio
+import time
+from contextlib import nullcontext
 from datetime import timedelta
-from typing import List
+from typing import Any, Callable, List, Optional, Tuple
+
+from openai import BadRequestError, RateLimitError
+
+from app.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+# 拒绝 stream_options 参数（返回 400）的供应商，之后的流式请求不再携带该参数，usage 改为估算
+_NO_STREAM_OPTIONS = set()
 
 
 class UniversalGPT(GPT):
-    def __init__(self, client, model: str, temperature: float = 0.7):
+    def __init__(self, client, model: str, temperature: float = 0.7,
+                 async_client_factory: Optional[Callable[[], Any]] = None,
+                 rate_limiter: Optional[ProviderRateLimiter] = None,
+                 provider_id: Optional[str] = None,
+                 fallbacks: Optional[List[LLMRoute]] = None):
         self.client = client
+        # 返回当前事件循环下 AsyncOpenAI 客户端的工厂，为空时异步接口退回线程池执行
+        self.async_client_factory = async_client_factory
+        # 该供应商共享的限流器，为空时不限流、遇到 429 直接失败
+        self.rate_limiter = rate_limiter
         self.model = model
+        # 主路由为用户选择的供应商与模型，fallbacks 为出错或过慢时依次切换的备用路由
+        self.router = LLMRouter([
+            LLMRoute(
+                provider_id=provider_id,
+                model=model,
+                client=client,
+                async_client_factory=async_client_factory,
+                rate_limiter=rate_limiter,
+                base_url=str(getattr(client, "base_url", "")),
+            ),
+            *(fallbacks or []),
+        ])
         self.temperature = temperature
         self.screenshot = False
         self.link = False
+        # 最近一次总结的转录压缩统计，供调用方记录节省的 token
+        self.compaction_stats: Optional[CompactionStats] = None
 
     def _format_time(self, seconds: float) -> str:
         return str(timedelta(seconds=int(seconds)))[2:]
 
+    def _segment_lines(self, segments: List[TranscriptSegment]) -> List[str]:
+        """
+        每个分段一行；分段文本自身含换行时也只对应一行，与分段一一对应
+        """
+        return [f"{self._format_time(seg.start)} - {seg.text.strip()}" for seg in segments]
+
     def _build_segment_text(self, segments: List[TranscriptSegment]) -> str:
-        return "\n".join(
-            f"{self._format_time(seg.start)} - {seg.text.strip()}"
-            for seg in segments
-        )
+        return "\n".join(self._segment_lines(segments))
 
     def ensure_segments_type(self, segments) -> List[TranscriptSegment]:
         return [TranscriptSegment(**seg) if isinstance(seg, dict) else seg for seg in segments]
 
     def create_messages(self, segments: List[TranscriptSegment], **kwargs):
 
-        content_text = generate_base_prompt(
+        context_text = generate_context_prompt(
             title=kwargs.get('title'),
-            segment_text=self._build_segment_text(segments),
+            segment_text=kwargs.get('segment_text') or self._build_segment_text(segments),
             tags=kwargs.get('tags'),
+        )
+        instruction_text = generate_instruction_prompt(
             _format=kwargs.get('_format'),
             style=kwargs.get('style'),
             extras=kwargs.get('extras'),
         )
 
         # ⛳ 组装 content 数组，支持 text + image_url 混合
-        content = [{"type": "text", "text": content_text}]
+        # 顺序为 转录 -> 拼图 -> 格式与风格要求：同一视频换风格生成时前两部分完全相同，可命中供应商的前缀缓存
+        content = [{"type": "text", "text": context_text}]
         video_img_urls = kwargs.get('video_img_urls', [])
 
         for url in video_img_urls:
@@ -52,6 +100,9 @@ class UniversalGPT(GPT):
                 }
             })
 
+        if instruction_text:
+            content.append({"type": "text", "text": instruction_text})
+
         #  正确格式：整体包在一个 message 里，role + content array
         messages = [{
             "role": "user",
@@ -63,13 +114,262 @@ class UniversalGPT(GPT):
     def list_models(self):
         return self.client.models.list()
 
-    def summarize(self, source: GPTSource) -> str:
+    def _cache_key(self, route: LLMRoute, messages: list) -> str:
+        # 以供应商区分缓存，不同供应商下的同名模型互不复用
+        return cache_key(messages, route.model, self.temperature, route.provider_id or route.base_url)
+
+    def _cached(self, messages: list, use_cache: bool) -> Optional[str]:
+        """
+        按主路由查询响应缓存；不使用缓存或未命中时为 None
+        """
+        if not (use_cache and LLM_CACHE_ENABLED):
+            return None
+        primary = self.router.routes[0]
+        cached = response_cache.get(self._cache_key(primary, messages))
+        if cached is not None:
+            logger.info(f"LLM 响应缓存命中 (model={self.model})")
+            record_cache_hit(primary.provider_id or primary.base_url, self.model)
+        return cached
+
+    def _store(self, route: LLMRoute, messages: list, content: str, use_cache: bool) -> None:
+        """
+        按实际响应的路由写入缓存：备用路由的结果不会在之后冒充主模型的输出
+        """
+        if use_cache and LLM_CACHE_ENABLED and content:
+            response_cache.set(self._cache_key(route, messages), content, model=route.model)
+
+    def complete(
+        self,
+        messages: list,
+        on_delta: Optional[Callable[[str], None]] = None,
+        use_cache: bool = True,
+    ) -> str:
+        """
+        发起一次对话补全；传入 on_delta 时使用流式输出，每收到一段增量文本即回调一次。
+        use_cache 为 True 时先查询响应缓存，命中则不再请求模型（流式时一次性回调全部内容）。
+        """
+        cached = self._cached(messages, use_cache)
+        if cached is not None:
+            if on_delta:
+                on_delta(cached)
+            return cached
+
+        content, route = self.router.request(messages, on_delta, self._request)
+        self._store(route, messages, content, use_cache)
+        return content
+
+    async def acomplete(
+        self,
+        messages: list,
+        on_delta: Optional[Callable[[str], None]] = None,
+        use_cache: bool = True,
+    ) -> str:
+        """
+        complete 的异步版本，使用当前事件循环下的 AsyncOpenAI 客户端
+        """
+        if self.async_client_factory is None:
+            return await run_io(self.complete, messages, on_delta, use_cache)
+
+        cached = self._cached(messages, use_cache)
+        if cached is not None:
+            if on_delta:
+                on_delta(cached)
+            return cached
+
+        content, route = await self.router.arequest(messages, on_delta, self._arequest)
+        self._store(route, messages, content, use_cache)
+        return content
+
+    def _request(self, route: LLMRoute, messages: list, on_delta: Optional[Callable[[str], None]] = None) -> str:
+        """
+        经路由所属供应商的限流器发送请求，遇到 429 时等待后重试
+        """
+        limiter = route.rate_limiter
+        tokens = estimate_message_tokens(messages)
+        attempt = 0
+        while True:
+            try:
+                with limiter.slot(tokens) if limiter else nullcontext():
+                    # 计时从拿到槽位开始，不含限流排队
+                    call = self._start_call(route, messages, on_delta)
+                    try:
+                        content = self._send(route, messages, on_delta, call)
+                    except BaseException as exc:
+                        call.fail(exc)
+                        raise
+                break
+            except RateLimitError as exc:
+                delay = retry_delay(exc, attempt) if limiter else None
+                if delay is None:
+                    raise
+                attempt += 1
+                logger.warning(f"模型供应商限流 ({route.key})，{delay:.1f}s 后第 {attempt} 次重试")
+                limiter.backoff(delay)
+                time.sleep(delay)
+        record = call.finish(content)
+        if limiter:
+            limiter.record_completion(record.completion_tokens)
+        return content
+
+    async def _arequest(self, route: LLMRoute, messages: list,
+                        on_delta: Optional[Callable[[str], None]] = None) -> str:
+        limiter = route.rate_limiter
+        tokens = estimate_message_tokens(messages)
+        attempt = 0
+        while True:
+            try:
+                async with limiter.aslot(tokens) if limiter else nullcontext():
+                    call = self._start_call(route, messages, on_delta)
+                    try:
+                        content = await self._asend(route, messages, on_delta, call)
+                    except BaseException as exc:
+                        call.fail(exc)
+                        raise
+                break
+            except RateLimitError as exc:
+                delay = retry_delay(exc, attempt) if limiter else None
+                if delay is None:
+                    raise
+                attempt += 1
+                logger.warning(f"模型供应商限流 ({route.key})，{delay:.1f}s 后第 {attempt} 次重试")
+                limiter.backoff(delay)
+                await asyncio.sleep(delay)
+        record = call.finish(content)
+        if limiter:
+            limiter.record_completion(record.completion_tokens)
+        return content
+
+    @staticmethod
+    def _start_call(route: LLMRoute, messages: list, on_delta: Optional[Callable[[str], None]]) -> LLMCall:
+        return LLMCall(route.provider_id or route.base_url, route.model, messages, stream=on_delta is not None)
+
+    @staticmethod
+    def _stream_options(route: LLMRoute) -> dict:
+        if not LLM_STREAM_USAGE or (route.provider_id or route.base_url) in _NO_STREAM_OPTIONS:
+            return {}
+        return {"stream_options": {"include_usage": True}}
+
+    @staticmethod
+    def _reject_stream_options(route: LLMRoute, options: dict, exc: BadRequestError) -> None:
+        """
+        带 stream_options 的请求返回 400 时记住该供应商不支持此参数，由调用方去掉参数重试一次；其余 400 照常抛出
+        """
+        if not options:
+            raise exc
+        logger.warning(f"供应商不支持 stream_options ({route.key})，去掉该参数重试：{exc}")
+        _NO_STREAM_OPTIONS.add(route.provider_id or route.base_url)
+
+    def _send(self, route: LLMRoute, messages: list, on_delta: Optional[Callable[[str], None]],
+              call: LLMCall) -> str:
+        if on_delta is None:
+            response = route.client.chat.completions.create(
+                model=route.model,
+                messages=messages,
+                temperature=self.temperature
+            )
+            call.usage = response.usage
+            return response.choices[0].message.content.strip()
+
+        options = self._stream_options(route)
+        try:
+            stream = route.client.chat.completions.create(
+                model=route.model,
+                messages=messages,
+                temperature=self.temperature,
+                stream=True,
+                **options,
+            )
+        except BadRequestError as exc:
+            self._reject_stream_options(route, options, exc)
+            stream = route.client.chat.completions.create(
+                model=route.model,
+                messages=messages,
+                temperature=self.temperature,
+                stream=True,
+            )
+        parts = []
+        with stream:
+            for chunk in stream:
+                # include_usage 时最后一个分块只有 usage，没有 choices
+                if getattr(chunk, "usage", None):
+                    call.usage = chunk.usage
+                if not chunk.choices:
+                    continue
+                delta = chunk.choices[0].delta.content
+                if delta:
+                    call.first_token()
+                    parts.append(delta)
+                    on_delta(delta)
+        return "".join(parts).strip()
+
+    async def _asend(self, route: LLMRoute, messages: list, on_delta: Optional[Callable[[str], None]],
+                     call: LLMCall) -> str:
+        client = route.async_client_factory()
+        if on_delta is None:
+            response = await client.chat.completions.create(
+                model=route.model,
+                messages=messages,
+                temperature=self.temperature
+            )
+            call.usage = response.usage
+            return response.choices[0].message.content.strip()
+
+        options = self._stream_options(route)
+        try:
+            stream = await client.chat.completions.create(
+                model=route.model,
+                messages=messages,
+                temperature=self.temperature,
+                stream=True,
+                **options,
+            )
+        except BadRequestError as exc:
+            self._reject_stream_options(route, options, exc)
+            stream = await client.chat.completions.create(
+                model=route.model,
+                messages=messages,
+                temperature=self.temperature,
+                stream=True,
+            )
+        parts = []
+        # 对冲落败被取消时也要关闭响应，释放连接
+        async with stream:
+            async for chunk in stream:
+                if getattr(chunk, "usage", None):
+                    call.usage = chunk.usage
+                if not chunk.choices:
+                    continue
+                delta = chunk.choices[0].delta.content
+                if delta:
+                    call.first_token()
+                    parts.append(delta)
+                    on_delta(delta)
+        return "".join(parts).strip()
+
+    def _prepare(self, source: GPTSource) -> Tuple[List[str], Optional[list]]:
+        """
+        返回 (与分段一一对应的文本行, 单次请求的消息)；转录过长需要分层总结时消息为 None
+        """
         self.screenshot = source.screenshot
         self.link = source.link
         source.segment = self.ensure_segments_type(source.segment)
+        if TRANSCRIPT_COMPACTION:
+            source.segment, self.compaction_stats = compact_segments(source.segment, self._build_segment_text)
+            stats = self.compaction_stats
+            logger.info(
+                f"转录压缩：{stats.original_segments} -> {stats.compacted_segments} 段，"
+                f"去重 {stats.dropped_duplicates} 段，窗口 {stats.window_seconds:.0f}s，"
+                f"token {stats.original_tokens} -> {stats.compacted_tokens}（节省 {stats.tokens_saved}）"
+            )
+
+        lines = self._segment_lines(source.segment)
+        segment_text = "\n".join(lines)
+        if should_map_reduce(segment_text):
+            return lines, None
 
         messages = self.create_messages(
             source.segment,
+            segment_text=segment_text,
             title=source.title,
             tags=source.tags,
             video_img_urls=source.video_img_urls,
@@ -77,9 +377,21 @@ class UniversalGPT(GPT):
             style=source.style,
             extras=source.extras
         )
-        response = self.client.chat.completions.create(
-            model=self.model,
-            messages=messages,
-            temperature=0.7
-        )
-        return response.choices[0].message.content.strip()
+        return lines, messages
+
+    def summarize(self, source: GPTSource, on_delta: Optional[Callable[[str], None]] = None) -> str:
+        lines, messages = self._prepare(source)
+        if messages is None:
+            return MapReduceSummarizer(self).summarize(
+                source, source.segment, lines, on_delta=on_delta, use_cache=source.cache
+            )
+        return self.complete(messages, on_delta=on_delta, use_cache=source.cache)
+
+    async def asummarize(self, source: GPTSource, on_delta: Optional[Callable[[str], None]] = None) -> str:
+        # 转录压缩（去重、多次渲染与计数）是 CPU 密集的，长转录可达秒级，不能阻塞事件循环
+        lines, messages = await run_cpu(self._prepare, source)
+        if messages is None:
+            return await MapReduceSummarizer(self).asummarize(
+                source, source.segment, lines, on_delta=on_delta, use_cache=source.cache
+            )
+        return await self.acomplete(messages, on_delta=on_delta, use_cache=source.cache)
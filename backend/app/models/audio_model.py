@@ -4,7 +4,7 @@ from typing import Optional
 
 @dataclass
 class AudioDownloadResult:
-    file_path: str               # 本地音频路径
+    file_path: Optional[str]     # 本地音频路径（直接使用平台字幕时为 None）
     title: str                   # 视频标题
     duration: float              # 视频时长（秒）
     cover_url: Optional[str]     # 视频封面图
@@ -15,4 +15,6 @@ class GPTSource:
     extras: Optional[str] = None
     _format: Optional[list] = None
     video_img_urls:  Optional[list] = None
+    chapters: Optional[list] = None
+    cache: bool = True
 
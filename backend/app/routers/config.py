@@ -3,7 +3,9 @@ from pydantic import BaseModel
 from typing import Optional
 from app.utils.response import ResponseWrapper as R
 
+from app.gpt.response_cache import response_cache
 from app.services.cookie_manager import CookieConfigManager
+from app.transcriber.transcriber_provider import get_transcriber_status
 from ffmpeg_helper import ensure_ffmpeg_or_raise
 
 router = APIRouter()
@@ -42,4 +44,23 @@ async def sys_health():
 
 @router.get("/sys_check")
 async def sys_check():
-    return R.success()
\ No newline at end of file
+    return R.success()
+
+
+@router.get("/sys_ready")
+async def sys_ready():
+    status = get_transcriber_status()
+    if status["ready"]:
+        return R.success(data=status)
+    # 加载中或加载失败都返回 503，健康检查据此判断实例尚不可用
+    if status["status"] == "failed":
+        resp = R.error(msg=f"转写模型加载失败: {status['error']}", data=status)
+    else:
+        resp = R.error(msg="转写模型加载中", data=status)
+    resp.status_code = 503
+    return resp
+
+
+@router.get("/llm_cache/stats")
+async def llm_cache_stats():
+    return R.success(data=response_cache.stats())
@@ -1,4 +1,5 @@
 # app/routers/note.py
+import asyncio
 import json
 import os
 import uuid
@@ -15,6 +16,7 @@ from app.enmus.exception import NoteErrorEnum
 from app.enmus.note_enums import DownloadQuality
 from app.exceptions.note import NoteError
 from app.services.note import NoteGenerator, logger
+from app.services.task_events import task_events
 from app.utils.response import ResponseWrapper as R
 from app.utils.url_parser import extract_video_id
 from app.validators.video_url_validator import is_supported_video_url
@@ -49,6 +51,7 @@ class VideoRequest(BaseModel):
     video_understanding: Optional[bool] = False
     video_interval: Optional[int] = 0
     grid_size: Optional[list] = []
+    llm_cache: Optional[bool] = True
 
     @field_validator("video_url")
     def validate_supported_url(cls, v):
@@ -63,8 +66,22 @@ class VideoRequest(BaseModel):
         return v
 
 
+class RegenerateRequest(BaseModel):
+    model_name: str
+    provider_id: str
+    format: Optional[list] = []
+    style: Optional[str] = None
+    # 一次生成多种风格，每种风格对应一个新任务
+    styles: Optional[list] = []
+    extras: Optional[str] = None
+    video_understanding: Optional[bool] = True
+    llm_cache: Optional[bool] = True
+
+
 NOTE_OUTPUT_DIR = os.getenv("NOTE_OUTPUT_DIR", "note_results")
 UPLOAD_DIR = "uploads"
+# 多风格重新生成时，先等第一个风格开始输出（供应商已缓存共同前缀）再并发其余风格，最多等待的秒数
+REGENERATE_WARMUP_SECONDS = float(os.getenv("REGENERATE_WARMUP_SECONDS", 30))
 
 
 def save_note_to_file(task_id: str, note):
@@ -73,16 +90,17 @@ def save_note_to_file(task_id: str, note):
         json.dump(asdict(note), f, ensure_ascii=False, indent=2)
 
 
-def run_note_task(task_id: str, video_url: str, platform: str, quality: DownloadQuality,
+async def run_note_task(task_id: str, video_url: str, platform: str, quality: DownloadQuality,
                   link: bool = False, screenshot: bool = False, model_name: str = None, provider_id: str = None,
                   _format: list = None, style: str = None, extras: str = None, video_understanding: bool = False,
-                  video_interval=0, grid_size=[]
+                  video_interval=0, grid_size=[], llm_cache: bool = True
                   ):
 
     if not model_name or not provider_id:
         raise HTTPException(status_code=400, detail="请选择模型和提供者")
 
-    note = NoteGenerator().generate(
+    # 在服务的事件循环中运行，I/O 等待不占用线程，CPU 阶段由 NoteGenerator 交给线程池
+    note = await NoteGenerator().agenerate(
         video_url=video_url,
         platform=platform,
         quality=quality,
@@ -96,7 +114,8 @@ def run_note_task(task_id: str, video_url: str, platform: str, quality: Download
         screenshot=screenshot
         , video_understanding=video_understanding,
         video_interval=video_interval,
-        grid_size=grid_size
+        grid_size=grid_size,
+        llm_cache=llm_cache,
     )
     logger.info(f"Note generated: {task_id}")
     if not note or not note.markdown:
@@ -106,6 +125,47 @@ def run_note_task(task_id: str, video_url: str, platform: str, quality: Download
 
 
 
+async def run_regenerate_task(source_task_id: str, task_id: str, data: RegenerateRequest, style: Optional[str]):
+    note = await NoteGenerator().aregenerate(
+        source_task_id=source_task_id,
+        task_id=task_id,
+        model_name=data.model_name,
+        provider_id=data.provider_id,
+        _format=data.format,
+        style=style,
+        extras=data.extras,
+        video_understanding=data.video_understanding,
+        llm_cache=data.llm_cache,
+    )
+    if not note or not note.markdown:
+        logger.warning(f"任务 {task_id} 重新生成失败，跳过保存")
+        return
+    save_note_to_file(task_id, note)
+
+
+async def run_regenerate_tasks(source_task_id: str, jobs: list, data: RegenerateRequest):
+    """
+    并发生成多种风格。各风格的提示词共享 转录 + 拼图 前缀，
+    先让第一个风格的请求把前缀写入供应商缓存，其余风格再同时发出以命中缓存。
+    """
+    first_task_id, first_style = jobs[0]
+    with task_events.subscribe(first_task_id) as (queue, _):
+        first = asyncio.create_task(run_regenerate_task(source_task_id, first_task_id, data, first_style))
+        if len(jobs) > 1:
+            loop = asyncio.get_running_loop()
+            deadline = loop.time() + REGENERATE_WARMUP_SECONDS
+            while not first.done() and loop.time() < deadline:
+                try:
+                    event = await asyncio.wait_for(queue.get(), timeout=deadline - loop.time())
+                except asyncio.TimeoutError:
+                    break
+                if event["type"] in ("partial", "delta", "done"):
+                    break
+
+    rest = [run_regenerate_task(source_task_id, task_id, data, style) for task_id, style in jobs[1:]]
+    await asyncio.gather(first, *rest)
+
+
 @router.post('/delete_task')
 def delete_task(data: RecordRequest):
     try:
@@ -234,12 +294,37 @@ def generate_note(data: VideoRequest, background_tasks: BackgroundTasks):
 
         background_tasks.add_task(run_note_task, task_id, data.video_url, data.platform, data.quality, data.link,
                                   data.screenshot, data.model_name, data.provider_id, data.format, data.style,
-                                  data.extras, data.video_understanding, data.video_interval, data.grid_size)
+                                  data.extras, data.video_understanding, data.video_interval, data.grid_size,
+                                  data.llm_cache)
         return R.success({"task_id": task_id})
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@router.post("/regenerate/{task_id}")
+def regenerate_note(task_id: str, data: RegenerateRequest, background_tasks: BackgroundTasks):
+    """
+    复用任务 task_id 的转录、音频元信息与拼图，以新的风格/格式重新生成笔记。
+    styles 传入多个风格时并发生成，每个风格返回一个新的 task_id，可分别查询状态与结果。
+    """
+    if not data.model_name or not data.provider_id:
+        raise HTTPException(status_code=400, detail="请选择模型和提供者")
+    if not all(
+        os.path.exists(os.path.join(NOTE_OUTPUT_DIR, f"{task_id}_{name}.json")) for name in ("audio", "transcript")
+    ):
+        return R.error(msg=NoteErrorEnum.CACHE_NOT_FOUND.message, code=NoteErrorEnum.CACHE_NOT_FOUND.code)
+
+    styles = list(dict.fromkeys(data.styles or [data.style]))
+    jobs = [(str(uuid.uuid4()), style) for style in styles]
+    for new_task_id, _ in jobs:
+        NoteGenerator()._update_status(new_task_id, TaskStatus.PENDING)
+    background_tasks.add_task(run_regenerate_tasks, task_id, jobs, data)
+    return R.success({
+        "task_id": jobs[0][0],
+        "tasks": [{"task_id": new_task_id, "style": style} for new_task_id, style in jobs],
+    })
+
+
 @router.get("/task_status/{task_id}")
 def get_task_status(task_id: str):
     status_path = os.path.join(NOTE_OUTPUT_DIR, f"{task_id}.status.json")
@@ -300,6 +385,57 @@ def get_task_status(task_id: str):
     })
 
 
+def _read_task_status(task_id: str) -> Optional[dict]:
+    status_path = os.path.join(NOTE_OUTPUT_DIR, f"{task_id}.status.json")
+    if not os.path.exists(status_path):
+        return None
+    try:
+        with open(status_path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except Exception:
+        return None
+
+
+def _sse(event: dict) -> str:
+    return f"event: {event['type']}\ndata: {json.dumps(event, ensure_ascii=False)}\n\n"
+
+
+@router.get("/task_stream/{task_id}")
+async def task_stream(task_id: str):
+    """
+    以 SSE 推送任务状态与笔记生成内容：
+    snapshot（已生成内容）、status、partial（未完成的当前行）、delta（已完成的行）、reset、done
+    """
+    async def event_source():
+        with task_events.subscribe(task_id) as (queue, snapshot):
+            yield _sse({"type": "snapshot", "content": snapshot})
+            while True:
+                try:
+                    event = await asyncio.wait_for(queue.get(), timeout=15)
+                except asyncio.TimeoutError:
+                    # 订阅前任务已结束时不会再有事件，依据状态文件收尾
+                    status = _read_task_status(task_id) or {}
+                    if status.get("status") in (TaskStatus.SUCCESS.value, TaskStatus.FAILED.value):
+                        yield _sse({"type": "done", "status": status["status"], "message": status.get("message", "")})
+                        return
+                    yield ": keep-alive\n\n"
+                    continue
+                yield _sse(event)
+                if event["type"] == "done":
+                    return
+
+    status = _read_task_status(task_id) or {}
+    if status.get("status") in (TaskStatus.SUCCESS.value, TaskStatus.FAILED.value):
+        done = _sse({"type": "done", "status": status["status"], "message": status.get("message", "")})
+        return StreamingResponse(iter([done]), media_type="text/event-stream")
+
+    return StreamingResponse(
+        event_source(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
 @router.get("/image_proxy")
 async def image_proxy(request: Request, url: str):
     headers = {
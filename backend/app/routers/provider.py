@@ -17,6 +17,9 @@ class ProviderRequest(BaseModel):
     base_url: str
     logo: Optional[str] = None
     type: str
+    rpm: Optional[int] = None
+    tpm: Optional[int] = None
+    max_concurrency: Optional[int] = None
 
 class TestRequest(BaseModel):
     id: str
@@ -28,6 +31,10 @@ class ProviderUpdateRequest(BaseModel):
     logo: Optional[str] = None
     type: Optional[str] = None
     enabled:Optional[int] = None
+    # 限流配置，0 表示不限制
+    rpm: Optional[int] = None
+    tpm: Optional[int] = None
+    max_concurrency: Optional[int] = None
 
 @router.post("/add_provider")
 def add_provider(data: ProviderRequest):
@@ -37,7 +44,10 @@ def add_provider(data: ProviderRequest):
             api_key=data.api_key,
             base_url=data.base_url,
             logo=data.logo,
-            type_=data.type
+            type_=data.type,
+            rpm=data.rpm,
+            tpm=data.tpm,
+            max_concurrency=data.max_concurrency,
         )
         return R.success(msg='添加模型供应商成功',data=res)
     except Exception as e:
@@ -73,7 +83,8 @@ def update_provider(data: ProviderUpdateRequest):
     try:
         if all(
             field is None
-            for field in [data.name, data.api_key, data.base_url, data.logo, data.type,data.enabled]
+            for field in [data.name, data.api_key, data.base_url, data.logo, data.type,data.enabled,
+                          data.rpm, data.tpm, data.max_concurrency]
         ):
             return R.error(msg='请至少填写一个参数')
 
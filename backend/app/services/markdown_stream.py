@@ -0,0 +1,89 @@
+import os
+import time
+from pathlib import Path
+from typing import Callable, List, Optional
+
+from dotenv import load_dotenv
+
+from app.services.task_events import task_events
+from app.utils.logger import get_logger
+
+load_dotenv()
+logger = get_logger(__name__)
+
+# 流式生成时把已生成内容写入磁盘的间隔（秒）
+NOTE_STREAM_FLUSH_SECONDS = float(os.getenv("NOTE_STREAM_FLUSH_SECONDS", 2))
+
+
+class MarkdownStreamWriter:
+    """
+    接收 GPT 流式输出的增量文本：
+
+    - 每凑满一行就对该行做后处理（如原片跳转链接替换），并作为 delta 事件推送；
+    - 尚未写完的行作为 partial 事件推送，前端可立即显示，不必等待换行；
+    - 每隔 flush_interval 秒把已生成内容写入 partial_file，进程中断后仍可查看。
+    """
+
+    def __init__(
+        self,
+        task_id: str,
+        partial_file: Path,
+        line_processor: Optional[Callable[[str], str]] = None,
+        flush_interval: float = NOTE_STREAM_FLUSH_SECONDS,
+    ):
+        self.task_id = task_id
+        self.partial_file = partial_file
+        self.line_processor = line_processor
+        self.flush_interval = flush_interval
+        self._lines: List[str] = []
+        self._pending = ""
+        self._last_flush = time.monotonic()
+        task_events.reset_content(task_id)
+
+    def _process(self, text: str) -> str:
+        if not self.line_processor:
+            return text
+        try:
+            return self.line_processor(text)
+        except Exception as e:
+            logger.warning(f"流式后处理失败，保留原文：{e}")
+            return text
+
+    def feed(self, delta: str) -> None:
+        self._pending += delta
+        if "\n" in self._pending:
+            completed, self._pending = self._pending.rsplit("\n", 1)
+            text = self._process(completed + "\n")
+            self._lines.append(text)
+            task_events.append_content(self.task_id, text)
+        if self._pending:
+            task_events.publish(self.task_id, {"type": "partial", "content": self._pending})
+
+        if time.monotonic() - self._last_flush >= self.flush_interval:
+            self.flush()
+
+    def flush(self) -> None:
+        self._last_flush = time.monotonic()
+        try:
+            tmp = self.partial_file.with_suffix(".tmp")
+            tmp.write_text("".join(self._lines) + self._pending, encoding="utf-8")
+            tmp.replace(self.partial_file)
+        except Exception as e:
+            logger.warning(f"写入流式缓存失败 ({self.partial_file})：{e}")
+
+    def close(self) -> None:
+        """
+        输出最后一行未换行的内容并落盘
+        """
+        if self._pending:
+            text = self._process(self._pending)
+            self._pending = ""
+            self._lines.append(text)
+            task_events.append_content(self.task_id, text)
+        self.flush()
+
+    def discard(self) -> None:
+        """
+        最终结果已写入正式缓存后删除中间文件
+        """
+        self.partial_file.unlink(missing_ok=True)
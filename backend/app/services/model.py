@@ -6,7 +6,9 @@ from app.enmus.exception import ProviderErrorEnum
 from app.exceptions.provider import ProviderError
 from app.gpt.gpt_factory import GPTFactory
 from app.gpt.provider.OpenAI_compatible_provider import OpenAICompatibleProvider
+from app.gpt.router import LLM_FAILOVER, LLM_FALLBACKS
 from app.models.model_config import ModelConfig
+from app.services.model_list_cache import model_list_cache
 from app.services.provider import ProviderService
 from app.utils.logger import get_logger
 
@@ -21,8 +23,43 @@ class ModelService:
             provider=provider["name"],
             model_name='',
             name=provider["name"],
+            provider_id=provider["id"],
+            rpm=provider.get("rpm"),
+            tpm=provider.get("tpm"),
+            max_concurrency=provider.get("max_concurrency"),
         )
 
+    @staticmethod
+    def get_fallback_configs(provider_id: str, model_name: str) -> list[ModelConfig]:
+        """
+        主模型的备用路由：先是 LLM_FALLBACKS 中显式配置的 (供应商, 模型)，
+        再是其他已启用供应商下同名的模型；只包含已启用的供应商
+        """
+        providers = {str(p.id): ProviderService.provider_to_dict(p) for p in get_enabled_providers()}
+        pairs = list(LLM_FALLBACKS)
+        if LLM_FAILOVER:
+            pairs += [
+                (str(m["provider_id"]), m["model_name"])
+                for m in get_all_models()
+                if m["model_name"] == model_name
+            ]
+
+        configs, seen = [], {(str(provider_id), model_name)}
+        for fallback_provider_id, fallback_model in pairs:
+            provider = providers.get(fallback_provider_id)
+            if not provider or (fallback_provider_id, fallback_model) in seen:
+                continue
+            seen.add((fallback_provider_id, fallback_model))
+            config = ModelService._build_model_config(provider)
+            config.model_name = fallback_model
+            configs.append(config)
+        return configs
+
+    @staticmethod
+    def _fetch_model_list(provider: dict):
+        config = ModelService._build_model_config(provider)
+        return GPTFactory().from_config(config).list_models()
+
     @staticmethod
     def get_model_list(provider_id: int, verbose: bool = False):
         provider = ProviderService.get_provider_by_id(provider_id)
@@ -30,9 +67,7 @@ class ModelService:
             return []
 
         try:
-            config = ModelService._build_model_config(provider)
-            gpt = GPTFactory().from_config(config)
-            models = gpt.list_models()
+            models = model_list_cache.get(provider["id"], lambda: ModelService._fetch_model_list(provider))
             if verbose:
                 print(f"[{provider['name']}] 模型列表: {models}")
             return models
@@ -40,6 +75,17 @@ class ModelService:
             print(f"[{provider['name']}] 获取模型失败: {e}")
             return []
 
+    @staticmethod
+    def prefetch_model_lists(timeout: float = None) -> None:
+        """
+        并发获取所有已启用供应商的模型列表，写入缓存
+        """
+        providers = [ProviderService.provider_to_dict(p) for p in get_enabled_providers()]
+        model_list_cache.prefetch(
+            {p["id"]: (lambda p=p: ModelService._fetch_model_list(p)) for p in providers if p.get("api_key")},
+            timeout=timeout,
+        )
+
     @staticmethod
     def get_all_models(verbose: bool = False):
         try:
@@ -123,7 +169,8 @@ class ModelService:
                 raise ProviderError(code=ProviderErrorEnum.NOT_FOUND.code, message=ProviderErrorEnum.NOT_FOUND.message)
             result =  OpenAICompatibleProvider.test_connection(
                 api_key=provider.get('api_key'),
-                base_url=provider.get('base_url')
+                base_url=provider.get('base_url'),
+                provider_id=provider.get('id'),
             )
             if result:
                 return True
@@ -0,0 +1,106 @@
+"""
+供应商远程模型列表（models.list）的进程内缓存。
+
+- 缓存未过期时直接返回；过期后仍先返回旧列表，同时在后台刷新（stale-while-revalidate），
+  前端打开下拉框时不再等待远程接口；
+- 首次获取没有旧值可用，同步请求；获取失败不缓存，下次重新请求；
+- prefetch 并发刷新多个供应商，服务启动时预热所有已启用的供应商；
+- 供应商修改或删除时由 ProviderService 调用 invalidate。
+"""
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+from typing import Any, Callable, Dict, Optional, Set, Tuple
+
+from dotenv import load_dotenv
+
+from app.utils.logger import get_logger
+
+load_dotenv()
+logger = get_logger(__name__)
+
+# 模型列表缓存有效期（秒），设为 0 关闭缓存
+MODEL_LIST_CACHE_TTL = float(os.getenv("MODEL_LIST_CACHE_TTL", 600))
+# 并发获取模型列表的线程数
+MODEL_LIST_FETCH_WORKERS = int(os.getenv("MODEL_LIST_FETCH_WORKERS", 8))
+
+Fetch = Callable[[], Any]
+
+
+class ModelListCache:
+    def __init__(self, ttl: float = MODEL_LIST_CACHE_TTL, workers: int = MODEL_LIST_FETCH_WORKERS):
+        self.ttl = ttl
+        self._entries: Dict[str, Tuple[float, Any]] = {}
+        self._refreshing: Set[str] = set()
+        # 每个供应商的版本号，invalidate 后丢弃进行中的旧请求结果
+        self._versions: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="model-list")
+
+    def _store(self, key: str, version: int, value: Any) -> None:
+        with self._lock:
+            if self._versions.get(key, 0) == version:
+                self._entries[key] = (time.monotonic(), value)
+
+    def _fetch(self, key: str, fetch: Fetch) -> Any:
+        with self._lock:
+            version = self._versions.get(key, 0)
+        value = fetch()
+        if self.ttl > 0:
+            self._store(key, version, value)
+        return value
+
+    def _refresh(self, key: str, fetch: Fetch) -> None:
+        try:
+            self._fetch(key, fetch)
+        except Exception as e:
+            logger.warning(f"[{key}] 后台刷新模型列表失败，继续使用旧列表: {e}")
+        finally:
+            with self._lock:
+                self._refreshing.discard(key)
+
+    def _schedule_refresh(self, key: str, fetch: Fetch):
+        with self._lock:
+            if key in self._refreshing:
+                return None
+            self._refreshing.add(key)
+        return self._executor.submit(self._refresh, key, fetch)
+
+    def get(self, key: str, fetch: Fetch) -> Any:
+        """
+        :param key: 供应商 ID
+        :param fetch: 请求远程模型列表的函数，失败时应抛出异常
+        """
+        key = str(key)
+        with self._lock:
+            entry = self._entries.get(key)
+        if entry is None:
+            return self._fetch(key, fetch)
+
+        fetched_at, value = entry
+        if time.monotonic() - fetched_at >= self.ttl:
+            self._schedule_refresh(key, fetch)
+        return value
+
+    def prefetch(self, fetches: Dict[str, Fetch], timeout: Optional[float] = None) -> None:
+        """
+        并发刷新多个供应商的模型列表，等待全部完成或超时
+        """
+        futures = [
+            future
+            for key, fetch in fetches.items()
+            if (future := self._schedule_refresh(str(key), fetch)) is not None
+        ]
+        if futures:
+            wait(futures, timeout=timeout)
+
+    def invalidate(self, key: Optional[str] = None) -> None:
+        with self._lock:
+            keys = set(self._entries) | set(self._versions) if key is None else [str(key)]
+            for k in keys:
+                self._entries.pop(k, None)
+                self._versions[k] = self._versions.get(k, 0) + 1
+
+
+model_list_cache = ModelListCache()
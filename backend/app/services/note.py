@@ -1,10 +1,13 @@
+import asyncio
+import base64
 import json
 import logging
 import os
 import re
+from contextlib import nullcontext
 from dataclasses import asdict
 from pathlib import Path
-from typing import List, Optional, Tuple, Union, Any
+from typing import Dict, List, Optional, Tuple, Union, Any
 
 from fastapi import HTTPException
 from pydantic import HttpUrl
@@ -23,19 +26,28 @@ from app.exceptions.note import NoteError
 from app.exceptions.provider import ProviderError
 from app.gpt.base import GPT
 from app.gpt.gpt_factory import GPTFactory
+from app.gpt.rate_limiter import rate_limit_flow
+from app.gpt.telemetry import TaskLLMUsage, llm_usage
 from app.models.audio_model import AudioDownloadResult
 from app.models.gpt_model import GPTSource
 from app.models.model_config import ModelConfig
 from app.models.notes_model import AudioDownloadResult, NoteResult
 from app.models.transcriber_model import TranscriptResult, TranscriptSegment
 from app.services.constant import SUPPORT_PLATFORM_MAP
+from app.services.markdown_stream import MarkdownStreamWriter
+from app.services.model import ModelService
 from app.services.provider import ProviderService
+from app.services.task_events import task_events
 from app.transcriber.base import Transcriber
-from app.transcriber.transcriber_provider import get_transcriber, _transcribers
+from app.transcriber.transcriber_provider import get_transcriber, _transcribers, wait_transcriber_ready
+from app.utils.artifact_cache import grid_cache_key, link_grids, load_cached_grids, store_grids, video_cache_key
 from app.utils.note_helper import replace_content_markers
+from app.utils.async_utils import run_cpu, run_io
 from app.utils.status_code import StatusCode
-from app.utils.video_helper import generate_screenshot
-from app.utils.video_reader import VideoReader
+from app.utils.video_helper import extract_screenshots
+from app.utils.video_reader import VideoReader, probe_duration
+from app.utils.vision_planner import plan_vision
+from app.utils.workspace import TaskWorkspace
 
 # ------------------ 环境变量与全局配置 ------------------
 
@@ -53,6 +65,10 @@ NOTE_OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
 IMAGE_OUTPUT_DIR = os.getenv("OUT_DIR", "./static/screenshots")
 # 图片基础 URL（用于生成 Markdown 中的图片链接，需前端静态目录对应）
 IMAGE_BASE_URL = os.getenv("IMAGE_BASE_URL", "/static/screenshots")
+# 是否优先使用平台字幕（B 站 / YouTube），有字幕时跳过音频下载与转写
+PLATFORM_SUBTITLES = os.getenv("PLATFORM_SUBTITLES", "true").lower() == "true"
+# 是否流式调用 GPT，并通过 /task_stream/{task_id} 实时推送生成内容
+NOTE_STREAM = os.getenv("NOTE_STREAM", "true").lower() == "true"
 
 # 日志配置
 logger = logging.getLogger(__name__)
@@ -69,15 +85,33 @@ class NoteGenerator:
         self.model_size: str = "base"
         self.device: Optional[str] = None
         self.transcriber_type: str = os.getenv("TRANSCRIBER_TYPE", "fast-whisper")
-        self.transcriber: Transcriber = self._init_transcriber()
+        # 转写器延迟到真正转写时才获取，避免查询/删除等操作等待模型加载
+        self._transcriber: Optional[Transcriber] = None
         self.video_path: Optional[Path] = None
         self.video_img_urls=[]
+        # 视频理解阶段保存的原始帧 {时间点: 路径}，插入截图时复用
+        self.video_frames: Dict[float, str] = {}
+        # 任务独立的临时目录（截帧等中间文件），任务结束时删除
+        self.workspace: Optional[TaskWorkspace] = None
         logger.info("NoteGenerator 初始化完成")
 
 
+    @property
+    def transcriber(self) -> Transcriber:
+        if self._transcriber is None:
+            self._transcriber = self._init_transcriber()
+        return self._transcriber
+
     # ---------------- 公有方法 ----------------
 
-    def generate(
+    def generate(self, *args, **kwargs) -> NoteResult | None:
+        """
+        同步入口：在新的事件循环中执行 agenerate，参数与 agenerate 相同。
+        服务内请直接 await agenerate，由同一个事件循环并发处理所有任务。
+        """
+        return asyncio.run(self.agenerate(*args, **kwargs))
+
+    async def agenerate(
         self,
         video_url: Union[str, HttpUrl],
         platform: str,
@@ -94,9 +128,11 @@ class NoteGenerator:
         video_understanding: bool = False,
         video_interval: int = 0,
         grid_size: Optional[List[int]] = None,
+        llm_cache: bool = True,
     ) -> NoteResult | None:
         """
         主流程：按步骤依次下载、转写、GPT 总结、截图/链接处理、存库、返回 NoteResult。
+        网络等待（下载、远程 ASR、LLM）以异步方式进行，本地转写、拼图等 CPU 阶段交给线程池。
 
         :param video_url: 视频或音频链接
         :param platform: 平台名称，对应 SUPPORT_PLATFORM_MAP 中的键
@@ -113,27 +149,39 @@ class NoteGenerator:
         :param video_understanding: 是否需要视频拼图理解（生成缩略图）
         :param video_interval: 视频帧截取间隔（秒），仅在 video_understanding 为 True 时生效
         :param grid_size: 生成缩略图时的网格大小，如 [3, 3]
+        :param llm_cache: 是否使用 LLM 响应缓存，False 时强制重新请求模型
         :return: NoteResult 对象，包含 markdown 文本、转写结果和音频元信息
         """
         if grid_size is None:
             grid_size = []
 
+        self.workspace = TaskWorkspace(task_id)
         try:
             logger.info(f"开始生成笔记 (task_id={task_id})")
+            # 同一供应商的请求槽位按任务轮转分配
+            rate_limit_flow.set(task_id or "")
             self._update_status(task_id, TaskStatus.PARSING)
 
             # 获取下载器与 GPT 实例
 
             downloader = self._get_downloader(platform)
-            gpt = self._get_gpt(model_name, provider_id)
+            gpt = await run_io(self._get_gpt, model_name, provider_id)
 
             # 缓存文件路径
             audio_cache_file = NOTE_OUTPUT_DIR / f"{task_id}_audio.json"
             transcript_cache_file = NOTE_OUTPUT_DIR / f"{task_id}_transcript.json"
             markdown_cache_file = NOTE_OUTPUT_DIR / f"{task_id}_markdown.md"
             print(audio_cache_file)
+            # 0. 平台已有字幕时直接生成音频/转写缓存，后续步骤命中缓存
+            await self._fetch_platform_subtitles(
+                downloader=downloader,
+                video_url=video_url,
+                audio_cache_file=audio_cache_file,
+                transcript_cache_file=transcript_cache_file,
+            )
+
             # 1. 下载音频/视频
-            audio_meta = self._download_media(
+            audio_meta = await self._download_media(
                 downloader=downloader,
                 video_url=video_url,
                 quality=quality,
@@ -145,17 +193,18 @@ class NoteGenerator:
                 video_understanding=video_understanding,
                 video_interval=video_interval,
                 grid_size=grid_size,
+                model_name=model_name,
             )
 
             # 2. 转写文字
-            transcript = self._transcribe_audio(
+            transcript = await self._transcribe_audio(
                 audio_file=audio_meta.file_path,
                 transcript_cache_file=transcript_cache_file,
                 status_phase=TaskStatus.TRANSCRIBING,
             )
 
             # 3. GPT 总结
-            markdown = self._summarize_text(
+            markdown = await self._summarize_text(
                 audio_meta=audio_meta,
                 transcript=transcript,
                 gpt=gpt,
@@ -166,11 +215,12 @@ class NoteGenerator:
                 style=style,
                 extras=extras,
                 video_img_urls=self.video_img_urls,
+                llm_cache=llm_cache,
             )
 
             # 4. 截图 & 链接替换
             if _format:
-                markdown = self._post_process_markdown(
+                markdown = await self._post_process_markdown(
                     markdown=markdown,
                     video_path=self.video_path,
                     formats=_format,
@@ -180,7 +230,7 @@ class NoteGenerator:
 
             # 5. 保存记录到数据库
             self._update_status(task_id, TaskStatus.SAVING)
-            self._save_metadata(video_id=audio_meta.video_id, platform=platform, task_id=task_id)
+            await run_io(self._save_metadata, video_id=audio_meta.video_id, platform=platform, task_id=task_id)
 
             # 6. 完成
             self._update_status(task_id, TaskStatus.SUCCESS)
@@ -191,6 +241,81 @@ class NoteGenerator:
             logger.error(f"生成笔记流程异常 (task_id={task_id})：{exc}", exc_info=True)
             self._update_status(task_id, TaskStatus.FAILED, message=str(exc))
             return None
+        finally:
+            await run_io(self.workspace.cleanup)
+
+    async def aregenerate(
+        self,
+        source_task_id: str,
+        task_id: str,
+        model_name: str,
+        provider_id: str,
+        _format: Optional[List[str]] = None,
+        style: Optional[str] = None,
+        extras: Optional[str] = None,
+        video_understanding: bool = True,
+        llm_cache: bool = True,
+    ) -> NoteResult | None:
+        """
+        复用已有任务的音频元信息、转写结果与拼图，只以新的参数重新执行总结与后处理，
+        不再下载和转写。结果写入新的 task_id，原任务不受影响。
+
+        :param source_task_id: 已完成下载与转写的原任务 ID
+        :param task_id: 本次生成的任务 ID
+        :param video_understanding: 原任务有拼图时是否一并发送给模型
+        :return: NoteResult 对象，原任务缓存缺失或生成失败时为 None
+        """
+        _format = _format or []
+        try:
+            logger.info(f"重新生成笔记 (task_id={task_id}, source={source_task_id}, style={style})")
+            rate_limit_flow.set(task_id)
+            self._update_status(task_id, TaskStatus.PARSING)
+
+            audio_meta = self._load_audio_cache(NOTE_OUTPUT_DIR / f"{source_task_id}_audio.json")
+            transcript = self._load_transcript_cache(NOTE_OUTPUT_DIR / f"{source_task_id}_transcript.json")
+            if audio_meta is None or transcript is None:
+                raise NoteError(code=NoteErrorEnum.CACHE_NOT_FOUND.code, message=NoteErrorEnum.CACHE_NOT_FOUND.message)
+            video_img_urls = await run_io(self._load_grids, source_task_id) if video_understanding else []
+            video_path = Path(audio_meta.video_path) if audio_meta.video_path else None
+            if "screenshot" in _format and not (video_path and video_path.exists()):
+                logger.warning(f"原任务视频文件不存在，跳过截图 (source={source_task_id})")
+                video_path = None
+
+            gpt = await run_io(self._get_gpt, model_name, provider_id)
+            markdown = await self._summarize_text(
+                audio_meta=audio_meta,
+                transcript=transcript,
+                gpt=gpt,
+                markdown_cache_file=NOTE_OUTPUT_DIR / f"{task_id}_markdown.md",
+                link="link" in _format,
+                screenshot="screenshot" in _format,
+                formats=_format,
+                style=style,
+                extras=extras,
+                video_img_urls=video_img_urls,
+                llm_cache=llm_cache,
+            )
+
+            if _format:
+                markdown = await self._post_process_markdown(
+                    markdown=markdown,
+                    video_path=video_path,
+                    formats=_format,
+                    audio_meta=audio_meta,
+                    platform=audio_meta.platform,
+                )
+
+            self._update_status(task_id, TaskStatus.SAVING)
+            await run_io(self._save_metadata, video_id=audio_meta.video_id, platform=audio_meta.platform,
+                         task_id=task_id)
+            self._update_status(task_id, TaskStatus.SUCCESS)
+            logger.info(f"笔记重新生成成功 (task_id={task_id})")
+            return NoteResult(markdown=markdown, transcript=transcript, audio_meta=audio_meta)
+
+        except Exception as exc:
+            logger.error(f"重新生成笔记异常 (task_id={task_id})：{exc}", exc_info=True)
+            self._update_status(task_id, TaskStatus.FAILED, message=str(exc))
+            return None
 
     @staticmethod
     def delete_note(video_id: str, platform: str) -> int:
@@ -235,8 +360,15 @@ class NoteGenerator:
             model_name=model_name,
             provider=provider["type"],
             name=provider["name"],
+            provider_id=provider["id"],
+            rpm=provider.get("rpm"),
+            tpm=provider.get("tpm"),
+            max_concurrency=provider.get("max_concurrency"),
         )
-        return GPTFactory().from_config(config)
+        fallbacks = ModelService.get_fallback_configs(provider["id"], model_name)
+        if fallbacks:
+            logger.info(f"备用模型路由：{[f'{c.name}/{c.model_name}' for c in fallbacks]}")
+        return GPTFactory().from_config(config, fallbacks=fallbacks)
 
     def _get_downloader(self, platform: str) -> Downloader:
         """
@@ -278,6 +410,10 @@ class NoteGenerator:
         data = {"status": status.value if isinstance(status, TaskStatus) else status}
         if message:
             data["message"] = message
+        if data["status"] in (TaskStatus.SUCCESS.value, TaskStatus.FAILED.value):
+            task_events.finish(task_id, data["status"], message or "")
+        else:
+            task_events.publish(task_id, {"type": "status", **data})
 
         try:
             # First create a temporary file
@@ -300,6 +436,55 @@ class NoteGenerator:
             except:
                 logger.error(f"写入错误  {e}")
 
+    @staticmethod
+    def _save_task_stats(task_id: str, key: str, value: dict) -> None:
+        """
+        把任务的统计信息（如转录压缩节省的 token）合并写入 {task_id}_stats.json，并推送给订阅者
+        """
+        stats_file = NOTE_OUTPUT_DIR / f"{task_id}_stats.json"
+        try:
+            data = json.loads(stats_file.read_text(encoding="utf-8")) if stats_file.exists() else {}
+            data[key] = value
+            stats_file.write_text(json.dumps(data, ensure_ascii=False, indent=2), encoding="utf-8")
+        except Exception as e:
+            logger.warning(f"写入任务统计失败 (task_id={task_id})：{e}")
+        task_events.publish(task_id, {"type": "stats", key: value})
+
+    @staticmethod
+    def _load_audio_cache(audio_cache_file: Path) -> Optional[AudioDownloadResult]:
+        if not audio_cache_file.exists():
+            return None
+        return AudioDownloadResult(**json.loads(audio_cache_file.read_text(encoding="utf-8")))
+
+    @staticmethod
+    def _load_transcript_cache(transcript_cache_file: Path) -> Optional[TranscriptResult]:
+        if not transcript_cache_file.exists():
+            return None
+        data = json.loads(transcript_cache_file.read_text(encoding="utf-8"))
+        segments = [TranscriptSegment(**seg) for seg in data.get("segments", [])]
+        return TranscriptResult(language=data["language"], full_text=data["full_text"], segments=segments)
+
+    @staticmethod
+    def _load_grids(task_id: str) -> List[str]:
+        """
+        读取任务保存的拼图并编码为 data URL，顺序与生成时一致
+        """
+        return NoteGenerator._load_grid_dir(NOTE_OUTPUT_DIR / f"{task_id}_grids")
+
+    @staticmethod
+    def _load_grid_dir(grid_dir: Path) -> List[str]:
+        if not grid_dir.is_dir():
+            return []
+        mime_types = {".jpg": "image/jpeg", ".webp": "image/webp"}
+        paths = sorted(
+            (p for p in grid_dir.glob("grid_*") if p.suffix in mime_types),
+            key=lambda p: int(re.sub(r"\D", "", p.stem) or 0),
+        )
+        return [
+            f"data:{mime_types[p.suffix]};base64,{base64.b64encode(p.read_bytes()).decode('utf-8')}"
+            for p in paths
+        ]
+
     def _handle_exception(self, task_id, exc):
         logger.error(f"任务异常 (task_id={task_id})", exc_info=True)
         error_message = getattr(exc, 'detail', str(exc))
@@ -310,7 +495,50 @@ class NoteGenerator:
                 error_message = str(error_message)
         self._update_status(task_id, TaskStatus.FAILED, message=error_message)
 
-    def _download_media(
+    async def _fetch_platform_subtitles(
+        self,
+        downloader: Downloader,
+        video_url: Union[str, HttpUrl],
+        audio_cache_file: Path,
+        transcript_cache_file: Path,
+    ) -> bool:
+        """
+        尝试获取平台字幕。成功时写入音频元信息与转写缓存，
+        _download_media / _transcribe_audio 读取缓存即可，不再下载音频和调用 ASR。
+        获取失败不影响主流程，回退到下载 + 转写。
+
+        :param downloader: Downloader 实例
+        :param video_url: 视频链接
+        :param audio_cache_file: 音频元信息缓存路径
+        :param transcript_cache_file: 转写结果缓存路径
+        :return: 是否使用了平台字幕
+        """
+        if not PLATFORM_SUBTITLES:
+            return False
+        if audio_cache_file.exists() and transcript_cache_file.exists():
+            return False
+
+        try:
+            fetched = await downloader.adownload_subtitles(str(video_url))
+        except Exception as e:
+            logger.warning(f"获取平台字幕失败，回退到音频转写：{e}")
+            return False
+        if not fetched:
+            logger.info("平台无可用字幕，回退到音频转写")
+            return False
+
+        audio, transcript = fetched
+        # 已有的音频元信息（可能带着下载好的音频路径）不覆盖
+        if not audio_cache_file.exists():
+            # 部分平台的字幕接口不返回时长，按字幕末尾估算，都没有时记为 0
+            if audio.duration is None:
+                audio.duration = transcript.segments[-1].end if transcript.segments else 0
+            audio_cache_file.write_text(json.dumps(asdict(audio), ensure_ascii=False, indent=2), encoding="utf-8")
+        transcript_cache_file.write_text(json.dumps(asdict(transcript), ensure_ascii=False, indent=2), encoding="utf-8")
+        logger.info(f"使用平台字幕生成转写缓存 ({transcript_cache_file})")
+        return True
+
+    async def _download_media(
         self,
         downloader: Downloader,
         video_url: Union[str, HttpUrl],
@@ -323,6 +551,7 @@ class NoteGenerator:
         video_understanding: bool,
         video_interval: int,
         grid_size: List[int],
+        model_name: Optional[str] = None,
     ) -> AudioDownloadResult | None:
         """
         1. 检查音频缓存；若不存在，则根据需要下载音频或视频（若需截图/可视化）。
@@ -339,7 +568,8 @@ class NoteGenerator:
         :param screenshot: 是否需要在笔记中插入截图
         :param video_understanding: 是否需要生成缩略图
         :param video_interval: 视频截帧间隔
-        :param grid_size: 缩略图网格尺寸
+        :param grid_size: 缩略图网格尺寸，为空时按模型自动选择
+        :param model_name: 目标模型名称，用于规划拼图尺寸与数量
         :return: AudioDownloadResult 对象
         """
         task_id = audio_cache_file.stem.split("_")[0]
@@ -352,22 +582,42 @@ class NoteGenerator:
         if need_video:
             try:
                 logger.info("开始下载视频")
-                video_path_str = downloader.download_video(video_url)
+                video_path_str = await downloader.adownload_video(video_url)
                 self.video_path = Path(video_path_str)
                 logger.info(f"视频下载完成：{self.video_path}")
 
-                # 若指定了 grid_size，则生成缩略图
-                if grid_size:
-                    self.video_img_urls=VideoReader(
-                        video_path=str(self.video_path),
-                        grid_size=tuple(grid_size),
-                        frame_interval=video_interval,
-                        unit_width=1280,
-                        unit_height=720,
-                        save_quality=90,
-                    ).run()
-                else:
-                    logger.info("未指定 grid_size，跳过缩略图生成")
+                # 视频理解：按目标模型的图片限制规划网格、分辨率与截帧间隔后生成拼图
+                if video_understanding:
+                    duration = await run_io(probe_duration, str(self.video_path))
+                    plan = plan_vision(duration, model_name, grid_size, video_interval)
+                    # 拼图按任务保存，换风格重新生成时直接复用
+                    task_grid_dir = str(NOTE_OUTPUT_DIR / f"{task_id}_grids")
+                    # 同一视频、同一组拼图参数只生成一次，重试时直接使用缓存
+                    grid_key = grid_cache_key(video_cache_key(str(self.video_path), platform), plan)
+                    cached = load_cached_grids(grid_key)
+                    if cached:
+                        logger.info(f"命中拼图缓存 ({grid_key})")
+                        await run_io(link_grids, cached, task_grid_dir)
+                        self.video_img_urls = await run_io(self._load_grid_dir, Path(task_grid_dir))
+                    else:
+                        with VideoReader(
+                            video_path=str(self.video_path),
+                            grid_size=plan.grid,
+                            frame_interval=plan.interval,
+                            unit_width=plan.tile_width,
+                            unit_height=plan.tile_height,
+                            save_quality=plan.quality,
+                            image_format=plan.image_format,
+                            max_frames=plan.max_frames,
+                            max_payload_bytes=plan.max_payload_bytes,
+                            sampling=plan.sampling,
+                            workspace=self.workspace,
+                            keep_frames=screenshot,
+                        ) as reader:
+                            self.video_img_urls = await run_cpu(reader.run)
+                            self.video_frames = reader.frame_files
+                            cached = await run_io(store_grids, grid_key, reader.grid_dir)
+                        await run_io(link_grids, cached, task_grid_dir)
             except Exception as exc:
                 logger.error(f"视频下载失败：{exc}")
 
@@ -384,7 +634,7 @@ class NoteGenerator:
         # 下载音频
         try:
             logger.info("开始下载音频")
-            audio = downloader.download(
+            audio = await downloader.adownload(
                 video_url=video_url,
                 quality=quality,
                 output_dir=output_path,
@@ -400,7 +650,7 @@ class NoteGenerator:
             raise
 
 
-    def _transcribe_audio(
+    async def _transcribe_audio(
         self,
         audio_file: str,
         transcript_cache_file: Path,
@@ -430,8 +680,14 @@ class NoteGenerator:
 
         # 调用转写器
         try:
+            if not wait_transcriber_ready(timeout=0):
+                # 模型仍在后台加载，任务排队等待
+                self._update_status(task_id, status_phase, message="等待转写模型加载完成")
+                await run_io(wait_transcriber_ready)
+                self._update_status(task_id, status_phase)
             logger.info("开始转写音频")
-            transcript = self.transcriber.transcript(file_path=audio_file)
+            transcriber = await run_io(lambda: self.transcriber)
+            transcript = await transcriber.atranscript(audio_file)
             transcript_cache_file.write_text(json.dumps(asdict(transcript), ensure_ascii=False, indent=2), encoding="utf-8")
             logger.info(f"转写并缓存成功 ({transcript_cache_file})")
             return transcript
@@ -440,7 +696,7 @@ class NoteGenerator:
             self._handle_exception(task_id, exc)
             raise
 
-    def _summarize_text(
+    async def _summarize_text(
         self,
         audio_meta: AudioDownloadResult,
         transcript: TranscriptResult,
@@ -452,6 +708,7 @@ class NoteGenerator:
         style: Optional[str],
         extras: Optional[str],
             video_img_urls: List[str],
+        llm_cache: bool = True,
     ) -> str | None:
         """
         调用 GPT 对转写结果进行总结，生成 Markdown 文本并缓存。
@@ -465,9 +722,46 @@ class NoteGenerator:
         :param formats: 包含 'link' 或 'screenshot' 的列表
         :param style: GPT 输出风格
         :param extras: GPT 额外参数
+        :param llm_cache: 是否使用 LLM 响应缓存
         :return: 生成的 Markdown 字符串
         """
-        task_id = markdown_cache_file.stem
+        task_id = markdown_cache_file.stem.removesuffix("_markdown")
+        # 供应商设置了并发上限时，同时处于总结阶段的任务数不超过该上限，多出的任务在此排队
+        limiter = getattr(gpt, "rate_limiter", None)
+        if limiter and limiter.admission_pending():
+            logger.info(f"模型供应商 {limiter.name} 并发已满，任务排队等待总结 (task_id={task_id})")
+            task_events.publish(task_id, {"type": "queued", "message": "等待模型供应商空闲"})
+        async with limiter.admission(task_id) if limiter else nullcontext():
+            return await self._summarize_admitted(
+                task_id=task_id,
+                audio_meta=audio_meta,
+                transcript=transcript,
+                gpt=gpt,
+                markdown_cache_file=markdown_cache_file,
+                link=link,
+                screenshot=screenshot,
+                formats=formats,
+                style=style,
+                extras=extras,
+                video_img_urls=video_img_urls,
+                llm_cache=llm_cache,
+            )
+
+    async def _summarize_admitted(
+        self,
+        task_id: str,
+        audio_meta: AudioDownloadResult,
+        transcript: TranscriptResult,
+        gpt: GPT,
+        markdown_cache_file: Path,
+        link: bool,
+        screenshot: bool,
+        formats: List[str],
+        style: Optional[str],
+        extras: Optional[str],
+        video_img_urls: List[str],
+        llm_cache: bool = True,
+    ) -> str:
         self._update_status(task_id, TaskStatus.SUMMARIZING)
 
         source = GPTSource(
@@ -480,19 +774,51 @@ class NoteGenerator:
             _format=formats,
             style=style,
             extras=extras,
+            chapters=audio_meta.raw_info.get("chapters"),
+            cache=llm_cache,
         )
 
+        writer = None
+        if NOTE_STREAM:
+            # 推送给前端的内容逐行替换原片跳转标记，截图仍在最终后处理阶段生成
+            line_processor = None
+            if "link" in formats:
+                line_processor = lambda text: replace_content_markers(
+                    text, video_id=audio_meta.video_id, platform=audio_meta.platform
+                )
+            writer = MarkdownStreamWriter(
+                task_id=task_id,
+                partial_file=markdown_cache_file.with_suffix(".partial.md"),
+                line_processor=line_processor,
+            )
+
+        # 本任务的 LLM 调用（含分块摘要）记录到 usage，结束后写入任务统计
+        usage = TaskLLMUsage(style=style)
+        usage_token = llm_usage.set(usage)
         try:
-            markdown = gpt.summarize(source)
+            markdown = await gpt.asummarize(source, on_delta=writer.feed if writer else None)
             markdown_cache_file.write_text(markdown, encoding="utf-8")
+            compaction_stats = getattr(gpt, "compaction_stats", None)
+            if compaction_stats:
+                self._save_task_stats(task_id, "compaction", compaction_stats.to_dict())
+            if writer:
+                writer.close()
+                writer.discard()
             logger.info(f"GPT 总结并缓存成功 ({markdown_cache_file})")
             return markdown
         except Exception as exc:
+            if writer:
+                writer.flush()
             logger.error(f"GPT 总结失败：{exc}")
             self._handle_exception(task_id, exc)
             raise
+        finally:
+            llm_usage.reset(usage_token)
+            if usage.records:
+                usage.export()
+                self._save_task_stats(task_id, "llm", usage.summary())
 
-    def _post_process_markdown(
+    async def _post_process_markdown(
         self,
         markdown: str,
         video_path: Optional[Path],
@@ -512,7 +838,7 @@ class NoteGenerator:
         """
         if "screenshot" in formats and video_path:
             try:
-                markdown = self._insert_screenshots(markdown, video_path)
+                markdown = await self._insert_screenshots(markdown, video_path, platform)
             except Exception as exc:
                 logger.warning("截图插入失败，跳过该步骤")
 
@@ -524,26 +850,39 @@ class NoteGenerator:
 
         return markdown
 
-    def _insert_screenshots(self, markdown: str, video_path: Path) -> str | None | Any:
+    async def _insert_screenshots(self, markdown: str, video_path: Path, platform: Optional[str] = None) -> str:
         """
         扫描 Markdown 文本中所有 Screenshot 标记，并替换为实际生成的截图链接。
 
         :param markdown: 含有 *Screenshot-mm:ss 或 Screenshot-[mm:ss] 标记的 Markdown 文本
         :param video_path: 本地视频文件路径
+        :param platform: 平台标识，与视频 ID 一起确定截图文件名
         :return: 替换后的 Markdown 字符串
         """
         matches: List[Tuple[str, int]] = self._extract_screenshot_timestamps(markdown)
-        for idx, (marker, ts) in enumerate(matches):
-            try:
-                img_path = generate_screenshot(str(video_path), str(IMAGE_OUTPUT_DIR), ts, idx)
-                filename = Path(img_path).name
-                # 构建前端可访问的 URL，例如 /static/screenshots/{filename}
-                img_url = f"{IMAGE_BASE_URL.rstrip('/')}/{filename}"
-                markdown = markdown.replace(marker, f"![]({img_url})", 1)
-            except Exception as exc:
-                logger.error(f"生成截图失败 (timestamp={ts})：{exc}")
-                # self._handle_exception(task_id, exc)
-                return None
+        if not matches:
+            return markdown
+        try:
+            # 全部时间点一次解码取出，已有的截图与视频理解阶段已解码的帧直接复用
+            paths = await run_cpu(
+                extract_screenshots, str(video_path), str(IMAGE_OUTPUT_DIR),
+                [ts for _, ts in matches], self.video_frames, video_cache_key(str(video_path), platform),
+            )
+        except Exception as exc:
+            # 截图失败不影响笔记本身：去掉标记后返回原文
+            logger.error(f"生成截图失败，移除截图标记：{exc}")
+            for marker, _ in matches:
+                markdown = markdown.replace(marker, "", 1)
+            return markdown
+        for marker, ts in matches:
+            img_path = paths.get(ts)
+            if img_path is None:
+                logger.warning(f"截图时间点超出视频时长，移除标记 (timestamp={ts})")
+                markdown = markdown.replace(marker, "", 1)
+                continue
+            # 构建前端可访问的 URL，例如 /static/screenshots/{filename}
+            img_url = f"{IMAGE_BASE_URL.rstrip('/')}/{Path(img_path).name}"
+            markdown = markdown.replace(marker, f"![]({img_url})", 1)
         return markdown
 
     @staticmethod
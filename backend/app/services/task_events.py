@@ -0,0 +1,80 @@
+"""
+任务事件流：在后台线程中生成笔记时，把状态变化与 GPT 流式输出推送给订阅者（SSE 接口）。
+
+生成任务运行在线程池中，订阅者运行在事件循环中，
+因此每个订阅者持有自己的 asyncio.Queue，发布时通过 call_soon_threadsafe 投递。
+"""
+import asyncio
+import threading
+from collections import defaultdict
+from contextlib import contextmanager
+from typing import Dict, List, Tuple
+
+from app.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+
+class TaskEventBus:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subscribers: Dict[str, List[Tuple[asyncio.AbstractEventLoop, asyncio.Queue]]] = defaultdict(list)
+        # 每个任务当前已生成的笔记内容，供中途加入的订阅者获取快照
+        self._content: Dict[str, str] = {}
+
+    def _dispatch(self, task_id: str, event: dict) -> None:
+        for loop, queue in self._subscribers.get(task_id, []):
+            try:
+                loop.call_soon_threadsafe(queue.put_nowait, event)
+            except RuntimeError:
+                # 事件循环已关闭，订阅者会在退出时自行注销
+                pass
+
+    def publish(self, task_id: str, event: dict) -> None:
+        with self._lock:
+            self._dispatch(task_id, event)
+
+    def append_content(self, task_id: str, text: str) -> None:
+        """
+        追加笔记内容并推送 delta 事件
+        """
+        if not text:
+            return
+        with self._lock:
+            self._content[task_id] = self._content.get(task_id, "") + text
+            self._dispatch(task_id, {"type": "delta", "content": text})
+
+    def reset_content(self, task_id: str) -> None:
+        with self._lock:
+            self._content.pop(task_id, None)
+            self._dispatch(task_id, {"type": "reset"})
+
+    def finish(self, task_id: str, status: str, message: str = "") -> None:
+        """
+        任务结束（成功或失败），推送 done 事件并释放内容快照
+        """
+        with self._lock:
+            self._content.pop(task_id, None)
+            self._dispatch(task_id, {"type": "done", "status": status, "message": message})
+
+    @contextmanager
+    def subscribe(self, task_id: str):
+        """
+        订阅任务事件，返回 (队列, 当前内容快照)；快照与注册在同一把锁内完成，不会重复或遗漏 delta
+        """
+        entry = (asyncio.get_running_loop(), asyncio.Queue())
+        with self._lock:
+            self._subscribers[task_id].append(entry)
+            snapshot = self._content.get(task_id, "")
+        try:
+            yield entry[1], snapshot
+        finally:
+            with self._lock:
+                subscribers = self._subscribers.get(task_id, [])
+                if entry in subscribers:
+                    subscribers.remove(entry)
+                if not subscribers:
+                    self._subscribers.pop(task_id, None)
+
+
+task_events = TaskEventBus()
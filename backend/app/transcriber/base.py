@@ -1,6 +1,38 @@
+import threading
 from abc import ABC, abstractmethod
+from contextlib import contextmanager
 
 from app.models.transcriber_model import TranscriptResult
+from app.utils.async_utils import run_cpu
+
+_cancel_state = threading.local()
+
+
+class TranscriptionCancelled(Exception):
+    """转写被取消（例如对冲转写时另一个后端已先完成）"""
+
+
+@contextmanager
+def cancellable(event: threading.Event):
+    '''
+    在当前线程内绑定取消信号，转写器在安全点调用 check_cancelled() 响应取消
+    :param event: 取消信号
+    '''
+    previous = getattr(_cancel_state, "event", None)
+    _cancel_state.event = event
+    try:
+        yield
+    finally:
+        _cancel_state.event = previous
+
+
+def check_cancelled() -> None:
+    '''
+    若当前线程的转写已被取消则抛出 TranscriptionCancelled，未绑定取消信号时无操作
+    '''
+    event = getattr(_cancel_state, "event", None)
+    if event is not None and event.is_set():
+        raise TranscriptionCancelled("转写已取消")
 
 
 class Transcriber(ABC):
@@ -13,6 +45,13 @@ class Transcriber(ABC):
         '''
         pass
 
+    async def atranscript(self, file_path: str) -> TranscriptResult:
+        '''
+        异步转写：默认把同步实现放到 CPU 线程池执行（本地模型），远程 ASR 可覆盖为原生异步实现
+        :param file_path:音频路径
+        '''
+        return await run_cpu(self.transcript, file_path)
+
     def on_finish(self,video_path:str,result: TranscriptResult)->None:
         '''
         当音频转录完成时调用
@@ -20,4 +59,4 @@ class Transcriber(ABC):
         :param result: 识别结果
         :return:
         '''
-        pass
\ No newline at end of file
+        pass
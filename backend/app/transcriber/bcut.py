@@ -1,5 +1,7 @@
+import asyncio
 import json
 import logging
+import threading
 import time
 from typing import Optional, List, Dict, Union
 
@@ -7,7 +9,8 @@ import requests
 
 from app.decorators.timeit import timeit
 from app.models.transcriber_model import TranscriptSegment, TranscriptResult
-from app.transcriber.base import Transcriber
+from app.transcriber.base import Transcriber, cancellable, check_cancelled
+from app.utils.async_utils import run_io
 from app.utils.logger import get_logger
 from events import transcription_finished
 
@@ -185,6 +188,7 @@ class BcutTranscriber(Transcriber):
             task_resp = None
             max_retries = 500
             for i in range(max_retries):
+                check_cancelled()
                 task_resp = self._query_result()
                 
                 if task_resp["state"] == 4:  # 完成状态
@@ -243,6 +247,24 @@ class BcutTranscriber(Transcriber):
             logger.error(f"B站ASR处理失败: {str(e)}")
             raise
 
+    async def atranscript(self, file_path: str) -> TranscriptResult:
+        """
+        上传与轮询都是网络等待，放到 IO 线程池执行，不占用 CPU 线程池。
+        上传分片、etag 与任务 ID 保存在实例上，而转写器是全局单例，并发任务各自使用一个新实例；
+        协程被取消（如对冲落败）时通过取消信号让轮询在下一次检查时退出
+        """
+        cancel_event = threading.Event()
+
+        def run() -> TranscriptResult:
+            with cancellable(cancel_event):
+                return type(self)().transcript(file_path)
+
+        try:
+            return await run_io(run)
+        except asyncio.CancelledError:
+            cancel_event.set()
+            raise
+
     def on_finish(self, video_path: str, result: TranscriptResult) -> None:
         """转录完成的回调"""
         logger.info(f"B站ASR转写完成: {video_path}")
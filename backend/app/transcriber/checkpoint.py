@@ -0,0 +1,93 @@
+import hashlib
+import json
+import os
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+from app.models.transcriber_model import TranscriptSegment
+from app.utils.logger import get_logger
+from app.utils.path_helper import get_app_dir
+
+logger = get_logger(__name__)
+
+
+class TranscriptCheckpoint:
+    """
+    转写检查点：转写过程中逐段追加写入 JSONL 文件，进程中断或失败后可从最后一段继续。
+
+    文件格式：
+        {"language": "zh"}                          # 语言信息，只写一次
+        {"start": 0.0, "end": 3.2, "text": "..."}   # 每个分段一行
+    """
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self._file = None
+        self._language_written = False
+
+    @classmethod
+    def for_media(cls, file_path: str, *parts: str) -> "TranscriptCheckpoint":
+        """
+        根据媒体文件身份（绝对路径 + 大小）和额外标识（如模型大小）生成检查点，
+        同一文件用同一模型重试时会命中同一个检查点。
+        """
+        abs_path = os.path.abspath(file_path)
+        key = "|".join([abs_path, str(os.path.getsize(abs_path)), *parts])
+        digest = hashlib.sha1(key.encode("utf-8")).hexdigest()
+        return cls(Path(get_app_dir("transcript_checkpoints")) / f"{digest}.jsonl")
+
+    def load(self) -> Tuple[Optional[str], List[TranscriptSegment]]:
+        """
+        读取已持久化的语言和分段；末尾写了一半的行会被忽略
+
+        :return: (语言, 分段列表)
+        """
+        language = None
+        segments: List[TranscriptSegment] = []
+        if not self.path.exists():
+            return language, segments
+
+        with self.path.open("r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    data = json.loads(line)
+                except json.JSONDecodeError:
+                    logger.warning(f"检查点存在不完整的行，已忽略：{self.path}")
+                    continue
+                if "language" in data:
+                    language = data["language"]
+                else:
+                    segments.append(TranscriptSegment(**data))
+
+        self._language_written = language is not None
+        return language, segments
+
+    def _write(self, data: dict) -> None:
+        if self._file is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._file = self.path.open("a", encoding="utf-8")
+        self._file.write(json.dumps(data, ensure_ascii=False) + "\n")
+        self._file.flush()
+
+    def set_language(self, language: Optional[str]) -> None:
+        if language and not self._language_written:
+            self._write({"language": language})
+            self._language_written = True
+
+    def append(self, segment: TranscriptSegment) -> None:
+        self._write({"start": segment.start, "end": segment.end, "text": segment.text})
+
+    def close(self) -> None:
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def clear(self) -> None:
+        """
+        转写成功、结果已交给上层缓存后删除检查点
+        """
+        self.close()
+        try:
+            self.path.unlink()
+        except FileNotFoundError:
+            pass
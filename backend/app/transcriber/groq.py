@@ -6,6 +6,9 @@ from app.models.transcriber_model import TranscriptResult, TranscriptSegment
 from app.services.provider import ProviderService
 from app.transcriber.base import Transcriber
 from openai import OpenAI
+
+from app.gpt.provider.OpenAI_compatible_provider import client_registry
+from app.utils.async_utils import run_io, run_subprocess
 import ffmpeg
 import tempfile
 from dotenv import load_dotenv
@@ -18,6 +21,18 @@ def compress_audio(input_path: str, target_bitrate='64k') -> str:
     ffmpeg.input(input_path).output(output_path, audio_bitrate=target_bitrate).run(quiet=True, overwrite_output=True)
     return output_path
 
+
+async def acompress_audio(input_path: str, target_bitrate='64k') -> str:
+    output_fd, output_path = tempfile.mkstemp(suffix=".mp3")
+    os.close(output_fd)
+    code, _, stderr = await run_subprocess(
+        ["ffmpeg", "-i", input_path, "-b:a", target_bitrate, "-y", output_path]
+    )
+    if code != 0:
+        os.remove(output_path)
+        raise RuntimeError(f"音频压缩失败：{stderr.decode(errors='ignore')[-500:]}")
+    return output_path
+
 class GroqTranscriber(Transcriber, ABC):
 
 
@@ -47,6 +62,37 @@ class GroqTranscriber(Transcriber, ABC):
             )
             print(transcription.text)
         print(transcription)
+        return self._to_result(transcription)
+
+    async def atranscript(self, file_path: str) -> TranscriptResult:
+        """
+        原生异步实现：压缩走 asyncio 子进程，请求走当前事件循环下复用的 AsyncOpenAI 客户端
+        """
+        compressed_path = None
+        if os.path.getsize(file_path) > MAX_SIZE_BYTES:
+            compressed_path = file_path = await acompress_audio(file_path)
+        try:
+            provider = await run_io(ProviderService.get_provider_by_id, 'groq')
+            if not provider:
+                raise Exception("Groq 供应商未配置,请配置以后使用。")
+            client = client_registry.get_async(
+                api_key=provider.get('api_key'), base_url=provider.get('base_url'), provider_id='groq'
+            )
+            # 直接传文件对象，由客户端读取上传，不在这里把整个文件读进内存
+            with open(file_path, "rb") as file:
+                transcription = await client.audio.transcriptions.create(
+                    file=file,
+                    model=os.getenv('GROQ_TRANSCRIBER_MODEL'),
+                    response_format="verbose_json",
+                )
+        finally:
+            # 压缩生成的临时 mp3 用完即删
+            if compressed_path:
+                os.remove(compressed_path)
+        return self._to_result(transcription)
+
+    @staticmethod
+    def _to_result(transcription) -> TranscriptResult:
         segments = []
         full_text = ""
 
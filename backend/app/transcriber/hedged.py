@@ -0,0 +1,207 @@
+import asyncio
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Dict, List, Optional
+
+from app.decorators.timeit import timeit
+from app.models.transcriber_model import TranscriptResult
+from app.transcriber.base import Transcriber, TranscriptionCancelled, cancellable
+from app.utils.async_utils import run_cpu, run_io
+from app.utils.audio_decoder import probe_duration
+from app.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+# 统计样本不足时使用的默认对冲延迟（秒）
+HEDGE_DELAY_SECONDS = float(os.getenv("HEDGE_DELAY_SECONDS", 60))
+# 自适应延迟的上下限（秒）
+HEDGE_MIN_DELAY_SECONDS = float(os.getenv("HEDGE_MIN_DELAY_SECONDS", 10))
+HEDGE_MAX_DELAY_SECONDS = float(os.getenv("HEDGE_MAX_DELAY_SECONDS", 600))
+# 使用分位数作为延迟前至少需要的样本数
+HEDGE_MIN_SAMPLES = 5
+
+
+class LatencyTracker:
+    """
+    记录各转写后端最近的耗时，按“每秒音频耗时”（实时率）归一化，
+    不同时长的音频可以共用同一份统计。
+    """
+
+    def __init__(self, window: int = 50):
+        self.window = window
+        self._samples: Dict[str, deque] = {}
+        self._lock = threading.Lock()
+
+    def record(self, backend: str, elapsed: float, audio_duration: float) -> None:
+        with self._lock:
+            samples = self._samples.setdefault(backend, deque(maxlen=self.window))
+            samples.append(elapsed / max(audio_duration, 1.0))
+
+    def quantile(self, backend: str, q: float) -> Optional[float]:
+        """
+        返回指定后端实时率的分位数，样本不足时返回 None
+        """
+        with self._lock:
+            samples = sorted(self._samples.get(backend, ()))
+        if len(samples) < HEDGE_MIN_SAMPLES:
+            return None
+        return samples[min(int(q * len(samples)), len(samples) - 1)]
+
+    def snapshot(self) -> Dict[str, List[float]]:
+        with self._lock:
+            return {name: list(samples) for name, samples in self._samples.items()}
+
+
+latency_tracker = LatencyTracker()
+
+
+class HedgedTranscriber(Transcriber):
+    """
+    对冲转写：先启动主后端，超过延迟预算仍未完成时再启动备用后端，
+    取先成功的结果并取消另一个。
+
+    延迟预算取主后端历史实时率的 p95 乘以音频时长，样本不足时使用 HEDGE_DELAY_SECONDS。
+    取消为协作式：转写器在安全点调用 check_cancelled() 后退出。
+    """
+
+    _executor = ThreadPoolExecutor(max_workers=8, thread_name_prefix="hedged-transcriber")
+
+    def __init__(self, primary: Transcriber, secondary: Transcriber,
+                 primary_name: str = "primary", secondary_name: str = "secondary"):
+        self.primary = primary
+        self.secondary = secondary
+        self.primary_name = primary_name
+        self.secondary_name = secondary_name
+
+    def hedge_delay(self, audio_duration: float) -> float:
+        p95 = latency_tracker.quantile(self.primary_name, 0.95)
+        if p95 is None or not audio_duration:
+            return HEDGE_DELAY_SECONDS
+        return min(max(p95 * audio_duration, HEDGE_MIN_DELAY_SECONDS), HEDGE_MAX_DELAY_SECONDS)
+
+    def _submit(self, name: str, transcriber: Transcriber, file_path: str,
+                cancel_event: threading.Event, audio_duration: float) -> Future:
+        def run() -> Optional[TranscriptResult]:
+            start = time.perf_counter()
+            try:
+                with cancellable(cancel_event):
+                    result = transcriber.transcript(file_path)
+            except TranscriptionCancelled:
+                # 被对冲取消时实际耗时至少为此，记为下限样本；否则慢的运行永远不进统计，p95 会持续偏低
+                latency_tracker.record(name, time.perf_counter() - start, audio_duration)
+                raise
+            if result is not None:
+                latency_tracker.record(name, time.perf_counter() - start, audio_duration)
+            return result
+
+        logger.info(f"启动转写后端 {name}")
+        return self._executor.submit(run)
+
+    @timeit
+    def transcript(self, file_path: str) -> TranscriptResult:
+        try:
+            audio_duration = probe_duration(file_path)
+        except Exception:
+            audio_duration = 0.0
+
+        events = {self.primary_name: threading.Event(), self.secondary_name: threading.Event()}
+        futures = {
+            self._submit(self.primary_name, self.primary, file_path, events[self.primary_name], audio_duration):
+                self.primary_name
+        }
+
+        delay = self.hedge_delay(audio_duration)
+        done, _ = wait(futures, timeout=delay)
+        if not done or not self._succeeded(next(iter(done))):
+            logger.info(f"{self.primary_name} 在 {delay:.0f}s 内未完成，启动对冲后端 {self.secondary_name}")
+            futures[self._submit(self.secondary_name, self.secondary, file_path,
+                                 events[self.secondary_name], audio_duration)] = self.secondary_name
+
+        pending = set(futures)
+        errors = []
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                name = futures[future]
+                if self._succeeded(future):
+                    # 取消仍在运行的另一个后端
+                    for other in pending:
+                        events[futures[other]].set()
+                    logger.info(f"对冲转写采用 {name} 的结果")
+                    return future.result()
+                errors.append(f"{name}: {future.exception() or '无结果'}")
+
+        raise Exception(f"所有转写后端均失败：{'; '.join(errors)}")
+
+    async def _arun(self, name: str, transcriber: Transcriber, file_path: str,
+                     cancel_event: threading.Event, audio_duration: float) -> Optional[TranscriptResult]:
+        logger.info(f"启动转写后端 {name}")
+        start = time.perf_counter()
+        try:
+            if type(transcriber).atranscript is Transcriber.atranscript:
+                # 同步实现在线程中运行，取消 asyncio 任务无法打断线程，需同时绑定取消信号
+                def run() -> Optional[TranscriptResult]:
+                    with cancellable(cancel_event):
+                        return transcriber.transcript(file_path)
+                result = await run_cpu(run)
+            else:
+                result = await transcriber.atranscript(file_path)
+        except (asyncio.CancelledError, TranscriptionCancelled):
+            # 被对冲取消时实际耗时至少为此，记为下限样本；否则慢的运行永远不进统计，p95 会持续偏低
+            latency_tracker.record(name, time.perf_counter() - start, audio_duration)
+            raise
+        if result is not None:
+            latency_tracker.record(name, time.perf_counter() - start, audio_duration)
+        return result
+
+    async def atranscript(self, file_path: str) -> TranscriptResult:
+        """
+        transcript 的异步版本：等待期间不占用线程，失败方以任务取消加取消信号结束
+        """
+        try:
+            audio_duration = await run_io(probe_duration, file_path)
+        except Exception:
+            audio_duration = 0.0
+
+        events = {self.primary_name: threading.Event(), self.secondary_name: threading.Event()}
+        tasks = {
+            asyncio.ensure_future(self._arun(self.primary_name, self.primary, file_path,
+                                             events[self.primary_name], audio_duration)): self.primary_name
+        }
+
+        delay = self.hedge_delay(audio_duration)
+        done, _ = await asyncio.wait(tasks, timeout=delay)
+        if not done or not self._succeeded(next(iter(done))):
+            logger.info(f"{self.primary_name} 在 {delay:.0f}s 内未完成，启动对冲后端 {self.secondary_name}")
+            tasks[asyncio.ensure_future(self._arun(self.secondary_name, self.secondary, file_path,
+                                                   events[self.secondary_name], audio_duration))] = self.secondary_name
+
+        pending = set(tasks)
+        errors = []
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    name = tasks[task]
+                    if self._succeeded(task):
+                        logger.info(f"对冲转写采用 {name} 的结果")
+                        return task.result()
+                    errors.append(f"{name}: {task.exception() or '无结果'}")
+        finally:
+            # 成功、全部失败或自身被取消时，结束仍在运行的后端
+            for task in pending:
+                events[tasks[task]].set()
+                task.cancel()
+
+        raise Exception(f"所有转写后端均失败：{'; '.join(errors)}")
+
+    @staticmethod
+    def _succeeded(future) -> bool:
+        if future.exception() is not None:
+            if not isinstance(future.exception(), TranscriptionCancelled):
+                logger.warning(f"转写后端失败：{future.exception()}")
+            return False
+        return future.result() is not None
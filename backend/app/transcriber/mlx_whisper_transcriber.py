@@ -7,6 +7,7 @@ from huggingface_hub import snapshot_download
 from app.decorators.timeit import timeit
 from app.models.transcriber_model import TranscriptSegment, TranscriptResult
 from app.transcriber.base import Transcriber
+from app.transcriber.model_manager import is_offline
 from app.utils.logger import get_logger
 from app.utils.path_helper import get_model_dir
 from events import transcription_finished
@@ -35,6 +36,8 @@ class MLXWhisperTranscriber(Transcriber):
         self.model_path = os.path.join(model_dir, self.model_name)
         # 检查并下载模型
         if not Path(self.model_path).exists():
+            if is_offline():
+                raise RuntimeError(f"离线模式下未找到模型 {self.model_name}（{self.model_path}）")
             logger.info(f"模型 {self.model_name} 不存在，开始下载...")
             snapshot_download(
                 self.model_name,
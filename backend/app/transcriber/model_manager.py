@@ -0,0 +1,124 @@
+"""
+whisper 模型文件管理：定位、预下载与校验。
+
+命令行用法（在 backend 目录下执行）：
+    python -m app.transcriber.model_manager prefetch --model base
+    python -m app.transcriber.model_manager verify --model base --load
+"""
+import argparse
+import os
+import sys
+from pathlib import Path
+
+from dotenv import load_dotenv
+
+from app.utils.logger import get_logger
+from app.utils.path_helper import get_model_dir
+
+load_dotenv()
+logger = get_logger(__name__)
+
+MODEL_MAP = {
+    "tiny": "pengzhendong/faster-whisper-tiny",
+    'base': 'pengzhendong/faster-whisper-base',
+    'small': 'pengzhendong/faster-whisper-small',
+    'medium': 'pengzhendong/faster-whisper-medium',
+    'large-v1': 'pengzhendong/faster-whisper-large-v1',
+    'large-v2': 'pengzhendong/faster-whisper-large-v2',
+    'large-v3': 'pengzhendong/faster-whisper-large-v3',
+    'large-v3-turbo': 'pengzhendong/faster-whisper-large-v3-turbo',
+}
+
+# CTranslate2 格式 whisper 模型必须包含的文件
+REQUIRED_FILES = ["model.bin", "config.json", "tokenizer.json"]
+
+
+def is_offline() -> bool:
+    """
+    离线模式：只使用本地已有模型，绝不访问 modelscope
+    """
+    return os.getenv("MODEL_OFFLINE", "false").lower() == "true"
+
+
+def whisper_model_path(model_size: str) -> str:
+    return os.path.join(get_model_dir("whisper"), f"whisper-{model_size}")
+
+
+def missing_files(model_size: str) -> list[str]:
+    """
+    返回本地模型目录中缺失的必要文件，目录不存在时返回全部必要文件
+    """
+    model_path = Path(whisper_model_path(model_size))
+    missing = [name for name in REQUIRED_FILES if not (model_path / name).is_file()]
+    if not any(model_path.glob("vocabulary.*")):
+        missing.append("vocabulary.*")
+    return missing
+
+
+def ensure_whisper_model(model_size: str) -> str:
+    """
+    确保模型在本地可用并返回其路径；缺失时从 modelscope 下载，离线模式下直接报错
+
+    :param model_size: 模型大小，如 base / small / large-v3
+    :return: 本地模型目录
+    """
+    model_path = whisper_model_path(model_size)
+    if Path(model_path).exists() and not missing_files(model_size):
+        return model_path
+
+    if is_offline():
+        raise RuntimeError(
+            f"离线模式下未找到完整的模型 whisper-{model_size}（{model_path}），"
+            f"请先执行 python -m app.transcriber.model_manager prefetch --model {model_size}"
+        )
+    if model_size not in MODEL_MAP:
+        raise ValueError(f"不支持的模型大小：{model_size}，可选：{', '.join(MODEL_MAP)}")
+
+    # 延迟导入，离线或模型已存在时启动无需加载 modelscope
+    from modelscope import snapshot_download
+
+    logger.info(f"模型 whisper-{model_size} 不存在，开始下载...")
+    model_path = snapshot_download(MODEL_MAP[model_size], local_dir=model_path)
+    logger.info("模型下载完成")
+    return model_path
+
+
+def verify_whisper_model(model_size: str, load: bool = False) -> bool:
+    """
+    校验本地模型文件是否完整，load=True 时额外尝试加载一次模型
+    """
+    missing = missing_files(model_size)
+    if missing:
+        logger.error(f"模型 whisper-{model_size} 缺少文件：{', '.join(missing)}")
+        return False
+    if load:
+        from faster_whisper import WhisperModel
+        try:
+            WhisperModel(whisper_model_path(model_size), device="cpu", compute_type="int8")
+        except Exception as e:
+            logger.error(f"模型 whisper-{model_size} 加载失败：{e}")
+            return False
+    logger.info(f"模型 whisper-{model_size} 校验通过")
+    return True
+
+
+def main():
+    parser = argparse.ArgumentParser(description="whisper 模型预下载与校验")
+    parser.add_argument("command", choices=["prefetch", "verify"])
+    parser.add_argument("--model", nargs="+", default=[os.getenv("WHISPER_MODEL_SIZE", "base")],
+                        help="模型大小，可指定多个")
+    parser.add_argument("--load", action="store_true", help="verify 时实际加载一次模型")
+    args = parser.parse_args()
+
+    ok = True
+    for model_size in args.model:
+        if args.command == "prefetch":
+            ensure_whisper_model(model_size)
+            ok = verify_whisper_model(model_size) and ok
+        else:
+            ok = verify_whisper_model(model_size, load=args.load) and ok
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,11 @@
 import os
 import platform
+import threading
 from enum import Enum
+from typing import Optional
 
 from app.transcriber.groq import GroqTranscriber
+from app.transcriber.hedged import HedgedTranscriber
 from app.transcriber.whisper import WhisperTranscriber
 from app.transcriber.bcut import BcutTranscriber
 from app.transcriber.kuaishou import KuaishouTranscriber
@@ -16,6 +19,7 @@ class TranscriberType(str, Enum):
     BCUT = "bcut"
     KUAISHOU = "kuaishou"
     GROQ = "groq"
+    HEDGED = "hedged"
 
 # 仅在 Apple 平台启用 MLX Whisper
 MLX_WHISPER_AVAILABLE = False
@@ -36,19 +40,28 @@ _transcribers = {
     TranscriberType.BCUT: None,
     TranscriberType.KUAISHOU: None,
     TranscriberType.GROQ: None,
+    TranscriberType.HEDGED: None,
 }
 
+# 防止后台预加载与任务线程同时创建同一个转录器（模型只加载一次）
+_transcriber_lock = threading.RLock()
+
+# 后台加载状态，供 /api/sys_ready 查询
+_load_state = {"status": "idle", "transcriber": None, "error": None}
+_ready_event = threading.Event()
+
 # 公共实例初始化函数
 def _init_transcriber(key: TranscriberType, cls, *args, **kwargs):
-    if _transcribers[key] is None:
-        logger.info(f'创建 {cls.__name__} 实例: {key}')
-        try:
-            _transcribers[key] = cls(*args, **kwargs)
-            logger.info(f'{cls.__name__} 创建成功')
-        except Exception as e:
-            logger.error(f"{cls.__name__} 创建失败: {e}")
-            raise
-    return _transcribers[key]
+    with _transcriber_lock:
+        if _transcribers[key] is None:
+            logger.info(f'创建 {cls.__name__} 实例: {key}')
+            try:
+                _transcribers[key] = cls(*args, **kwargs)
+                logger.info(f'{cls.__name__} 创建成功')
+            except Exception as e:
+                logger.error(f"{cls.__name__} 创建失败: {e}")
+                raise
+        return _transcribers[key]
 
 # 各类型获取方法
 def get_groq_transcriber():
@@ -69,13 +82,27 @@ def get_mlx_whisper_transcriber(model_size="base"):
         raise ImportError("MLX Whisper 不可用")
     return _init_transcriber(TranscriberType.MLX_WHISPER, MLXWhisperTranscriber, model_size=model_size)
 
+def get_hedged_transcriber(model_size="base", device="cuda"):
+    # 主后端（通常为远程 ASR）超时未完成时，启动备用后端（通常为本地 whisper）
+    primary = os.environ.get("HEDGE_PRIMARY", TranscriberType.BCUT.value)
+    secondary = os.environ.get("HEDGE_SECONDARY", TranscriberType.FAST_WHISPER.value)
+    if TranscriberType.HEDGED.value in (primary, secondary):
+        raise ValueError("对冲转写的主/备后端不能是 hedged")
+    return _init_transcriber(
+        TranscriberType.HEDGED, HedgedTranscriber,
+        primary=get_transcriber(primary, model_size=model_size, device=device),
+        secondary=get_transcriber(secondary, model_size=model_size, device=device),
+        primary_name=primary,
+        secondary_name=secondary,
+    )
+
 # 通用入口
 def get_transcriber(transcriber_type="fast-whisper", model_size="base", device="cuda"):
     """
     获取指定类型的转录器实例
 
     参数:
-        transcriber_type: 支持 "fast-whisper", "mlx-whisper", "bcut", "kuaishou", "groq"
+        transcriber_type: 支持 "fast-whisper", "mlx-whisper", "bcut", "kuaishou", "groq", "hedged"
         model_size: 模型大小，适用于 whisper 类
         device: 设备类型（如 cuda / cpu），仅 whisper 使用
 
@@ -110,6 +137,53 @@ def get_transcriber(transcriber_type="fast-whisper", model_size="base", device="
     elif transcriber_enum == TranscriberType.GROQ:
         return get_groq_transcriber()
 
+    elif transcriber_enum == TranscriberType.HEDGED:
+        return get_hedged_transcriber(whisper_model_size, device=device)
+
     # fallback
     logger.warning(f'未识别转录器类型 "{transcriber_type}"，使用 fast-whisper 作为默认')
     return get_whisper_transcriber(whisper_model_size, device=device)
+
+
+def start_background_load(transcriber_type="fast-whisper"):
+    """
+    在后台线程中创建转录器（可能包含模型下载与加载），服务启动不再被阻塞。
+    加载期间提交的转写任务会在获取转录器时排队等待。
+
+    :param transcriber_type: 转录器类型
+    """
+    if _load_state["status"] in ("loading", "ready"):
+        return
+    _load_state.update(status="loading", transcriber=transcriber_type, error=None)
+    _ready_event.clear()
+
+    def _load():
+        try:
+            get_transcriber(transcriber_type=transcriber_type)
+            _load_state["status"] = "ready"
+            logger.info(f"转录器 {transcriber_type} 后台加载完成")
+        except Exception as e:
+            _load_state.update(status="failed", error=str(e))
+            logger.error(f"转录器 {transcriber_type} 后台加载失败: {e}")
+        finally:
+            _ready_event.set()
+
+    threading.Thread(target=_load, name="transcriber-preload", daemon=True).start()
+
+
+def wait_transcriber_ready(timeout: Optional[float] = None) -> bool:
+    """
+    等待后台加载结束；未启动后台加载时立即返回
+
+    :return: 是否已结束加载（成功或失败）
+    """
+    if _load_state["status"] == "idle":
+        return True
+    return _ready_event.wait(timeout)
+
+
+def get_transcriber_status() -> dict:
+    return {
+        "ready": _load_state["status"] == "ready",
+        **_load_state,
+    }
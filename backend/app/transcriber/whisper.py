@@ -2,7 +2,10 @@ from faster_whisper import WhisperModel
 
 from app.decorators.timeit import timeit
 from app.models.transcriber_model import TranscriptSegment, TranscriptResult
-from app.transcriber.base import Transcriber
+from app.transcriber.base import Transcriber, TranscriptionCancelled, check_cancelled
+from app.transcriber.checkpoint import TranscriptCheckpoint
+from app.transcriber.model_manager import MODEL_MAP, ensure_whisper_model
+from app.utils.audio_decoder import SAMPLE_RATE, decode_audio, iter_audio_windows, probe_duration
 from app.utils.env_checker import is_cuda_available, is_torch_installed
 from app.utils.logger import get_logger
 from app.utils.path_helper import get_model_dir
@@ -11,7 +14,6 @@ from events import transcription_finished
 from pathlib import Path
 import os
 from tqdm import tqdm
-from modelscope import snapshot_download
 
 
 '''
@@ -19,16 +21,11 @@ from modelscope import snapshot_download
 '''
 logger=get_logger(__name__)
 
-MODEL_MAP={
-    "tiny": "pengzhendong/faster-whisper-tiny",
-    'base':'pengzhendong/faster-whisper-base',
-    'small':'pengzhendong/faster-whisper-small',
-    'medium':'pengzhendong/faster-whisper-medium',
-    'large-v1':'pengzhendong/faster-whisper-large-v1',
-    'large-v2':'pengzhendong/faster-whisper-large-v2',
-    'large-v3':'pengzhendong/faster-whisper-large-v3',
-    'large-v3-turbo':'pengzhendong/faster-whisper-large-v3-turbo',
-}
+# 超过该时长（秒）的音频改用分窗口流式转写，0 表示始终整段解码
+STREAM_THRESHOLD_SECONDS = float(os.getenv("WHISPER_STREAM_THRESHOLD", 1800))
+# 分窗口转写时每个窗口的长度与边界重叠长度（秒）
+STREAM_WINDOW_SECONDS = float(os.getenv("WHISPER_STREAM_WINDOW", 600))
+STREAM_OVERLAP_SECONDS = float(os.getenv("WHISPER_STREAM_OVERLAP", 15))
 
 class WhisperTranscriber(Transcriber):
     # TODO:修改为可配置
@@ -37,7 +34,7 @@ class WhisperTranscriber(Transcriber):
             model_size: str = "base",
             device: str = 'cpu',
             compute_type: str = None,
-            cpu_threads: int = 1,
+            cpu_threads: int = 0,
     ):
         if device == 'cpu' or device is None:
             self.device = 'cpu'
@@ -47,23 +44,17 @@ class WhisperTranscriber(Transcriber):
                 print('没有 cuda 使用 cpu进行计算')
 
         self.compute_type = compute_type or ("float16" if self.device == "cuda" else "int8")
+        self.model_size = model_size
 
         model_dir = get_model_dir("whisper")
-        model_path = os.path.join(model_dir, f"whisper-{model_size}")
-        if not Path(model_path).exists():
-            logger.info(f"模型 whisper-{model_size} 不存在，开始下载...")
-            repo_id = MODEL_MAP[model_size]
-            model_path = snapshot_download(
-                repo_id,
-
-                local_dir=model_path,
-            )
-            logger.info("模型下载完成")
+        # 模型缺失时从 modelscope 下载；MODEL_OFFLINE=true 时只使用本地模型
+        model_path = ensure_whisper_model(model_size)
 
         self.model = WhisperModel(
             model_size_or_path=model_path,
             device=self.device,
             compute_type=self.compute_type,
+            cpu_threads=cpu_threads,  # 0 表示由 CTranslate2 自动决定
             download_root=model_dir
         )
     @staticmethod
@@ -92,33 +83,129 @@ class WhisperTranscriber(Transcriber):
 
     @timeit
     def transcript(self, file_path: str) -> TranscriptResult:
+        checkpoint = None
         try:
+            # 检查点按文件与模型区分，失败重试时从最后一段继续
+            checkpoint = TranscriptCheckpoint.for_media(file_path, self.model_size)
+            language, done = checkpoint.load()
+            resume_from = done[-1].end if done else 0.0
+            if done:
+                logger.info(f"检测到转写检查点，从 {resume_from:.1f}s 继续（已有 {len(done)} 段）")
+
+            duration = probe_duration(file_path)
+            if STREAM_THRESHOLD_SECONDS and duration > STREAM_THRESHOLD_SECONDS:
+                logger.info(f"音频时长 {duration:.0f}s，使用分窗口流式转写")
+                new_segments, info = self._transcribe_windowed(file_path, checkpoint, resume_from, language)
+            else:
+                new_segments, info = self._transcribe_full(file_path, checkpoint, resume_from, language)
 
-            segments_raw, info = self.model.transcribe(file_path)
-
-            segments = []
-            full_text = ""
-
-            for seg in segments_raw:
-                text = seg.text.strip()
-                full_text += text + " "
-                segments.append(TranscriptSegment(
-                    start=seg.start,
-                    end=seg.end,
-                    text=text
-                ))
+            segments = done + new_segments
+            full_text = " ".join(seg.text for seg in segments)
 
             result= TranscriptResult(
-                language=info.language,
+                language=info.language if info else language,
                 full_text=full_text.strip(),
                 segments=segments,
                 raw=info
             )
+            checkpoint.clear()
             # self.on_finish(file_path, result)
             return result
+        except TranscriptionCancelled:
+            # 已转写的分段保留在检查点中，下次可继续
+            logger.info("whisper 转写已取消")
+            raise
         except Exception as e:
             print(f"转写失败：{e}")
+        finally:
+            if checkpoint:
+                checkpoint.close()
+
+    def _transcribe_full(self, file_path: str, checkpoint: TranscriptCheckpoint,
+                         resume_from: float, language: str = None):
+        """
+        整段解码后转写；有检查点时跳过已转写的部分，只转写 resume_from 之后的音频
+
+        :return: (新增分段列表, TranscriptionInfo，无需转写时为 None)
+        """
+        # 进程内解码为 numpy 音频，原始视频/音频无需先转 mp3
+        audio = decode_audio(file_path)
+        audio = audio[int(resume_from * SAMPLE_RATE):]
+        if audio.shape[0] < SAMPLE_RATE // 2:
+            return [], None
+
+        segments_raw, info = self.model.transcribe(audio, language=language)
+        checkpoint.set_language(info.language)
+
+        segments = []
+        for seg in segments_raw:
+            check_cancelled()
+            segment = TranscriptSegment(start=seg.start + resume_from, end=seg.end + resume_from,
+                                        text=seg.text.strip())
+            checkpoint.append(segment)
+            segments.append(segment)
+        return segments, info
+
+    def _transcribe_windowed(self, file_path: str, checkpoint: TranscriptCheckpoint,
+                             resume_from: float, language: str = None):
+        """
+        按固定窗口解码并转写，内存占用与音频总时长无关。
+
+        每个窗口末尾与下一窗口有重叠：本窗口只保留起点落在正式范围内的分段，
+        下一窗口丢弃中点仍在已输出范围内的分段，从而避免边界处重复或截断。
+        从检查点恢复时，已转写完的窗口只解码不转写。
+
+        :return: (新增分段列表, 首个转写窗口的 TranscriptionInfo)
+        """
+        segments = []
+        first_info = None
+        emitted_until = resume_from
+        prompt = None
+
+        for offset, audio, is_last in iter_audio_windows(
+                file_path,
+                window_seconds=STREAM_WINDOW_SECONDS,
+                overlap_seconds=STREAM_OVERLAP_SECONDS,
+        ):
+            # 最后一个窗口之后没有窗口接手重叠区，保留到音频结尾的全部分段
+            window_end = offset + (audio.shape[0] / SAMPLE_RATE if is_last else STREAM_WINDOW_SECONDS)
+            if window_end <= resume_from:
+                continue
+            # 恢复点落在窗口中间时，从恢复点开始转写
+            skip = max(resume_from - offset, 0)
+            audio = audio[int(skip * SAMPLE_RATE):]
+            offset += skip
+            if audio.shape[0] < SAMPLE_RATE // 2:
+                continue
+
+            segments_raw, info = self.model.transcribe(
+                audio,
+                language=language,
+                initial_prompt=prompt,
+            )
+            if first_info is None:
+                first_info = info
+                language = language or info.language
+                checkpoint.set_language(language)
 
+            # 必须在拿下一个窗口前消费完生成器，audio 是复用的缓冲区
+            for seg in segments_raw:
+                check_cancelled()
+                start, end = seg.start + offset, seg.end + offset
+                if start >= window_end and not is_last:
+                    break
+                if (start + end) / 2 < emitted_until:
+                    continue
+                segment = TranscriptSegment(start=start, end=end, text=seg.text.strip())
+                checkpoint.append(segment)
+                segments.append(segment)
+                emitted_until = end
+
+            # 上一窗口结尾文本作为提示，保持跨窗口的上下文连贯
+            prompt = segments[-1].text if segments else None
+            logger.info(f"窗口 {offset:.0f}s - {window_end:.0f}s 转写完成，累计 {len(segments)} 段")
+
+        return segments, first_info
 
     def on_finish(self,video_path:str,result: TranscriptResult)->None:
         print("转写完成")
@@ -0,0 +1,116 @@
+"""
+截图与拼图的内容寻址缓存：文件名由视频标识和生成参数确定，同一视频、同一时间点或同一组拼图参数只生成一次，
+重试和重新生成直接复用已有文件，不再重复解码和写盘。
+
+- 视频标识取自平台、视频 ID（下载文件名）与文件大小，同一视频不同清晰度的文件互不混用；
+- 截图按 (视频, 时间点) 命名，直接写入静态目录，URL 对应的内容永远不变，可以长期缓存；
+- 拼图按 (视频, 截帧间隔或取帧方式, 网格尺寸及其他规划参数) 缓存到 ARTIFACT_CACHE_DIR，
+  任务目录中以硬链接引用，重新生成时按任务读取的逻辑不变。
+"""
+import hashlib
+import os
+import shutil
+import tempfile
+from dataclasses import asdict
+from pathlib import Path
+from typing import List, Optional
+
+from dotenv import load_dotenv
+
+from app.utils.logger import get_logger
+from app.utils.path_helper import get_app_dir
+from app.utils.vision_planner import VisionPlan
+
+load_dotenv()
+logger = get_logger(__name__)
+
+ARTIFACT_CACHE_DIR = os.getenv("ARTIFACT_CACHE_DIR", "")
+
+_GRID_SUFFIXES = (".jpg", ".webp")
+
+
+def artifact_cache_dir(subdir: str) -> Path:
+    if ARTIFACT_CACHE_DIR:
+        path = Path(ARTIFACT_CACHE_DIR) / subdir
+        path.mkdir(parents=True, exist_ok=True)
+        return path
+    return Path(get_app_dir(os.path.join("artifact_cache", subdir)))
+
+
+def video_cache_key(video_path: str, platform: Optional[str] = None) -> str:
+    """
+    视频标识：平台 + 视频 ID（下载器以视频 ID 命名文件）+ 文件大小
+    """
+    video_id = Path(video_path).stem
+    size = os.path.getsize(video_path)
+    return hashlib.sha1(f"{platform or ''}:{video_id}:{size}".encode("utf-8")).hexdigest()[:16]
+
+
+def screenshot_filename(video_key: str, timestamp: int) -> str:
+    return f"{video_key}_{timestamp:06d}.jpg"
+
+
+def grid_cache_key(video_key: str, plan: VisionPlan) -> str:
+    """
+    拼图缓存键：截帧方式（间隔秒数或 scene）与网格尺寸写在名称中便于排查，其余影响输出的参数取摘要
+    """
+    sampling = "scene" if plan.sampling == "scene" else f"i{plan.interval}"
+    cols, rows = plan.grid
+    params = {k: v for k, v in asdict(plan).items() if k != "tokens_per_image"}
+    digest = hashlib.sha1(repr(sorted(params.items())).encode("utf-8")).hexdigest()[:8]
+    return f"{video_key}_{sampling}_{cols}x{rows}_{digest}"
+
+
+def _grid_files(grid_dir: Path) -> List[Path]:
+    return [p for p in grid_dir.glob("grid_*") if p.suffix in _GRID_SUFFIXES]
+
+
+def _link_or_copy(src: Path, dst: Path) -> None:
+    try:
+        os.link(src, dst)
+    except OSError:
+        # 跨文件系统或不支持硬链接时复制
+        shutil.copy2(src, dst)
+
+
+def load_cached_grids(key: str) -> Optional[Path]:
+    """
+    :return: 缓存命中时返回拼图目录，否则为 None
+    """
+    cached = artifact_cache_dir("grids") / key
+    if cached.is_dir() and _grid_files(cached):
+        return cached
+    return None
+
+
+def store_grids(key: str, grid_dir: str) -> Path:
+    """
+    把生成好的拼图放入缓存：先写到临时目录再整体改名，并发任务不会看到不完整的缓存
+    """
+    root = artifact_cache_dir("grids")
+    target = root / key
+    if target.is_dir():
+        return target
+    staging = Path(tempfile.mkdtemp(prefix=f".{key}_", dir=root))
+    try:
+        for path in _grid_files(Path(grid_dir)):
+            _link_or_copy(path, staging / path.name)
+        os.rename(staging, target)
+    except OSError:
+        # 其他任务已经写入了同一份缓存
+        shutil.rmtree(staging, ignore_errors=True)
+        if not target.is_dir():
+            raise
+    return target
+
+
+def link_grids(cached: Path, grid_dir: str) -> None:
+    """
+    以硬链接把缓存的拼图放到任务目录，替换该目录中原有的拼图
+    """
+    dest = Path(grid_dir)
+    dest.mkdir(parents=True, exist_ok=True)
+    for path in _grid_files(dest):
+        path.unlink()
+    for path in _grid_files(cached):
+        _link_or_copy(path, dest / path.name)
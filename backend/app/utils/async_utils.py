@@ -0,0 +1,50 @@
+"""
+异步流水线的执行器与子进程工具。
+
+- run_io：阻塞式 I/O（yt-dlp、requests、数据库）放到默认线程池，不占用事件循环；
+- run_cpu：CPU 密集阶段（本地 whisper、拼图、截图编码）放到容量固定的专用线程池，
+  大量并发任务排队等待 CPU，而不会挤占 I/O 线程；
+- run_subprocess：以 asyncio 子进程运行 ffmpeg 等外部命令。
+"""
+import asyncio
+import functools
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, List, Optional, Tuple, TypeVar
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+T = TypeVar("T")
+
+PIPELINE_CPU_WORKERS = int(os.getenv("PIPELINE_CPU_WORKERS", os.cpu_count() or 4))
+
+cpu_executor = ThreadPoolExecutor(max_workers=PIPELINE_CPU_WORKERS, thread_name_prefix="pipeline-cpu")
+
+
+async def run_io(func: Callable[..., T], *args, **kwargs) -> T:
+    return await asyncio.to_thread(func, *args, **kwargs)
+
+
+async def run_cpu(func: Callable[..., T], *args, **kwargs) -> T:
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(cpu_executor, functools.partial(func, *args, **kwargs))
+
+
+async def run_subprocess(command: List[str], timeout: Optional[float] = None) -> Tuple[int, bytes, bytes]:
+    """
+    异步运行外部命令，返回 (退出码, stdout, stderr)；超时后终止子进程并抛出 asyncio.TimeoutError
+    """
+    proc = await asyncio.create_subprocess_exec(
+        *command,
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.PIPE,
+    )
+    try:
+        stdout, stderr = await asyncio.wait_for(proc.communicate(), timeout=timeout)
+    except (asyncio.TimeoutError, asyncio.CancelledError):
+        proc.kill()
+        await proc.wait()
+        raise
+    return proc.returncode, stdout, stderr
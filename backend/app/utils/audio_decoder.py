@@ -0,0 +1,175 @@
+import os
+from typing import Iterator, Optional, Tuple
+
+import av
+import numpy as np
+
+from app.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+# whisper 系模型统一使用 16kHz 单声道 float32 输入
+SAMPLE_RATE = 16000
+
+# 可以直接读取任意音视频容器、无需预先转 mp3 的转写器类型；mlx-whisper 内部仍调用 ffmpeg 读文件，不在此列
+IN_PROCESS_DECODE_TRANSCRIBERS = {"fast-whisper"}
+
+
+def can_decode_in_process(transcriber_type: Optional[str] = None) -> bool:
+    """
+    判断当前转写器能否直接消费原始媒体文件（进程内解码），
+    远程 ASR（bcut / kuaishou / groq）仍需要上传 mp3，mlx-whisper 仍通过 ffmpeg 子进程读取音频。
+
+    :param transcriber_type: 转写器类型，默认读取环境变量 TRANSCRIBER_TYPE
+    :return: True 表示可以跳过 mp3 转码
+    """
+    transcriber_type = transcriber_type or os.getenv("TRANSCRIBER_TYPE", "fast-whisper")
+    return transcriber_type in IN_PROCESS_DECODE_TRANSCRIBERS
+
+
+def probe_duration(file_path: str) -> float:
+    """
+    读取媒体时长（秒），不解码数据；无法获取时返回 0
+    """
+    with av.open(file_path, mode="r", metadata_errors="ignore") as container:
+        if container.duration is not None:
+            return container.duration / av.time_base
+        if container.streams.audio:
+            stream = container.streams.audio[0]
+            if stream.duration is not None and stream.time_base is not None:
+                return float(stream.duration * stream.time_base)
+    return 0.0
+
+
+def _estimate_samples(container, stream, sampling_rate: int) -> int:
+    """
+    根据容器/音轨时长预估重采样后的样本数，用于预分配缓冲区
+    """
+    duration = None
+    if stream.duration is not None and stream.time_base is not None:
+        duration = float(stream.duration * stream.time_base)
+    elif container.duration is not None:
+        duration = container.duration / av.time_base
+
+    if not duration or duration <= 0:
+        # 时长未知时先按 30 秒分配，后续按需扩容
+        return sampling_rate * 30
+    # 多留一秒余量，避免时长取整误差导致扩容
+    return int(duration * sampling_rate) + sampling_rate
+
+
+def iter_audio_chunks(container, stream, sampling_rate: int = SAMPLE_RATE) -> Iterator[np.ndarray]:
+    """
+    逐帧解码并重采样为 16kHz 单声道 float32，按块产出
+
+    :param container: 已打开的 av 容器
+    :param stream: 需要解码的音轨
+    :param sampling_rate: 目标采样率
+    :return: 每次产出一个一维 float32 数组
+    """
+    resampler = av.audio.resampler.AudioResampler(format="flt", layout="mono", rate=sampling_rate)
+    try:
+        for frame in container.decode(stream):
+            for resampled in resampler.resample(frame):
+                yield resampled.to_ndarray().reshape(-1)
+    except av.error.InvalidDataError as e:
+        # 部分文件结尾存在损坏数据包，保留已解码内容
+        logger.warning(f"音频解码遇到无效数据，已截断：{e}")
+
+    # 冲刷重采样器中残留的样本
+    for resampled in resampler.resample(None):
+        yield resampled.to_ndarray().reshape(-1)
+
+
+def decode_audio(file_path: str, sampling_rate: int = SAMPLE_RATE) -> np.ndarray:
+    """
+    使用 PyAV 在进程内解码任意音视频文件，直接得到 whisper 可用的 numpy 音频，
+    省去 ffmpeg 转 mp3 再解码的往返开销。
+
+    :param file_path: 音频或视频文件路径
+    :param sampling_rate: 目标采样率
+    :return: 一维 float32 数组，取值范围 [-1, 1]
+    """
+    if not os.path.exists(file_path):
+        raise FileNotFoundError(f"音频文件不存在: {file_path}")
+
+    with av.open(file_path, mode="r", metadata_errors="ignore") as container:
+        if not container.streams.audio:
+            raise ValueError(f"文件中没有音轨: {file_path}")
+        stream = container.streams.audio[0]
+        stream.thread_type = "AUTO"
+
+        buffer = np.empty(_estimate_samples(container, stream, sampling_rate), dtype=np.float32)
+        filled = 0
+        for chunk in iter_audio_chunks(container, stream, sampling_rate):
+            end = filled + chunk.shape[0]
+            if end > buffer.shape[0]:
+                # 预估不足时按 1.5 倍扩容，避免频繁拷贝
+                grown = np.empty(max(end, int(buffer.shape[0] * 1.5)), dtype=np.float32)
+                grown[:filled] = buffer[:filled]
+                buffer = grown
+            buffer[filled:end] = chunk
+            filled = end
+
+    logger.info(f"音频解码完成：{file_path}，时长 {filled / sampling_rate:.1f}s")
+    return buffer[:filled]
+
+
+def iter_audio_windows(
+        file_path: str,
+        window_seconds: float,
+        overlap_seconds: float = 0,
+        sampling_rate: int = SAMPLE_RATE,
+) -> Iterator[Tuple[float, np.ndarray, bool]]:
+    """
+    以固定长度的窗口流式解码音频，峰值内存只与窗口长度有关，与音频总时长无关。
+
+    每个窗口的末尾会额外包含 overlap_seconds 秒，下一个窗口从本窗口的正式结束位置开始，
+    以便调用方在边界处去重、避免截断句子。最后一个窗口的重叠区之后不再有窗口，
+    调用方应保留其中的全部内容（音频长度恰好为整数个窗口加重叠时，最后一个窗口是满的）。
+
+    注意：产出的数组是内部缓冲区的视图，调用方必须在请求下一个窗口前用完它。
+
+    :param file_path: 音频或视频文件路径
+    :param window_seconds: 每个窗口的正式长度（秒）
+    :param overlap_seconds: 窗口末尾额外重叠的长度（秒）
+    :param sampling_rate: 目标采样率
+    :return: 产出 (窗口起始秒数, float32 音频, 是否为最后一个窗口) 元组
+    """
+    if window_seconds <= 0:
+        raise ValueError("window_seconds 必须大于 0")
+    if not os.path.exists(file_path):
+        raise FileNotFoundError(f"音频文件不存在: {file_path}")
+
+    step = int(window_seconds * sampling_rate)
+    overlap = int(max(overlap_seconds, 0) * sampling_rate)
+    buffer = np.empty(step + overlap, dtype=np.float32)
+    filled = 0
+    window_start = 0
+    # 缓冲区已满但尚未产出：要等到还有后续数据才能确定它不是最后一个窗口
+    pending = False
+
+    with av.open(file_path, mode="r", metadata_errors="ignore") as container:
+        if not container.streams.audio:
+            raise ValueError(f"文件中没有音轨: {file_path}")
+        stream = container.streams.audio[0]
+        stream.thread_type = "AUTO"
+
+        for chunk in iter_audio_chunks(container, stream, sampling_rate):
+            pos = 0
+            while pos < chunk.shape[0]:
+                if pending:
+                    yield window_start / sampling_rate, buffer, False
+                    # 窗口尾部的重叠区挪到缓冲区开头，作为下一个窗口的起点
+                    buffer[:overlap] = buffer[step:step + overlap]
+                    filled = overlap
+                    window_start += step
+                    pending = False
+                n = min(buffer.shape[0] - filled, chunk.shape[0] - pos)
+                buffer[filled:filled + n] = chunk[pos:pos + n]
+                filled += n
+                pos += n
+                pending = filled == buffer.shape[0]
+
+    # 最后一个窗口：满窗口或不足长度的剩余部分
+    yield window_start / sampling_rate, buffer[:filled], True
@@ -0,0 +1,118 @@
+"""
+视频帧的进程内解码：打开一次容器，在一次读取过程中取出全部采样时间点的帧，
+代替每个时间点启动一个 ffmpeg 进程、重新打开文件并定位。
+
+只解包（demux）不解码的开销很小，因此顺序读取全部数据包，但只解码包含采样点的 GOP：
+- 从关键帧开始缓存数据包，下一个采样点之前又遇到关键帧时丢弃缓存，这段 GOP 不解码；
+- 数据包时间戳到达采样点时，解码缓存的数据包直到得到该时间点的帧；
+- 采样点之前的非参考帧（如 B 帧）不影响后续解码，直接跳过。
+"""
+import os
+from typing import Iterator, List, Optional, Tuple
+
+import av
+
+from app.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+
+def sample_timestamps(duration: float, interval: float, max_frames: Optional[int] = None) -> List[float]:
+    """
+    按固定间隔生成采样时间点（秒），从 0 开始，不超过视频时长
+    """
+    if interval <= 0:
+        raise ValueError("interval 必须大于 0")
+    count = int(duration // interval) + (1 if duration % interval else 0)
+    if max_frames:
+        count = min(count, max_frames)
+    return [i * interval for i in range(count)]
+
+
+def iter_video_frames(
+        video_path: str,
+        timestamps: List[float],
+        width: Optional[int] = None,
+        height: Optional[int] = None,
+        format: Optional[str] = None,
+) -> Iterator[Tuple[float, av.VideoFrame]]:
+    """
+    依次产出每个时间点上（或之后的第一个）视频帧
+
+    :param video_path: 视频文件路径
+    :param timestamps: 采样时间点（秒，相对视频开头）
+    :param width: 输出宽度，与 height 同时给出时在解码器内缩放，省去后续的图片缩放
+    :param height: 输出高度
+    :param format: 输出像素格式（如 rgb24、gray），为空时保持解码器原格式
+    :return: 产出 (时间点, 帧) 元组；多个时间点落在同一帧上时同一帧会产出多次
+    """
+    if not os.path.exists(video_path):
+        raise FileNotFoundError(f"视频文件不存在: {video_path}")
+    targets = sorted(timestamps)
+    if not targets:
+        return
+
+    with av.open(video_path, mode="r", metadata_errors="ignore") as container:
+        if not container.streams.video:
+            raise ValueError(f"文件中没有视频流: {video_path}")
+        stream = container.streams.video[0]
+        stream.thread_type = "AUTO"
+        codec = stream.codec_context
+        time_base = stream.time_base
+        # 部分容器（如 mpegts）的时间戳不从 0 开始
+        offset = float(stream.start_time * time_base) if stream.start_time is not None else 0.0
+
+        idx = 0
+        # 尚未解码的数据包（从最近的关键帧或上次解码的位置开始）
+        pending: List[av.Packet] = []
+        dirty = False
+
+        def emit(frames) -> Iterator[Tuple[float, av.VideoFrame]]:
+            nonlocal idx
+            for frame in frames:
+                if idx >= len(targets) or frame.time is None:
+                    continue
+                position = frame.time - offset
+                if position < targets[idx] - 1e-3:
+                    continue
+                if (width and height) or format:
+                    frame = frame.reformat(width=width, height=height, format=format)
+                while idx < len(targets) and targets[idx] <= position + 1e-3:
+                    yield targets[idx], frame
+                    idx += 1
+
+        def decode(packets: List[av.Packet]) -> Iterator[Tuple[float, av.VideoFrame]]:
+            nonlocal dirty
+            for packet in packets:
+                before_target = packet.pts is not None and packet.pts * time_base - offset < targets[idx] - 1e-3
+                codec.skip_frame = "NONREF" if before_target else "DEFAULT"
+                dirty = True
+                yield from emit(codec.decode(packet))
+                if idx >= len(targets):
+                    return
+
+        try:
+            for packet in container.demux(stream):
+                if packet.size == 0:
+                    continue
+                if packet.is_keyframe and pending:
+                    # 上一段 GOP 中没有采样点，丢弃不解码
+                    pending = []
+                    if dirty:
+                        codec.flush_buffers()
+                        dirty = False
+                pending.append(packet)
+                if packet.pts is not None and packet.pts * time_base - offset >= targets[idx] - 1e-3:
+                    packets, pending = pending, []
+                    yield from decode(packets)
+                    if idx >= len(targets):
+                        return
+        except av.error.InvalidDataError as e:
+            logger.warning(f"视频解码遇到无效数据，已截断：{e}")
+
+        # 文件末尾：解码剩余的数据包并冲刷解码器中缓存的帧
+        if pending and idx < len(targets):
+            yield from decode(pending)
+        if idx < len(targets):
+            codec.skip_frame = "DEFAULT"
+            yield from emit(codec.decode(None))
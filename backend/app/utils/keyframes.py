@@ -0,0 +1,131 @@
+"""
+视频理解的关键帧选择：代替固定间隔截帧，在画面变化处取帧并去掉重复画面。
+
+1. 每 VISION_SCENE_SAMPLE_INTERVAL 秒解码一帧 32x32 灰度缩略图（在解码器内缩放，开销很小）；
+2. 相邻缩略图的平均像素差超过 VISION_SCENE_THRESHOLD 视为镜头切换，取切换后的帧；
+   长时间没有切换时每 VISION_SCENE_MAX_GAP 秒补一帧，避免缓慢变化的画面完全缺失；
+3. 对候选帧批量计算感知哈希（DCT pHash），与已保留帧的汉明距离不超过 VISION_DEDUP_DISTANCE 的视为重复，
+   反复切回的同一画面（如讲者镜头与幻灯片交替）只保留第一次；
+4. 仍超过帧数上限时保留变化最大的帧，按时间顺序返回。
+"""
+import os
+from typing import List
+
+import numpy as np
+from dotenv import load_dotenv
+
+from app.utils.frame_decoder import iter_video_frames, sample_timestamps
+from app.utils.logger import get_logger
+
+load_dotenv()
+logger = get_logger(__name__)
+
+# 候选帧的采样间隔（秒），不小于 1 秒，帧文件按秒命名
+VISION_SCENE_SAMPLE_INTERVAL = max(1.0, float(os.getenv("VISION_SCENE_SAMPLE_INTERVAL", 1)))
+# 镜头切换阈值：相邻缩略图的平均像素差（0~1）
+VISION_SCENE_THRESHOLD = float(os.getenv("VISION_SCENE_THRESHOLD", 0.08))
+# 没有镜头切换时的最长取帧间隔（秒）
+VISION_SCENE_MAX_GAP = float(os.getenv("VISION_SCENE_MAX_GAP", 60))
+# pHash 汉明距离不超过该值视为重复画面（共 64 位）
+VISION_DEDUP_DISTANCE = int(os.getenv("VISION_DEDUP_DISTANCE", 6))
+
+_THUMB_SIZE = 32
+_HASH_SIZE = 8
+
+
+def _dct_matrix(n: int) -> np.ndarray:
+    k = np.arange(n)[:, None]
+    i = np.arange(n)[None, :]
+    matrix = np.sqrt(2 / n) * np.cos(np.pi * (2 * i + 1) * k / (2 * n))
+    matrix[0] /= np.sqrt(2)
+    return matrix.astype(np.float32)
+
+
+_DCT = _dct_matrix(_THUMB_SIZE)
+
+
+def phash(thumbs: np.ndarray) -> np.ndarray:
+    """
+    批量计算 64 位感知哈希
+
+    :param thumbs: (N, 32, 32) 灰度缩略图
+    :return: (N, 64) 布尔数组
+    """
+    low = _DCT[:_HASH_SIZE]
+    # 对每张图做二维 DCT，只保留左上角 8x8 低频系数
+    coeffs = np.einsum("ij,njk,lk->nil", low, thumbs.astype(np.float32), low).reshape(len(thumbs), -1)
+    # 中位数不含直流分量，避免整体亮度主导比较
+    medians = np.median(coeffs[:, 1:], axis=1, keepdims=True)
+    return coeffs > medians
+
+
+def scene_scores(thumbs: np.ndarray) -> np.ndarray:
+    """
+    每帧与前一帧的平均像素差（0~1），第一帧记为 1
+    """
+    if len(thumbs) == 0:
+        return np.empty(0, dtype=np.float32)
+    diffs = np.abs(np.diff(thumbs.astype(np.int16), axis=0)).mean(axis=(1, 2)) / 255
+    return np.concatenate([[1.0], diffs]).astype(np.float32)
+
+
+def dedupe_by_hash(hashes: np.ndarray, max_distance: int) -> List[int]:
+    """
+    依次保留与已保留帧的最小汉明距离大于 max_distance 的帧，返回保留的下标
+    """
+    kept: List[int] = []
+    for i in range(len(hashes)):
+        if kept and np.count_nonzero(hashes[kept] != hashes[i], axis=1).min() <= max_distance:
+            continue
+        kept.append(i)
+    return kept
+
+
+def select_keyframes(
+        video_path: str,
+        duration: float,
+        max_frames: int,
+        sample_interval: float = VISION_SCENE_SAMPLE_INTERVAL,
+        threshold: float = VISION_SCENE_THRESHOLD,
+        max_gap: float = VISION_SCENE_MAX_GAP,
+        max_distance: int = VISION_DEDUP_DISTANCE,
+) -> List[float]:
+    """
+    :param video_path: 视频文件路径
+    :param duration: 视频时长（秒）
+    :param max_frames: 最多返回的帧数
+    :return: 选中帧的时间点（秒），按时间排序
+    """
+    times: List[float] = []
+    thumbs: List[np.ndarray] = []
+    for ts, frame in iter_video_frames(
+            video_path, sample_timestamps(duration, sample_interval),
+            width=_THUMB_SIZE, height=_THUMB_SIZE, format="gray",
+    ):
+        times.append(ts)
+        thumbs.append(frame.to_ndarray())
+    if not thumbs:
+        return []
+
+    stack = np.stack(thumbs)
+    scores = scene_scores(stack)
+    selected = scores >= threshold
+    last = times[0]
+    for i, ts in enumerate(times):
+        if selected[i]:
+            last = ts
+        elif max_gap > 0 and ts - last >= max_gap:
+            selected[i] = True
+            last = ts
+
+    candidates = np.flatnonzero(selected)
+    unique = candidates[dedupe_by_hash(phash(stack[candidates]), max_distance)]
+    chosen = unique
+    if max_frames and len(chosen) > max_frames:
+        chosen = np.sort(chosen[np.argsort(-scores[chosen], kind="stable")[:max_frames]])
+
+    logger.info(
+        f"关键帧选择：候选 {len(times)} 帧，镜头切换/补帧 {len(candidates)} 帧，"
+        f"去重后 {len(unique)} 帧，最终 {len(chosen)} 帧"
+    )
+    return [times[i] for i in chosen]
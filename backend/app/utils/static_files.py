@@ -0,0 +1,24 @@
+from typing import Sequence
+
+from starlette.responses import Response
+from starlette.staticfiles import StaticFiles
+from starlette.types import Scope
+
+# 内容寻址的文件（如按视频与时间点命名的截图）URL 对应的内容永远不变，浏览器可以长期缓存且无需再验证
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+
+class CachedStaticFiles(StaticFiles):
+    """
+    对 immutable_prefixes 下的文件返回长期缓存头，其余文件保持默认的协商缓存
+    """
+
+    def __init__(self, *args, immutable_prefixes: Sequence[str] = (), **kwargs):
+        super().__init__(*args, **kwargs)
+        self.immutable_prefixes = tuple(p.strip("/") + "/" for p in immutable_prefixes if p.strip("/"))
+
+    async def get_response(self, path: str, scope: Scope) -> Response:
+        response = await super().get_response(path, scope)
+        if response.status_code in (200, 304) and path.replace("\\", "/").startswith(self.immutable_prefixes):
+            response.headers["Cache-Control"] = IMMUTABLE_CACHE_CONTROL
+        return response
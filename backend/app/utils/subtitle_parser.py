@@ -0,0 +1,105 @@
+import json
+import re
+from typing import List
+
+from app.models.transcriber_model import TranscriptSegment
+
+_TIME_RE = re.compile(r"(?:(\d+):)?(\d{1,2}):(\d{2})[.,](\d{1,3})")
+_CUE_RE = re.compile(r"^\s*(\S+)\s*-->\s*(\S+)")
+_TAG_RE = re.compile(r"<[^>]+>")
+
+
+def _parse_timestamp(value: str) -> float:
+    """
+    解析 00:01:02,345 / 01:02.345 格式的时间戳为秒
+    """
+    match = _TIME_RE.search(value)
+    if not match:
+        raise ValueError(f"无法解析时间戳: {value}")
+    hours, minutes, seconds, millis = match.groups()
+    return int(hours or 0) * 3600 + int(minutes) * 60 + int(seconds) + int(millis.ljust(3, "0")) / 1000
+
+
+def _parse_cues(text: str) -> List[TranscriptSegment]:
+    """
+    SRT 与 WebVTT 共用的解析逻辑：找到 `start --> end` 行，收集其后直到空行的文本。
+
+    YouTube 自动字幕的 VTT 是“滚动”的，每条 cue 会重复上一条的文字，这里按行去重。
+    """
+    segments: List[TranscriptSegment] = []
+    previous_lines: List[str] = []
+    lines = text.replace("\r\n", "\n").replace("\r", "\n").split("\n")
+    i = 0
+    while i < len(lines):
+        cue = _CUE_RE.match(lines[i])
+        i += 1
+        if not cue:
+            continue
+        start, end = _parse_timestamp(cue.group(1)), _parse_timestamp(cue.group(2))
+        cue_lines = []
+        while i < len(lines) and lines[i].strip():
+            line = _TAG_RE.sub("", lines[i]).strip()
+            if line:
+                cue_lines.append(line)
+            i += 1
+
+        new_lines = [line for line in cue_lines if line not in previous_lines]
+        previous_lines = cue_lines
+        content = " ".join(new_lines).strip()
+        if content:
+            segments.append(TranscriptSegment(start=start, end=end, text=content))
+    return segments
+
+
+def parse_srt(text: str) -> List[TranscriptSegment]:
+    return _parse_cues(text)
+
+
+def parse_vtt(text: str) -> List[TranscriptSegment]:
+    return _parse_cues(text)
+
+
+def parse_json3(text: str) -> List[TranscriptSegment]:
+    """
+    解析 YouTube json3 字幕：{"events": [{"tStartMs", "dDurationMs", "segs": [{"utf8"}]}]}
+    """
+    segments: List[TranscriptSegment] = []
+    for event in json.loads(text).get("events", []):
+        content = "".join(seg.get("utf8", "") for seg in event.get("segs") or []).strip()
+        if not content:
+            continue
+        start = event.get("tStartMs", 0) / 1000
+        end = start + event.get("dDurationMs", 0) / 1000
+        segments.append(TranscriptSegment(start=start, end=end, text=content.replace("\n", " ")))
+    return segments
+
+
+def parse_bilibili_json(text: str) -> List[TranscriptSegment]:
+    """
+    解析 B 站字幕 JSON：{"body": [{"from", "to", "content"}]}
+    """
+    return [
+        TranscriptSegment(start=float(item["from"]), end=float(item["to"]), text=item["content"].strip())
+        for item in json.loads(text).get("body", [])
+        if item.get("content", "").strip()
+    ]
+
+
+def parse_subtitle(text: str, ext: str) -> List[TranscriptSegment]:
+    """
+    根据字幕格式解析为 TranscriptSegment 列表
+
+    :param text: 字幕文件内容
+    :param ext: 字幕格式，如 srt / vtt / json3 / json
+    :return: 分段列表，无法识别的格式返回空列表
+    """
+    ext = (ext or "").lower()
+    if ext == "srt":
+        return parse_srt(text)
+    if ext == "vtt":
+        return parse_vtt(text)
+    if ext == "json3":
+        return parse_json3(text)
+    if ext == "json":
+        return parse_bilibili_json(text)
+    return []
@@ -11,7 +11,15 @@ BACKEND_PORT= os.getenv("BACKEND_PORT", 8483)
 
 BACKEND_BASE_URL = f"{api_path}:{BACKEND_PORT}"
 
-from typing import Optional
+from typing import Dict, List, Optional
+
+from app.utils.artifact_cache import screenshot_filename, video_cache_key
+from app.utils.frame_decoder import iter_video_frames
+from app.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+
 def generate_screenshot(video_path: str, output_dir: str, timestamp: int, index: int) -> str:
     """
     使用 ffmpeg 生成截图，返回生成图片路径
@@ -32,15 +40,72 @@ def generate_screenshot(video_path: str, output_dir: str, timestamp: int, index:
         "-y"
     ]
 
-    print("Running command:", command)
+    logger.debug(f"Running command: {command}")
     result = subprocess.run(command, capture_output=True, text=True)
 
     if result.returncode != 0:
-        print("ffmpeg failed:", result.stderr)
+        logger.error(f"ffmpeg failed: {result.stderr}")
 
     return str(output_path)
 
 
+def extract_screenshots(
+        video_path: str,
+        output_dir: str,
+        timestamps: List[int],
+        frame_files: Optional[Dict[float, str]] = None,
+        video_key: Optional[str] = None,
+) -> Dict[int, str]:
+    """
+    一次解码取出全部时间点的截图，代替每个时间点启动一个 ffmpeg 进程并从头精确定位。
+    截图按 (视频, 时间点) 命名，已存在的直接复用，重试与重新生成不会重复解码和写盘
+
+    :param timestamps: 截图时间点（秒）
+    :param frame_files: 视频理解阶段已解码保存的原始帧 {时间点: 文件路径}，命中的时间点直接复制
+    :param video_key: 视频标识，为空时由视频文件计算
+    :return: {时间点: 截图路径}，超出视频时长等未取到的时间点不在结果中
+    """
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    frame_files = frame_files or {}
+    video_key = video_key or video_cache_key(video_path)
+
+    def save(ts: int, write) -> None:
+        path = output_dir / screenshot_filename(video_key, ts)
+        # 先写临时文件再改名，并发任务读到的截图总是完整的
+        tmp = path.with_name(f".{path.stem}_{uuid.uuid4().hex}.jpg")
+        try:
+            write(tmp)
+            os.replace(tmp, path)
+        finally:
+            tmp.unlink(missing_ok=True)
+        results[ts] = str(path)
+
+    targets = sorted(set(timestamps))
+    results: Dict[int, str] = {}
+    for ts in targets:
+        path = output_dir / screenshot_filename(video_key, ts)
+        if path.exists():
+            results[ts] = str(path)
+    cached = len(results)
+
+    for ts in targets:
+        frame_file = frame_files.get(ts)
+        if ts not in results and frame_file and os.path.exists(frame_file):
+            save(ts, lambda tmp: shutil.copyfile(frame_file, tmp))
+    reused = len(results) - cached
+
+    pending = [ts for ts in targets if ts not in results]
+    if pending:
+        for ts, frame in iter_video_frames(video_path, pending):
+            image = frame.to_image()
+            save(ts, lambda tmp: image.save(tmp, format="JPEG", quality=95))
+    logger.info(
+        f"截图 {len(results)}/{len(targets)} 张：已有 {cached} 张，复用视频理解帧 {reused} 张，"
+        f"解码 {len(pending)} 张"
+    )
+    return results
+
 
 def save_cover_to_static(local_cover_path: str, subfolder: Optional[str] = "cover") -> str:
     """
@@ -1,14 +1,54 @@
 import base64
+import functools
+import io
 import os
-import re
-import subprocess
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
 import ffmpeg
+import numpy as np
+from dotenv import load_dotenv
 from PIL import Image, ImageDraw, ImageFont
 
+from app.utils.frame_decoder import iter_video_frames, sample_timestamps
+from app.utils.keyframes import select_keyframes
 from app.utils.logger import get_logger
-from app.utils.path_helper import get_app_dir
+from app.utils.workspace import TaskWorkspace
 
+load_dotenv()
 logger = get_logger(__name__)
+
+# 拼图合成与编码的线程数；Pillow 编码 JPEG / WebP 时释放 GIL，可以并行
+VISION_GRID_WORKERS = int(os.getenv("VISION_GRID_WORKERS", min(4, os.cpu_count() or 1)))
+
+_grid_executor = ThreadPoolExecutor(max_workers=max(1, VISION_GRID_WORKERS), thread_name_prefix="vision-grid")
+# 每个线程复用一块拼图缓冲区，避免每张拼图重新分配
+_buffers = threading.local()
+# FreeType 字体对象不保证线程安全，绘制时间戳时串行
+_font_lock = threading.Lock()
+
+Frame = Tuple[float, np.ndarray]
+
+
+def probe_duration(video_path: str) -> float:
+    return float(ffmpeg.probe(video_path)["format"]["duration"])
+
+
+@functools.lru_cache(maxsize=16)
+def load_font(font_path: str, size: int) -> ImageFont.ImageFont:
+    if os.path.exists(font_path):
+        return ImageFont.truetype(font_path, size)
+    return ImageFont.load_default()
+
+
+def _grid_buffer(height: int, width: int) -> np.ndarray:
+    buffer = getattr(_buffers, "grid", None)
+    if buffer is None or buffer.shape != (height, width, 3):
+        buffer = _buffers.grid = np.empty((height, width, 3), dtype=np.uint8)
+    return buffer
+
+
 class VideoReader:
     def __init__(self,
                  video_path: str,
@@ -19,124 +59,220 @@ class VideoReader:
                  save_quality=90,
                  font_path="fonts/arial.ttf",
                  frame_dir=None,
-                 grid_dir=None):
+                 grid_dir=None,
+                 image_format="jpeg",
+                 max_frames=1000,
+                 max_payload_bytes=None,
+                 sampling="interval",
+                 workspace: Optional[TaskWorkspace] = None,
+                 keep_frames=False):
+        """
+        :param frame_dir: 原始帧保存目录，为空时使用工作区下的 frames
+        :param grid_dir: 拼图保存目录，为空时使用工作区下的 grids
+        :param image_format: 拼图编码格式，jpeg 或 webp
+        :param max_frames: 最多截取的帧数
+        :param max_payload_bytes: 全部拼图 base64 后的总字节上限，超出时降低质量，仍超出则均匀抽掉部分拼图
+        :param sampling: interval 按 frame_interval 固定间隔取帧；scene 在镜头切换处取帧并去掉重复画面
+        :param workspace: 任务工作区；为空时使用独立的临时工作区，close 时删除
+        :param keep_frames: 拼图时同时把原始分辨率的帧保存到 frame_dir（记录在 frame_files 中），供截图复用
+        """
         self.video_path = video_path
         self.grid_size = grid_size
         self.frame_interval = frame_interval
         self.unit_width = unit_width
         self.unit_height = unit_height
         self.save_quality = save_quality
-        self.frame_dir = frame_dir or get_app_dir("output_frames")
-        self.grid_dir = grid_dir or get_app_dir("grid_output")
-        print(f"视频路径：{video_path}",self.frame_dir,self.grid_dir)
+        self.image_format = image_format
+        self.max_frames = max_frames
+        self.max_payload_bytes = max_payload_bytes
+        self.sampling = sampling
+        # 每个实例只读写自己的目录，并发任务不会互相清空或混入帧文件
+        self._own_workspace = workspace is None
+        self.workspace = workspace or TaskWorkspace("video")
+        self._frame_dir = frame_dir
+        self._grid_dir = grid_dir
         self.font_path = font_path
+        self.keep_frames = keep_frames
+        self.frame_files: Dict[float, str] = {}
+
+    @property
+    def frame_dir(self) -> str:
+        return self._frame_dir or self.workspace.subdir("frames")
+
+    @property
+    def grid_dir(self) -> str:
+        return self._grid_dir or self.workspace.subdir("grids")
+
+    def close(self) -> None:
+        if self._own_workspace:
+            self.workspace.cleanup()
+
+    def __enter__(self) -> "VideoReader":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.close()
 
     def format_time(self, seconds: float) -> str:
         mm = int(seconds // 60)
         ss = int(seconds % 60)
         return f"{mm:02d}_{ss:02d}"
 
-    def extract_time_from_filename(self, filename: str) -> float:
-        match = re.search(r"frame_(\d{2})_(\d{2})\.jpg", filename)
-        if match:
-            mm, ss = map(int, match.groups())
-            return mm * 60 + ss
-        return float('inf')
+    def sample_timestamps(self, max_frames=None) -> List[float]:
+        max_frames = max_frames or self.max_frames
+        duration = probe_duration(self.video_path)
+        if self.sampling == "scene":
+            return select_keyframes(self.video_path, duration, max_frames)
+        return sample_timestamps(duration, self.frame_interval, max_frames)
 
-    def extract_frames(self, max_frames=1000) -> list[str]:
+    def iter_frames(self, timestamps: List[float], saves: Optional[list] = None):
+        """
+        在解码器内直接缩放到单帧尺寸，产出 (时间点, RGB 数组)
 
-        try:
-            os.makedirs(self.frame_dir, exist_ok=True)
-            duration = float(ffmpeg.probe(self.video_path)["format"]["duration"])
-            timestamps = [i for i in range(0, int(duration), self.frame_interval)][:max_frames]
+        :param saves: keep_frames 时保存原始帧的任务追加到该列表，由调用方等待完成
+        """
+        if not self.keep_frames:
+            for ts, frame in iter_video_frames(
+                    self.video_path, timestamps, width=self.unit_width, height=self.unit_height, format="rgb24"
+            ):
+                yield ts, frame.to_ndarray()
+            return
 
+        frame_dir = self.frame_dir
+        for ts, frame in iter_video_frames(self.video_path, timestamps):
+            if ts not in self.frame_files:
+                path = os.path.join(frame_dir, f"frame_{int(ts * 1000)}.jpg")
+                self.frame_files[ts] = path
+                future = _grid_executor.submit(frame.to_image().save, path, format="JPEG", quality=95)
+                if saves is not None:
+                    saves.append((ts, future))
+            yield ts, frame.reformat(width=self.unit_width, height=self.unit_height, format="rgb24").to_ndarray()
+
+    def extract_frames(self, max_frames=None) -> list[str]:
+        """
+        一次解码取出全部采样帧（原始分辨率）并保存到 frame_dir
+        """
+        try:
+            frame_dir = self.frame_dir
+            os.makedirs(frame_dir, exist_ok=True)
             image_paths = []
-            for ts in timestamps:
-                time_label = self.format_time(ts)
-                output_path = os.path.join(self.frame_dir, f"frame_{time_label}.jpg")
-                cmd = ["ffmpeg", "-ss", str(ts), "-i", self.video_path, "-frames:v", "1", "-q:v", "2", "-y", output_path,
-                       "-hide_banner", "-loglevel", "error"]
-                subprocess.run(cmd, check=True)
+            for ts, frame in iter_video_frames(self.video_path, self.sample_timestamps(max_frames)):
+                output_path = os.path.join(frame_dir, f"frame_{self.format_time(ts)}.jpg")
+                frame.to_image().save(output_path, format="JPEG", quality=95)
                 image_paths.append(output_path)
+            logger.info(f"截取视频帧 {len(image_paths)} 张")
             return image_paths
         except Exception as e:
             logger.error(f"分割帧发生错误：{str(e)}")
             raise ValueError("视频处理失败")
 
-    def group_images(self) -> list[list[str]]:
-        image_files = [os.path.join(self.frame_dir, f) for f in os.listdir(self.frame_dir) if
-                       f.startswith("frame_") and f.endswith(".jpg")]
-        image_files.sort(key=lambda f: self.extract_time_from_filename(os.path.basename(f)))
+    def build_grid(self, frames: List[Frame]) -> Image.Image:
+        """
+        把一组帧拼成网格图并标注时间戳，帧数不足时剩余位置留白
+        """
+        cols, rows = self.grid_size
+        w, h = self.unit_width, self.unit_height
+        buffer = _grid_buffer(h * rows, w * cols)
+        if len(frames) < cols * rows:
+            buffer.fill(255)
+        for i, (_, tile) in enumerate(frames):
+            y, x = (i // cols) * h, (i % cols) * w
+            buffer[y:y + h, x:x + w] = tile
+        # RGB 数组转为图片时会复制数据，缓冲区可以立即复用
+        grid = Image.fromarray(buffer, "RGB")
+
+        # 时间戳字号随单帧高度缩放（720p 时为 48）
+        font = load_font(self.font_path, max(14, h * 48 // 720))
+        draw = ImageDraw.Draw(grid)
+        with _font_lock:
+            for i, (ts, _) in enumerate(frames):
+                draw.text(
+                    ((i % cols) * w + 10, (i // cols) * h + 10), self.format_time(ts).replace("_", ":"),
+                    fill="yellow", font=font, stroke_width=1, stroke_fill="black",
+                )
+        return grid
+
+    def encode_image(self, image: Image.Image, quality: int) -> bytes:
+        buffer = io.BytesIO()
+        if self.image_format == "webp":
+            image.save(buffer, format="WEBP", quality=quality, method=4)
+        else:
+            image.save(buffer, format="JPEG", quality=quality, optimize=True)
+        return buffer.getvalue()
+
+    def _build_and_encode(self, frames: List[Frame]) -> Tuple[Image.Image, bytes]:
+        grid = self.build_grid(frames)
+        return grid, self.encode_image(grid, self.save_quality)
+
+    def build_grids(self, timestamps: List[float]) -> Tuple[List[Image.Image], List[bytes]]:
+        """
+        边解码边拼图：每凑满一组帧就交给线程池合成并编码，解码与编码重叠进行
+        """
         group_size = self.grid_size[0] * self.grid_size[1]
-        return [image_files[i:i + group_size] for i in range(0, len(image_files), group_size)]
+        futures, group, saves = [], [], []
+        for frame in self.iter_frames(timestamps, saves):
+            group.append(frame)
+            if len(group) == group_size:
+                futures.append(_grid_executor.submit(self._build_and_encode, group))
+                group = []
+        if group:
+            futures.append(_grid_executor.submit(self._build_and_encode, group))
+        results = [future.result() for future in futures]
+        # 原始帧只用于截图复用，保存失败时截图阶段重新解码
+        for ts, future in saves:
+            try:
+                future.result()
+            except Exception as e:
+                self.frame_files.pop(ts, None)
+                logger.warning(f"保存原始帧失败 ({ts:.1f}s)：{e}")
+        return [grid for grid, _ in results], [data for _, data in results]
 
-    def concat_images(self, image_paths: list[str], name: str) -> str:
-        os.makedirs(self.grid_dir, exist_ok=True)
-        font = ImageFont.truetype(self.font_path, 48) if os.path.exists(self.font_path) else ImageFont.load_default()
-        images = []
+    def encode_grids(self, grids: list[Image.Image], encoded: list[bytes] = None) -> list[str]:
+        """
+        编码为 data URL 并写入 grid_dir，总大小控制在 max_payload_bytes 以内
 
-        for path in image_paths:
-            img = Image.open(path).convert("RGB").resize((self.unit_width, self.unit_height), Image.Resampling.LANCZOS)
-            timestamp = re.search(r"frame_(\d{2})_(\d{2})\.jpg", os.path.basename(path))
-            time_text = f"{timestamp.group(1)}:{timestamp.group(2)}" if timestamp else ""
-            draw = ImageDraw.Draw(img)
-            draw.text((10, 10), time_text, fill="yellow", font=font, stroke_width=1, stroke_fill="black")
-            images.append(img)
+        :param encoded: 以 save_quality 编码好的数据，为空时在此编码
+        """
+        quality = self.save_quality
+        while True:
+            if encoded is None:
+                encoded = list(_grid_executor.map(lambda grid: self.encode_image(grid, quality), grids))
+            total = sum(len(data) for data in encoded) * 4 // 3
+            if not self.max_payload_bytes or total <= self.max_payload_bytes or quality <= 50:
+                break
+            quality -= 10
+            encoded = None
+            logger.info(f"拼图总大小 {total / 1024 / 1024:.1f}MB 超出上限，降低质量到 {quality} 重新编码")
 
-        cols, rows = self.grid_size
-        grid_img = Image.new("RGB", (self.unit_width * cols, self.unit_height * rows), (255, 255, 255))
-
-        for i, img in enumerate(images):
-            x = (i % cols) * self.unit_width
-            y = (i // cols) * self.unit_height
-            grid_img.paste(img, (x, y))
-
-        save_path = os.path.join(self.grid_dir, f"{name}.jpg")
-        grid_img.save(save_path, quality=self.save_quality)
-        return save_path
-
-    def encode_images_to_base64(self, image_paths: list[str]) -> list[str]:
-        base64_images = []
-        for path in image_paths:
-            with open(path, "rb") as img_file:
-                encoded_string = base64.b64encode(img_file.read()).decode("utf-8")
-                base64_images.append(f"data:image/jpeg;base64,{encoded_string}")
-        return base64_images
-
-    def run(self)->list[str]:
-        logger.info("开始提取视频帧...")
+        if self.max_payload_bytes and total > self.max_payload_bytes:
+            keep = max(1, len(encoded) * self.max_payload_bytes // total)
+            step = len(encoded) / keep
+            encoded = [encoded[int(i * step)] for i in range(keep)]
+            logger.warning(f"拼图总大小仍超出上限，均匀保留 {keep}/{len(grids)} 张")
+
+        grid_dir = self.grid_dir
+        os.makedirs(grid_dir, exist_ok=True)
+        ext, mime = ("webp", "image/webp") if self.image_format == "webp" else ("jpg", "image/jpeg")
+        urls = []
+        for idx, data in enumerate(encoded, start=1):
+            with open(os.path.join(grid_dir, f"grid_{idx}.{ext}"), "wb") as f:
+                f.write(data)
+            urls.append(f"data:{mime};base64,{base64.b64encode(data).decode('utf-8')}")
+        return urls
+
+    def run(self) -> list[str]:
+        logger.info("开始提取视频帧并拼接网格图...")
         try:
-            # 确保目录存在
-            print(self.frame_dir,self.grid_dir)
-            os.makedirs(self.frame_dir, exist_ok=True)
-            os.makedirs(self.grid_dir, exist_ok=True)
-            #清空帧文件夹
-            for file in os.listdir(self.frame_dir):
-                if file.startswith("frame_"):
-                    os.remove(os.path.join(self.frame_dir, file))
-            print(self.frame_dir,self.grid_dir)
-            #清空网格文件夹
-            for file in os.listdir(self.grid_dir):
+            grid_dir = self.grid_dir
+            os.makedirs(grid_dir, exist_ok=True)
+            # 清空本任务上一次生成的拼图
+            for file in os.listdir(grid_dir):
                 if file.startswith("grid_"):
-                    os.remove(os.path.join(self.grid_dir, file))
-            print(self.frame_dir,self.grid_dir)
-            self.extract_frames()
-            print("2#3",self.frame_dir,self.grid_dir)
-            logger.info("开始拼接网格图...")
-            image_paths = []
-            groups = self.group_images()
-            for idx, group in enumerate(groups, start=1):
-                if len(group) < self.grid_size[0] * self.grid_size[1]:
-                    logger.warning(f"⚠️ 跳过第 {idx} 组，图片不足 {self.grid_size[0] * self.grid_size[1]} 张")
-                    continue
-                out_path = self.concat_images(group, f"grid_{idx}")
-                image_paths.append(out_path)
-
-            logger.info("📤 开始编码图像...")
-            urls = self.encode_images_to_base64(image_paths)
+                    os.remove(os.path.join(grid_dir, file))
+            grids, encoded = self.build_grids(self.sample_timestamps())
+            urls = self.encode_grids(grids, encoded)
+            logger.info(f"拼图 {len(urls)} 张，共 {sum(len(u) for u in urls) / 1024:.0f}KB")
             return urls
         except Exception as e:
             logger.error(f"发生错误：{str(e)}")
             raise ValueError("视频处理失败")
-
-
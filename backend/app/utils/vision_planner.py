@@ -0,0 +1,216 @@
+"""
+视频理解的图片载荷规划：根据目标模型的图片尺寸、token 与字节限制，
+决定拼图网格、单帧分辨率、编码格式与质量以及截帧间隔。
+
+各家模型都会把超出上限的图片先缩小再计费，发送 4K 拼图只会增加上传体积和延迟，
+因此规划时让拼图尺寸不超过模型实际使用的分辨率，并按总 token / 总字节预算限制图片数量。
+"""
+import math
+import os
+from dataclasses import dataclass
+from typing import Callable, List, Optional, Sequence, Tuple
+
+from dotenv import load_dotenv
+
+from app.utils.logger import get_logger
+
+load_dotenv()
+logger = get_logger(__name__)
+
+# 单次请求中所有拼图的 base64 总字节上限（MB）与图片 token 上限
+VISION_MAX_PAYLOAD_MB = float(os.getenv("VISION_MAX_PAYLOAD_MB", 6))
+VISION_MAX_IMAGE_TOKENS = int(os.getenv("VISION_MAX_IMAGE_TOKENS", 20000))
+# 单帧最小宽度（像素），再小画面中的文字难以辨认
+VISION_MIN_TILE_WIDTH = int(os.getenv("VISION_MIN_TILE_WIDTH", 384))
+# 自动截帧间隔的下限（秒）
+VISION_MIN_INTERVAL = int(os.getenv("VISION_MIN_INTERVAL", 2))
+# 图片格式：auto（模型支持时用 webp）、jpeg、webp
+VISION_IMAGE_FORMAT = os.getenv("VISION_IMAGE_FORMAT", "auto").lower()
+# 未指定截帧间隔时的取帧方式：scene（镜头切换 + 去重，见 keyframes.py）或 interval（固定间隔）
+VISION_SAMPLING = os.getenv("VISION_SAMPLING", "scene").lower()
+
+DEFAULT_GRID = (3, 3)
+# 从高到低尝试的编码质量
+QUALITY_LADDER = (85, 75, 65)
+# 画面类内容（幻灯片、屏幕录制）每像素字节数的保守估计，webp 约为 jpeg 的 70%
+_JPEG_BPP = {85: 2.0, 75: 1.5, 65: 1.2}
+_WEBP_RATIO = 0.7
+_TILE_ASPECT = 9 / 16
+
+
+def _openai_tokens(width: int, height: int) -> int:
+    # 先缩放到 2048x2048 以内，再把短边缩到 768，按 512 像素分块计费
+    scale = min(1.0, 2048 / max(width, height))
+    width, height = width * scale, height * scale
+    scale = min(1.0, 768 / min(width, height))
+    width, height = width * scale, height * scale
+    return 85 + 170 * math.ceil(width / 512) * math.ceil(height / 512)
+
+
+def _claude_tokens(width: int, height: int) -> int:
+    scale = min(1.0, 1568 / max(width, height))
+    return math.ceil(width * scale * height * scale / 750)
+
+
+def _gemini_tokens(width: int, height: int) -> int:
+    if width <= 384 and height <= 384:
+        return 258
+    return 258 * math.ceil(width / 768) * math.ceil(height / 768)
+
+
+def _qwen_tokens(width: int, height: int) -> int:
+    return min(1280, math.ceil(width / 28) * math.ceil(height / 28))
+
+
+@dataclass(frozen=True)
+class VisionLimits:
+    max_long_edge: int
+    max_short_edge: Optional[int]
+    max_pixels: Optional[int]
+    max_image_bytes: int
+    max_images: int
+    supports_webp: bool
+    tokens: Callable[[int, int], int]
+
+
+# 按模型名匹配，未匹配时使用 _DEFAULT_LIMITS
+_MODEL_LIMITS: Sequence[Tuple[Tuple[str, ...], VisionLimits]] = (
+    (("gpt-4o", "gpt-4.1", "gpt-5", "o1", "o3", "o4"),
+     VisionLimits(2048, 768, None, 20 * 1024 * 1024, 50, True, _openai_tokens)),
+    (("claude",),
+     VisionLimits(1568, None, 1_150_000, 5 * 1024 * 1024, 20, True, _claude_tokens)),
+    (("gemini",),
+     VisionLimits(3072, None, None, 7 * 1024 * 1024, 16, True, _gemini_tokens)),
+    (("qwen", "qvq"),
+     VisionLimits(4096, None, 1_003_520, 10 * 1024 * 1024, 16, True, _qwen_tokens)),
+)
+_DEFAULT_LIMITS = VisionLimits(1536, None, 1_200_000, 5 * 1024 * 1024, 10, False, _claude_tokens)
+
+
+def get_vision_limits(model_name: Optional[str]) -> VisionLimits:
+    name = (model_name or "").lower()
+    for patterns, limits in _MODEL_LIMITS:
+        if any(pattern in name for pattern in patterns):
+            return limits
+    return _DEFAULT_LIMITS
+
+
+@dataclass(frozen=True)
+class VisionPlan:
+    grid: Tuple[int, int]
+    tile_width: int
+    tile_height: int
+    interval: int
+    max_frames: int
+    image_format: str
+    quality: int
+    max_payload_bytes: int
+    tokens_per_image: int
+    sampling: str = "interval"
+
+    @property
+    def frames_per_image(self) -> int:
+        return self.grid[0] * self.grid[1]
+
+
+def _tile_width(limits: VisionLimits, cols: int, rows: int) -> int:
+    """
+    在模型尺寸限制内，cols x rows 拼图中单帧（16:9）可用的最大宽度
+    """
+    bounds = [limits.max_long_edge / cols, limits.max_long_edge / (rows * _TILE_ASPECT)]
+    if limits.max_short_edge:
+        bounds.append(limits.max_short_edge / min(cols, rows * _TILE_ASPECT))
+    if limits.max_pixels:
+        bounds.append(math.sqrt(limits.max_pixels / (cols * rows * _TILE_ASPECT)))
+    return int(min(bounds)) // 2 * 2
+
+
+def _choose_grid(limits: VisionLimits, requested: Tuple[int, int]) -> Tuple[Tuple[int, int], int]:
+    """
+    优先使用请求的网格；单帧过小时改用帧数更少的网格
+    """
+    candidates = sorted(
+        ((c, r) for c in range(1, requested[0] + 1) for r in range(1, requested[1] + 1)),
+        key=lambda grid: (-grid[0] * grid[1], abs(grid[0] - grid[1])),
+    )
+    for cols, rows in candidates:
+        width = _tile_width(limits, cols, rows)
+        if width >= VISION_MIN_TILE_WIDTH:
+            return (cols, rows), width
+    return (1, 1), _tile_width(limits, 1, 1)
+
+
+def estimate_image_bytes(width: int, height: int, image_format: str, quality: int) -> int:
+    bpp = _JPEG_BPP.get(quality, 1.5) * (_WEBP_RATIO if image_format == "webp" else 1.0)
+    # base64 编码后体积增加三分之一
+    return int(width * height * bpp / 8 * 4 / 3)
+
+
+def plan_vision(
+    duration: float,
+    model_name: Optional[str],
+    grid_size: Optional[List[int]] = None,
+    interval: int = 0,
+) -> VisionPlan:
+    """
+    :param duration: 视频时长（秒）
+    :param model_name: 目标模型名称，用于匹配图片限制
+    :param grid_size: 用户期望的网格 [列, 行]，为空时使用 3x3；单帧过小时会自动减小
+    :param interval: 用户指定的截帧间隔（秒），0 表示根据时长与预算自动计算；
+        指定间隔时按固定间隔取帧，否则按 VISION_SAMPLING 取帧，max_frames 为帧数上限
+    """
+    limits = get_vision_limits(model_name)
+    requested = tuple(grid_size[:2]) if grid_size and len(grid_size) >= 2 else DEFAULT_GRID
+    (cols, rows), tile_width = _choose_grid(limits, requested)
+    tile_height = int(tile_width * _TILE_ASPECT) // 2 * 2
+    canvas = (tile_width * cols, tile_height * rows)
+    tokens_per_image = limits.tokens(*canvas)
+
+    if VISION_IMAGE_FORMAT in ("jpeg", "webp"):
+        image_format = VISION_IMAGE_FORMAT
+    else:
+        image_format = "webp" if limits.supports_webp else "jpeg"
+
+    payload_bytes = int(VISION_MAX_PAYLOAD_MB * 1024 * 1024)
+    per_image = cols * rows
+    desired_frames = math.ceil(duration / (interval if interval > 0 else VISION_MIN_INTERVAL))
+
+    # 用户指定间隔时，从高质量开始找能放下全部帧的质量；自动模式使用中间质量，按容量推算间隔
+    ladder = QUALITY_LADDER if interval > 0 else QUALITY_LADDER[1:2]
+    for quality in ladder:
+        image_bytes = estimate_image_bytes(*canvas, image_format, quality)
+        max_images = max(1, min(
+            limits.max_images,
+            VISION_MAX_IMAGE_TOKENS // max(1, tokens_per_image),
+            payload_bytes // max(1, image_bytes),
+        ))
+        capacity = max_images * per_image
+        if capacity >= desired_frames and image_bytes <= limits.max_image_bytes:
+            break
+
+    sampling = "interval" if interval > 0 or VISION_SAMPLING != "scene" else "scene"
+    if interval <= 0 or capacity < desired_frames:
+        auto_interval = max(VISION_MIN_INTERVAL, math.ceil(duration / capacity)) if capacity else VISION_MIN_INTERVAL
+        if interval > 0:
+            logger.warning(f"截帧间隔 {interval}s 超出图片预算，调整为 {auto_interval}s")
+        interval = auto_interval
+
+    plan = VisionPlan(
+        grid=(cols, rows),
+        tile_width=tile_width,
+        tile_height=tile_height,
+        interval=interval,
+        max_frames=min(capacity, max(1, math.ceil(duration / interval))),
+        image_format=image_format,
+        quality=quality,
+        max_payload_bytes=payload_bytes,
+        tokens_per_image=tokens_per_image,
+        sampling=sampling,
+    )
+    logger.info(
+        f"视频理解载荷规划 (model={model_name})：网格 {cols}x{rows}，单帧 {tile_width}x{tile_height}，"
+        f"{'镜头切换取帧' if sampling == 'scene' else f'间隔 {plan.interval}s'}，最多 {plan.max_frames} 帧，"
+        f"{image_format} q{quality}，"
+        f"每图约 {tokens_per_image} token"
+    )
+    return plan
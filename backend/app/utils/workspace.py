@@ -0,0 +1,98 @@
+"""
+任务临时工作区：每个任务（或每个 VideoReader）使用独立的临时目录存放截帧等中间文件，
+用完即删，并发任务之间不会互相清空或混入对方的文件。
+
+- WORKSPACE_DIR 指定工作区根目录，默认系统临时目录下的 bilinote；
+- WORKSPACE_TMPFS=true 且存在 /dev/shm 时放在内存文件系统上，中间文件不落盘；
+- 进程异常退出残留的工作区在下次启动时按 WORKSPACE_STALE_HOURS 清理。
+"""
+import os
+import shutil
+import tempfile
+import time
+from typing import Optional
+
+from dotenv import load_dotenv
+
+from app.utils.logger import get_logger
+
+load_dotenv()
+logger = get_logger(__name__)
+
+WORKSPACE_DIR = os.getenv("WORKSPACE_DIR", "")
+WORKSPACE_TMPFS = os.getenv("WORKSPACE_TMPFS", "false").lower() == "true"
+# 保留工作区便于排查问题，任务结束后不删除
+WORKSPACE_KEEP = os.getenv("WORKSPACE_KEEP", "false").lower() == "true"
+WORKSPACE_STALE_HOURS = float(os.getenv("WORKSPACE_STALE_HOURS", 24))
+
+_TMPFS_DIR = "/dev/shm"
+
+
+def workspace_root() -> str:
+    if WORKSPACE_DIR:
+        root = WORKSPACE_DIR
+    elif WORKSPACE_TMPFS and os.path.isdir(_TMPFS_DIR) and os.access(_TMPFS_DIR, os.W_OK):
+        root = os.path.join(_TMPFS_DIR, "bilinote")
+    else:
+        if WORKSPACE_TMPFS:
+            logger.warning(f"{_TMPFS_DIR} 不可用，工作区改用系统临时目录")
+        root = os.path.join(tempfile.gettempdir(), "bilinote")
+    os.makedirs(root, exist_ok=True)
+    return root
+
+
+class TaskWorkspace:
+    """
+    一个任务的临时目录，第一次使用时才创建；cleanup 后再次使用会重新创建
+    """
+
+    def __init__(self, name: Optional[str] = None):
+        self.name = name or "task"
+        self._path: Optional[str] = None
+
+    @property
+    def path(self) -> str:
+        if self._path is None:
+            self._path = tempfile.mkdtemp(prefix=f"{self.name}_", dir=workspace_root())
+        return self._path
+
+    def subdir(self, name: str) -> str:
+        path = os.path.join(self.path, name)
+        os.makedirs(path, exist_ok=True)
+        return path
+
+    def cleanup(self) -> None:
+        if self._path is None:
+            return
+        if WORKSPACE_KEEP:
+            logger.info(f"保留任务工作区：{self._path}")
+        else:
+            shutil.rmtree(self._path, ignore_errors=True)
+        self._path = None
+
+    def __enter__(self) -> "TaskWorkspace":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.cleanup()
+
+
+def cleanup_stale_workspaces(max_age_hours: float = WORKSPACE_STALE_HOURS) -> int:
+    """
+    删除超过 max_age_hours 未修改的工作区（进程异常退出时的残留），返回删除的数量
+    """
+    if max_age_hours <= 0:
+        return 0
+    root = workspace_root()
+    deadline = time.time() - max_age_hours * 3600
+    removed = 0
+    for entry in os.scandir(root):
+        try:
+            if entry.is_dir(follow_symlinks=False) and entry.stat(follow_symlinks=False).st_mtime < deadline:
+                shutil.rmtree(entry.path, ignore_errors=True)
+                removed += 1
+        except OSError:
+            continue
+    if removed:
+        logger.info(f"清理残留的任务工作区 {removed} 个")
+    return removed
@@ -0,0 +1,65 @@
+"""
+音频解码内存基准：对比整段解码 (decode_audio) 与分窗口解码 (iter_audio_windows) 的峰值 RSS。
+
+用法（在 backend 目录下执行）：
+    python -m benchmarks.audio_memory --durations 600 3600 14400
+
+每次测量都在独立子进程中进行，峰值 RSS 互不干扰。
+整段解码的峰值随时长线性增长，分窗口解码的峰值应基本保持不变。
+"""
+import argparse
+import subprocess
+import sys
+
+from app.utils.audio_decoder import decode_audio, iter_audio_windows
+from benchmarks.fixtures import FIXTURE_DIR, fixture_path, peak_rss_mb
+
+
+def _child(mode: str, path: str, window: float, overlap: float) -> None:
+    baseline = peak_rss_mb()
+    samples = 0
+    if mode == "full":
+        samples = decode_audio(path).shape[0]
+    else:
+        for _, audio, _ in iter_audio_windows(path, window_seconds=window, overlap_seconds=overlap):
+            samples += audio.shape[0]
+    print(f"{baseline:.1f} {peak_rss_mb():.1f} {samples}")
+
+
+def measure(mode: str, path: str, window: float, overlap: float) -> tuple[float, float]:
+    """
+    在子进程中执行一次解码，返回 (导入后基线 RSS, 峰值 RSS)，单位 MB
+    """
+    output = subprocess.run(
+        [sys.executable, "-m", "benchmarks.audio_memory", "--child", mode, path,
+         "--window", str(window), "--overlap", str(overlap)],
+        check=True, capture_output=True, text=True,
+    ).stdout.strip().splitlines()[-1]
+    baseline, peak, _ = output.split()
+    return float(baseline), float(peak)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="音频解码峰值内存基准")
+    parser.add_argument("--durations", type=int, nargs="+", default=[600, 3600, 14400],
+                        help="合成音频时长（秒）")
+    parser.add_argument("--window", type=float, default=600, help="分窗口长度（秒）")
+    parser.add_argument("--overlap", type=float, default=15, help="窗口重叠长度（秒）")
+    parser.add_argument("--fixture-dir", default=FIXTURE_DIR)
+    parser.add_argument("--child", nargs=2, metavar=("MODE", "PATH"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        _child(args.child[0], args.child[1], args.window, args.overlap)
+        return
+
+    print(f"{'时长(s)':>8} {'整段峰值(MB)':>14} {'分窗口峰值(MB)':>16}")
+    for duration in args.durations:
+        path = fixture_path(duration, args.fixture_dir)
+        _, full_peak = measure("full", path, args.window, args.overlap)
+        _, windowed_peak = measure("windowed", path, args.window, args.overlap)
+        print(f"{duration:>8} {full_peak:>14.1f} {windowed_peak:>16.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""
+基准测试共用的工具：合成音视频夹具、峰值内存读取。
+"""
+import os
+import sys
+import tempfile
+
+import av
+import numpy as np
+
+from app.utils.audio_decoder import SAMPLE_RATE
+
+FIXTURE_DIR = os.path.join(tempfile.gettempdir(), "bilinote_bench")
+
+
+def generate_fixture(path: str, duration: int, sampling_rate: int = SAMPLE_RATE) -> str:
+    """
+    生成指定时长的合成音频（正弦波 + 噪声，AAC 编码的 m4a），已存在时直接复用
+    """
+    if os.path.exists(path):
+        return path
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    rng = np.random.default_rng(0)
+    with av.open(path, mode="w") as container:
+        stream = container.add_stream("aac", rate=sampling_rate, layout="mono")
+        t = np.arange(sampling_rate, dtype=np.float32) / sampling_rate
+        tone = 0.3 * np.sin(2 * np.pi * 440 * t)
+        for second in range(duration):
+            samples = tone + 0.05 * rng.standard_normal(sampling_rate).astype(np.float32)
+            frame = av.AudioFrame.from_ndarray(samples.reshape(1, -1), format="flt", layout="mono")
+            frame.sample_rate = sampling_rate
+            frame.pts = second * sampling_rate
+            for packet in stream.encode(frame):
+                container.mux(packet)
+        for packet in stream.encode(None):
+            container.mux(packet)
+    return path
+
+
+def fixture_path(duration: int, fixture_dir: str = FIXTURE_DIR) -> str:
+    return generate_fixture(os.path.join(fixture_dir, f"tone_{duration}s.m4a"), duration)
+
+
+def generate_video_fixture(path: str, duration: int, fps: int = 25, size: tuple = (1280, 720),
+                           gop_seconds: int = 10) -> str:
+    """
+    生成指定时长的合成视频（mpeg4 编码的 mp4），画面每 5 秒切换一次底色并带有移动的色块，
+    关键帧间隔 gop_seconds 秒，接近平台视频的 GOP 结构；已存在时直接复用
+    """
+    if os.path.exists(path):
+        return path
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    width, height = size
+    rng = np.random.default_rng(0)
+    palette = rng.integers(0, 256, size=(duration // 5 + 1, 3), dtype=np.uint8)
+    with av.open(path, mode="w") as container:
+        stream = container.add_stream("mpeg4", rate=fps)
+        stream.width, stream.height = width, height
+        stream.pix_fmt = "yuv420p"
+        stream.codec_context.gop_size = fps * gop_seconds
+        stream.bit_rate = 2_000_000
+        image = np.empty((height, width, 3), dtype=np.uint8)
+        for index in range(duration * fps):
+            second = index // fps
+            image[:] = palette[second // 5]
+            x = (index * 8) % (width - 160)
+            image[height // 3:height // 3 + 160, x:x + 160] = 255 - palette[second // 5]
+            frame = av.VideoFrame.from_ndarray(image, format="rgb24")
+            for packet in stream.encode(frame):
+                container.mux(packet)
+        for packet in stream.encode(None):
+            container.mux(packet)
+    return path
+
+
+def video_fixture_path(duration: int, fixture_dir: str = FIXTURE_DIR) -> str:
+    return generate_video_fixture(os.path.join(fixture_dir, f"video_{duration}s.mp4"), duration)
+
+
+def peak_rss_mb() -> float:
+    """
+    当前进程的峰值 RSS（MB），仅支持类 Unix 系统
+    """
+    import resource
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # macOS 返回字节，Linux 返回 KB
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
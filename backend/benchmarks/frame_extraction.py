@@ -0,0 +1,82 @@
+"""
+视频截帧基准：对比每个时间点启动一个 ffmpeg 进程（旧实现）与一次解码取出全部采样帧
+（VideoReader.extract_frames）的耗时。
+
+用法（在 backend 目录下执行）：
+    python -m benchmarks.frame_extraction --durations 60 600 --intervals 2 10
+
+    # 使用真实视频
+    python -m benchmarks.frame_extraction --video ./samples/lecture.mp4 --intervals 2
+
+两种方式都把帧以 JPEG 写入临时目录，写盘开销相同，差异来自进程启动与重复打开、定位文件。
+"""
+import argparse
+import os
+import shutil
+import subprocess
+import tempfile
+import time
+from pathlib import Path
+
+from app.utils.frame_decoder import sample_timestamps
+from app.utils.video_reader import VideoReader, probe_duration
+from benchmarks.fixtures import FIXTURE_DIR, video_fixture_path
+
+
+def extract_per_timestamp(video_path: str, timestamps: list, frame_dir: str) -> int:
+    """
+    旧实现：每个时间点一个 ffmpeg 进程
+    """
+    for ts in timestamps:
+        output_path = os.path.join(frame_dir, f"frame_{int(ts) // 60:02d}_{int(ts) % 60:02d}.jpg")
+        subprocess.run(
+            ["ffmpeg", "-ss", str(ts), "-i", video_path, "-frames:v", "1", "-q:v", "2", "-y", output_path,
+             "-hide_banner", "-loglevel", "error"],
+            check=True,
+        )
+    return len(timestamps)
+
+
+def extract_single_pass(video_path: str, interval: int, max_frames: int, frame_dir: str) -> int:
+    reader = VideoReader(video_path, frame_interval=interval, max_frames=max_frames, frame_dir=frame_dir)
+    return len(reader.extract_frames())
+
+
+def measure(func, *args) -> tuple[float, int]:
+    frame_dir = tempfile.mkdtemp(prefix="bilinote_frames_")
+    try:
+        start = time.perf_counter()
+        count = func(*args, frame_dir)
+        return time.perf_counter() - start, count
+    finally:
+        shutil.rmtree(frame_dir, ignore_errors=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="视频截帧基准")
+    parser.add_argument("--durations", type=int, nargs="+", default=[60, 600], help="合成视频时长（秒）")
+    parser.add_argument("--video", nargs="*", default=[], help="额外的真实视频路径")
+    parser.add_argument("--intervals", type=int, nargs="+", default=[2, 10], help="截帧间隔（秒）")
+    parser.add_argument("--max-frames", type=int, default=1000)
+    parser.add_argument("--skip-legacy", action="store_true", help="只测单次解码（长视频上旧实现很慢）")
+    parser.add_argument("--fixture-dir", default=FIXTURE_DIR)
+    args = parser.parse_args()
+
+    videos = [video_fixture_path(d, args.fixture_dir) for d in args.durations] + args.video
+
+    print(f"{'视频':<24} {'间隔':>4} {'帧数':>6} {'逐帧进程(s)':>12} {'单次解码(s)':>12} {'加速':>7}")
+    for path in videos:
+        duration = probe_duration(path)
+        for interval in args.intervals:
+            timestamps = sample_timestamps(duration, interval, args.max_frames)
+            single, count = measure(extract_single_pass, path, interval, args.max_frames)
+            if args.skip_legacy:
+                print(f"{Path(path).name:<24} {interval:>4} {count:>6} {'-':>12} {single:>12.2f} {'-':>7}")
+                continue
+            legacy, _ = measure(extract_per_timestamp, path, timestamps)
+            print(f"{Path(path).name:<24} {interval:>4} {count:>6} {legacy:>12.2f} {single:>12.2f} "
+                  f"{legacy / max(single, 1e-6):>6.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""
+笔记截图基准：对比每个 Screenshot 标记启动一个 ffmpeg 进程（旧实现）与一次解码取出全部截图
+（extract_screenshots），以及复用视频理解阶段已保存原始帧时的耗时。
+
+用法（在 backend 目录下执行）：
+    python -m benchmarks.screenshots --durations 120 600 --counts 10 30
+
+    # 使用真实视频
+    python -m benchmarks.screenshots --video ./samples/lecture.mp4 --counts 20
+"""
+import argparse
+import shutil
+import tempfile
+import time
+from pathlib import Path
+
+from app.utils.video_helper import extract_screenshots, generate_screenshot
+from app.utils.video_reader import VideoReader, probe_duration
+from benchmarks.fixtures import FIXTURE_DIR, video_fixture_path
+
+
+def marker_timestamps(duration: float, count: int) -> list:
+    """
+    在视频中均匀分布 count 个整秒时间点，模拟笔记中的 Screenshot 标记
+    """
+    step = duration / (count + 1)
+    return [int(step * (i + 1)) for i in range(count)]
+
+
+def screenshots_per_marker(video_path: str, timestamps: list, output_dir: str) -> int:
+    for idx, ts in enumerate(timestamps):
+        generate_screenshot(video_path, output_dir, ts, idx)
+    return len(timestamps)
+
+
+def measure(func, *args) -> float:
+    output_dir = tempfile.mkdtemp(prefix="bilinote_screenshots_")
+    try:
+        start = time.perf_counter()
+        func(*args, output_dir)
+        return time.perf_counter() - start
+    finally:
+        shutil.rmtree(output_dir, ignore_errors=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="笔记截图基准")
+    parser.add_argument("--durations", type=int, nargs="+", default=[120, 600], help="合成视频时长（秒）")
+    parser.add_argument("--video", nargs="*", default=[], help="额外的真实视频路径")
+    parser.add_argument("--counts", type=int, nargs="+", default=[10, 30], help="截图数量")
+    parser.add_argument("--fixture-dir", default=FIXTURE_DIR)
+    args = parser.parse_args()
+
+    videos = [video_fixture_path(d, args.fixture_dir) for d in args.durations] + args.video
+
+    print(f"{'视频':<24} {'截图数':>6} {'逐个进程(s)':>12} {'单次解码(s)':>12} {'复用帧(s)':>10} {'加速':>7}")
+    for path in videos:
+        duration = probe_duration(path)
+        # 视频理解按 1 秒间隔取帧时，整秒标记都能复用已保存的原始帧
+        with VideoReader(path, frame_interval=1, keep_frames=True) as reader:
+            reader.build_grids(reader.sample_timestamps())
+            for count in args.counts:
+                timestamps = marker_timestamps(duration, count)
+                legacy = measure(lambda out: screenshots_per_marker(path, timestamps, out))
+                single = measure(lambda out: extract_screenshots(path, out, timestamps))
+                reused = measure(lambda out: extract_screenshots(path, out, timestamps, reader.frame_files))
+                print(f"{Path(path).name:<24} {count:>6} {legacy:>12.2f} {single:>12.2f} {reused:>10.2f} "
+                      f"{legacy / max(single, 1e-6):>6.1f}x")
+
+
+if __name__ == "__main__":
+    main()
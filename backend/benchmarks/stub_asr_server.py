@@ -0,0 +1,109 @@
+"""
+本地 ASR 桩服务：模拟必剪（Bcut）与 Groq 的 HTTP 接口，用于在不访问外网的情况下测量远程转写后端的客户端开销。
+
+服务端处理时间由 latency 参数模拟：Bcut 在任务创建 latency 秒后返回完成状态，
+Groq 在收到请求后等待 latency 秒再响应。
+"""
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+
+def _fake_segments(count: int = 20, seconds: float = 3.0) -> list[dict]:
+    return [{"start": i * seconds, "end": (i + 1) * seconds, "text": f"stub segment {i}"} for i in range(count)]
+
+
+class _Handler(BaseHTTPRequestHandler):
+    server_version = "BiliNoteStubASR/1.0"
+
+    def log_message(self, format, *args):
+        pass
+
+    def _json(self, payload: dict, status: int = 200, headers: dict = None):
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _read_body(self) -> bytes:
+        length = int(self.headers.get("Content-Length", 0))
+        return self.rfile.read(length) if length else b""
+
+    def do_POST(self):
+        path = urlparse(self.path).path
+        self._read_body()
+        base = f"http://{self.server.server_address[0]}:{self.server.server_address[1]}"
+
+        if path.endswith("/resource/create"):
+            self._json({"code": 0, "data": {
+                "in_boss_key": "stub", "resource_id": "stub", "upload_id": "stub",
+                "upload_urls": [f"{base}/bcut/upload/0"], "per_size": 1 << 30, "size": 0,
+            }})
+        elif path.endswith("/resource/create/complete"):
+            self._json({"code": 0, "data": {"download_url": f"{base}/bcut/resource"}})
+        elif path.endswith("/task"):
+            task_id = str(len(self.server.tasks))
+            self.server.tasks[task_id] = time.monotonic()
+            self._json({"code": 0, "data": {"task_id": task_id}})
+        elif path.endswith("/audio/transcriptions"):
+            time.sleep(self.server.latency)
+            segments = [dict(seg, id=i) for i, seg in enumerate(_fake_segments())]
+            self._json({"text": " ".join(s["text"] for s in segments), "language": "zh",
+                        "duration": segments[-1]["end"], "segments": segments})
+        else:
+            self._json({"code": 404, "message": "not found"}, status=404)
+
+    def do_PUT(self):
+        self._read_body()
+        self.send_response(200)
+        self.send_header("Etag", '"stub-etag"')
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def do_GET(self):
+        parsed = urlparse(self.path)
+        if parsed.path.endswith("/task/result"):
+            task_id = parse_qs(parsed.query).get("task_id", [""])[0]
+            created = self.server.tasks.get(task_id, time.monotonic())
+            if time.monotonic() - created < self.server.latency:
+                self._json({"code": 0, "data": {"state": 1}})
+                return
+            utterances = [{"transcript": s["text"], "start_time": s["start"] * 1000, "end_time": s["end"] * 1000}
+                          for s in _fake_segments()]
+            self._json({"code": 0, "data": {"state": 4, "result": json.dumps({"utterances": utterances})}})
+        else:
+            self._json({"code": 404, "message": "not found"}, status=404)
+
+
+class StubASRServer:
+    """
+    在后台线程中运行的桩服务，用法：
+
+        with StubASRServer(latency=2) as server:
+            print(server.url)
+    """
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, latency: float = 0.0):
+        self.httpd = ThreadingHTTPServer((host, port), _Handler)
+        self.httpd.latency = latency
+        self.httpd.tasks = {}
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+
+    @property
+    def url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def __enter__(self) -> "StubASRServer":
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.httpd.shutdown()
+        self.httpd.server_close()
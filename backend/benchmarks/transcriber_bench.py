@@ -0,0 +1,203 @@
+"""
+转写后端基准：在不同时长的音频上比较各转写后端/参数组合的
+实时率（RTF = 耗时 / 音频时长）、峰值 RSS、模型加载耗时与首段延迟。
+
+用法（在 backend 目录下执行）：
+    # 比较 whisper 模型大小、计算类型、线程数，以及桩服务上的 bcut / groq
+    python -m benchmarks.transcriber_bench --durations 30 300 \\
+        --whisper-models tiny base --compute-types int8 float32 --threads 0 4 --remote bcut groq
+
+    # 使用真实音频夹具
+    python -m benchmarks.transcriber_bench --audio ./samples/talk.mp3 --whisper-models base
+
+    # 把本次结果保存为基线；之后不加该参数运行时会与基线对比，RTF 退化超过阈值则以非零状态退出
+    python -m benchmarks.transcriber_bench --save-baseline
+
+远程后端（bcut / groq）只访问本地桩服务（benchmarks/stub_asr_server.py），
+测得的是客户端上传、轮询与解析的开销加上模拟的服务端延迟。
+每个组合都在独立子进程中运行，峰值 RSS 与模型加载互不影响。
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+from benchmarks.fixtures import FIXTURE_DIR, fixture_path, peak_rss_mb
+from benchmarks.stub_asr_server import StubASRServer
+
+BASELINE_FILE = Path(__file__).parent / "baselines" / "transcriber.json"
+
+
+def _run_whisper(config: dict, path: str) -> dict:
+    from app.transcriber.whisper import WhisperTranscriber
+    from app.utils.audio_decoder import decode_audio
+
+    start = time.perf_counter()
+    transcriber = WhisperTranscriber(
+        model_size=config["model"],
+        device="cpu",
+        compute_type=config["compute_type"],
+        cpu_threads=config["threads"],
+    )
+    load_time = time.perf_counter() - start
+
+    # 与 WhisperTranscriber 整段转写路径相同，但单独记录首段产出时间
+    start = time.perf_counter()
+    segments, _ = transcriber.model.transcribe(decode_audio(path))
+    first_segment = None
+    count = 0
+    for _ in segments:
+        if first_segment is None:
+            first_segment = time.perf_counter() - start
+        count += 1
+    return {
+        "load_time": load_time,
+        "elapsed": time.perf_counter() - start,
+        "first_segment": first_segment,
+        "segments": count,
+    }
+
+
+def _run_remote(config: dict, path: str) -> dict:
+    stub_url = config["stub_url"]
+    if config["backend"] == "bcut":
+        from app.transcriber import bcut
+        base = f"{stub_url}/x/bcut/rubick-interface"
+        bcut.API_REQ_UPLOAD = base + "/resource/create"
+        bcut.API_COMMIT_UPLOAD = base + "/resource/create/complete"
+        bcut.API_CREATE_TASK = base + "/task"
+        bcut.API_QUERY_RESULT = base + "/task/result"
+        start = time.perf_counter()
+        transcriber = bcut.BcutTranscriber()
+    else:
+        from app.transcriber import groq
+        os.environ.setdefault("GROQ_TRANSCRIBER_MODEL", "whisper-large-v3-turbo")
+        groq.ProviderService.get_provider_by_id = staticmethod(
+            lambda _id: {"api_key": "stub", "base_url": f"{stub_url}/openai/v1"}
+        )
+        start = time.perf_counter()
+        transcriber = groq.GroqTranscriber()
+    load_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    result = transcriber.transcript(path)
+    elapsed = time.perf_counter() - start
+    # 远程接口一次性返回全部分段，首段延迟等于总耗时
+    return {"load_time": load_time, "elapsed": elapsed, "first_segment": elapsed, "segments": len(result.segments)}
+
+
+def _child(config: dict, path: str) -> None:
+    runner = _run_whisper if config["backend"] == "fast-whisper" else _run_remote
+    metrics = runner(config, path)
+    metrics["peak_rss_mb"] = peak_rss_mb()
+    print("BENCH_RESULT " + json.dumps(metrics))
+
+
+def run_case(config: dict, path: str) -> dict:
+    env = dict(os.environ, NO_PROXY="127.0.0.1,localhost", no_proxy="127.0.0.1,localhost")
+    proc = subprocess.run(
+        [sys.executable, "-m", "benchmarks.transcriber_bench", "--child", json.dumps(config), path],
+        capture_output=True, text=True, env=env,
+    )
+    for line in proc.stdout.splitlines():
+        if line.startswith("BENCH_RESULT "):
+            return json.loads(line[len("BENCH_RESULT "):])
+    raise RuntimeError(f"{config['name']} 运行失败：{proc.stderr.strip()[-2000:]}")
+
+
+def build_configs(args, stub_url: str) -> list[dict]:
+    configs = []
+    for model in args.whisper_models:
+        for compute_type in args.compute_types:
+            for threads in args.threads:
+                configs.append({
+                    "name": f"fast-whisper/{model}/{compute_type}/t{threads}",
+                    "backend": "fast-whisper", "model": model,
+                    "compute_type": compute_type, "threads": threads,
+                })
+    for backend in args.remote:
+        configs.append({"name": f"{backend}/stub", "backend": backend, "stub_url": stub_url})
+    return configs
+
+
+def compare(results: dict, baseline: dict, tolerance: float) -> list[str]:
+    """
+    与基线对比 RTF，返回退化项描述列表
+    """
+    regressions = []
+    for key, metrics in results.items():
+        base = baseline.get(key)
+        if not base:
+            continue
+        if metrics["rtf"] > base["rtf"] * (1 + tolerance):
+            regressions.append(f"{key}: RTF {base['rtf']:.3f} -> {metrics['rtf']:.3f}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="转写后端基准")
+    parser.add_argument("--durations", type=int, nargs="+", default=[30, 300], help="合成音频时长（秒）")
+    parser.add_argument("--audio", nargs="*", default=[], help="额外的真实音频夹具路径")
+    parser.add_argument("--whisper-models", nargs="*", default=["tiny", "base"])
+    parser.add_argument("--compute-types", nargs="*", default=["int8"])
+    parser.add_argument("--threads", type=int, nargs="*", default=[0])
+    parser.add_argument("--remote", nargs="*", default=["bcut", "groq"], choices=["bcut", "groq"])
+    parser.add_argument("--stub-latency", type=float, default=2.0, help="桩服务模拟的服务端处理时间（秒）")
+    parser.add_argument("--fixture-dir", default=FIXTURE_DIR)
+    parser.add_argument("--baseline", default=str(BASELINE_FILE))
+    parser.add_argument("--save-baseline", action="store_true", help="将本次结果写入基线文件")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="RTF 允许的退化比例")
+    parser.add_argument("--child", nargs=2, metavar=("CONFIG", "PATH"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        _child(json.loads(args.child[0]), args.child[1])
+        return
+
+    from app.utils.audio_decoder import probe_duration
+
+    fixtures = [(fixture_path(d, args.fixture_dir), float(d)) for d in args.durations]
+    fixtures += [(path, probe_duration(path)) for path in args.audio]
+
+    results = {}
+    with StubASRServer(latency=args.stub_latency) as stub:
+        configs = build_configs(args, stub.url)
+        print(f"{'配置':<36} {'音频':<22} {'RTF':>7} {'加载(s)':>8} {'首段(s)':>8} {'峰值(MB)':>9}")
+        for path, duration in fixtures:
+            for config in configs:
+                key = f"{config['name']}@{Path(path).name}"
+                try:
+                    metrics = run_case(config, path)
+                except RuntimeError as e:
+                    print(f"{config['name']:<36} {Path(path).name:<22} 失败：{e}")
+                    continue
+                metrics["rtf"] = metrics["elapsed"] / max(duration, 1e-6)
+                metrics["audio_duration"] = duration
+                results[key] = metrics
+                first = metrics["first_segment"]
+                print(f"{config['name']:<36} {Path(path).name:<22} {metrics['rtf']:>7.3f} "
+                      f"{metrics['load_time']:>8.2f} {(first if first is not None else float('nan')):>8.2f} "
+                      f"{metrics['peak_rss_mb']:>9.1f}")
+
+    baseline_path = Path(args.baseline)
+    if args.save_baseline:
+        baseline_path.parent.mkdir(parents=True, exist_ok=True)
+        baseline_path.write_text(json.dumps(results, ensure_ascii=False, indent=2), encoding="utf-8")
+        print(f"基线已保存：{baseline_path}")
+        return
+
+    if baseline_path.exists():
+        regressions = compare(results, json.loads(baseline_path.read_text(encoding="utf-8")), args.tolerance)
+        if regressions:
+            print("检测到性能退化：")
+            for item in regressions:
+                print(f"  {item}")
+            sys.exit(1)
+        print("与基线相比无明显退化")
+
+
+if __name__ == "__main__":
+    main()
@@ -9,12 +9,16 @@ from dotenv import load_dotenv
 
 from app.db.init_db import init_db
 from app.db.provider_dao import seed_default_providers
+from app.gpt.provider.OpenAI_compatible_provider import client_registry
+from app.services.model import ModelService
 from app.exceptions.exception_handlers import register_exception_handlers
 # from app.db.model_dao import init_model_table
 # from app.db.provider_dao import init_provider_table
 from app.utils.logger import get_logger
+from app.utils.static_files import CachedStaticFiles
+from app.utils.workspace import cleanup_stale_workspaces
 from app import create_app
-from app.transcriber.transcriber_provider import get_transcriber
+from app.transcriber.transcriber_provider import start_background_load
 from events import register_handler
 from ffmpeg_helper import ensure_ffmpeg_or_raise
 
@@ -38,9 +42,17 @@ for directory in [data_dir, static_dir, uploads_dir, out_dir]:
 async def lifespan(app: FastAPI):
     register_handler()
     init_db()
-    get_transcriber(transcriber_type=os.getenv("TRANSCRIBER_TYPE", "fast-whisper"))
+    # 模型在后台加载，服务立即可用；TRANSCRIBER_PRELOAD=false 时推迟到第一个转写任务
+    if os.getenv("TRANSCRIBER_PRELOAD", "true").lower() == "true":
+        start_background_load(transcriber_type=os.getenv("TRANSCRIBER_TYPE", "fast-whisper"))
     seed_default_providers()
+    # 上次进程异常退出时残留的任务工作区
+    cleanup_stale_workspaces()
+    # 后台并发预热各供应商的模型列表，不阻塞启动
+    if os.getenv("MODEL_LIST_PREFETCH", "true").lower() == "true":
+        ModelService.prefetch_model_lists(timeout=0)
     yield
+    await client_registry.aclose()
 
 app = create_app(lifespan=lifespan)
 origins = [
@@ -57,7 +69,16 @@ app.add_middleware(
     allow_headers=["*"],
 )
 register_exception_handlers(app)
-app.mount(static_path, StaticFiles(directory=static_dir), name="static")
+# 截图按视频与时间点命名，内容不变，返回长期缓存头
+screenshot_prefix = os.path.relpath(out_dir, static_dir).replace("\\", "/")
+app.mount(
+    static_path,
+    CachedStaticFiles(
+        directory=static_dir,
+        immutable_prefixes=[] if screenshot_prefix.startswith("..") else [screenshot_prefix],
+    ),
+    name="static",
+)
 app.mount("/uploads", StaticFiles(directory=uploads_dir), name="uploads")
 
 
@@ -0,0 +1,30 @@
+"""
+转写清洗回归用例：循环短语压缩不能误伤数字、版本号与省略号
+"""
+import pytest
+
+from app.gpt.compaction import clean_text
+
+
+@pytest.mark.parametrize("text", [
+    "这个项目花了1000000元",
+    "服务器地址是192.168.1.1",
+    "1.1.1.1",
+    "v2.2.2.2 发布了",
+    "...... 好的",
+    "然后……我们看下一页",
+    "no, no, nothing here",
+    "哈哈哈哈哈",
+])
+def test_keeps_numbers_versions_and_ellipses(text):
+    assert clean_text(text) == text
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("好的，好的，好的，我们开始", "好的，我们开始"),
+    ("谢谢观看 谢谢观看 谢谢观看 谢谢观看", "谢谢观看"),
+    ("thank you thank you thank you", "thank you"),
+    ("go go go", "go"),
+])
+def test_collapses_repeated_phrases(text, expected):
+    assert clean_text(text) == expected